@@ -1,14 +1,20 @@
 import streamlit as st
 import ffmpeg
-import tempfile
 import os
 import json
 from groq import Groq
 
+from engine.asset_store import AssetStore, persist_upload
+from engine.workspace import scratch_path
+
 # Set your GROQ API key
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "use your grok api key")
 client = Groq(api_key=GROQ_API_KEY)
 
+@st.cache_resource
+def get_asset_store():
+    return AssetStore()
+
 # Function to get trim instructions
 def get_trim_instructions(prompt):
     system_prompt = (
@@ -119,7 +125,8 @@ def add_text_to_video(input_path, output_path, text_params):
             # Second try: Use libass subtitle filter instead
             try:
                 # Create temporary ASS subtitle file
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.ass', delete=False) as sub_file:
+                sub_path = scratch_path('.ass', small=True)
+                with open(sub_path, 'w') as sub_file:
                     sub_file.write(f"""
 [Script Info]
 ScriptType: v4.00+
@@ -134,7 +141,6 @@ Style: Default,Arial,{text_params["font_size"]},&H00FFFFFF,&H000000FF,&H00000000
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 Dialogue: 0,0:00:{text_params["start_time"]:02.1f},0:00:{text_params["start_time"] + text_params["duration"]:02.1f},Default,,0,0,0,,{text_params["text"]}
 """)
-                    sub_path = sub_file.name
 
                 (
                     ffmpeg
@@ -167,7 +173,7 @@ Dialogue: 0,0:00:{text_params["start_time"]:02.1f},0:00:{text_params["start_time
                     d = ImageDraw.Draw(img)
                     d.text((10, 10), text_params["text"], fill=text_params["font_color"], font=font)
                     
-                    img_path = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
+                    img_path = scratch_path('.png', small=True)
                     img.save(img_path)
                     
                     (
@@ -203,10 +209,8 @@ st.title("🎬 AI-Powered Video Editor")
 video_file = st.file_uploader("Upload your video", type=["mp4", "mov", "avi"])
 
 if video_file:
-    # Save uploaded file to temp location
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-        temp_video.write(video_file.read())
-        temp_video_path = temp_video.name
+    # Save uploaded file to the content-addressed store (reused across reruns)
+    _, temp_video_path = persist_upload(get_asset_store(), video_file, st.session_state)
     
     # Display original video
     st.video(temp_video_path)
@@ -266,7 +270,7 @@ if video_file:
                     text_params["duration"] = float(text_params["duration"])
                     text_params["font_size"] = int(text_params["font_size"])
                     
-                    output_path = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4").name
+                    output_path = scratch_path(".mp4")
                     if add_text_to_video(temp_video_path, output_path, text_params):
                         st.success("Text added successfully!")
                         st.video(output_path)
@@ -283,6 +287,3 @@ if video_file:
                     # Cleanup
                     if os.path.exists(output_path):
                         os.unlink(output_path)
-    
-    # Cleanup original file
-    os.unlink(temp_video_path)
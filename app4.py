@@ -1,359 +1,586 @@
 import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.web.server.websocket_headers import _get_websocket_headers
 import ffmpeg
-import tempfile
-import os
+import copy
 import json
-from groq import Groq
-from PIL import Image, ImageDraw, ImageFont
-from datetime import timedelta
-import speech_recognition as sr
-from pydub import AudioSegment
-
-# Initialize Groq client
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "use your api key")
-client = Groq(api_key=GROQ_API_KEY)
+import os
+import time
 
-# Initialize speech recognizer
-recognizer = sr.Recognizer()
+from engine.asset_store import AssetStore, persist_upload
+from engine.edit_plan import EditPlan
+from engine.filmstrip import FilmstripStore
+from engine.history import EditHistory
+from engine.clients import get_llm_client
+from engine.content_analysis import AnalysisPending, analyze_content, get_content_index, resolve_prompt_anchors
+from engine.disk_lru import pinned
+from engine.editing import extract_audio, generate_subtitles, render_subtitles, render_text_overlay, render_trim
+from engine.instruction_cache import InstructionCache
+from engine.instructions import InstructionResolver
+from engine.instrumentation import tracer
+from engine.media_index import index_media
+from engine.media_server import MediaServer
+from engine.proxy import ProxyStore, scale_edit_ops
+from engine.render_cache import RenderCache, render_key
+from engine.render_jobs import DONE, FAILED, QUEUED, RUNNING, RenderScheduler
+from engine.transcription import GoogleSpeechBackend, TranscriptCache, Transcriber
+from engine.workspace import get_workspace_manager
 
 # --- Core Functions ---
 
-def get_trim_instructions(prompt):
-    system_prompt = """You are a video editing assistant. Respond ONLY in valid JSON with these EXACT fields:
-{"start_time": "number", "duration": "number"}
-Rules:
-1. Both values must be positive numbers
-Example: 'trim first 5 seconds' -> {'start_time': '0', 'duration': '5'}
-NO EXPLANATIONS, just the JSON."""
-    
+@st.cache_resource
+def get_instruction_resolver():
+    """Shared parser/cache/LLM resolver, kept alive across reruns and sessions"""
+    return InstructionResolver(get_llm_client(), InstructionCache())
+
+@st.cache_resource
+def get_asset_store():
+    """Content-addressed store for uploads, shared across reruns and sessions"""
+    return AssetStore()
+
+@st.cache_resource
+def get_render_cache():
+    """Finished renders keyed by source digest and edit parameters"""
+    return RenderCache()
+
+@st.cache_resource
+def get_media_server():
+    """Side HTTP server that streams videos to the browser instead of buffering them in Streamlit"""
+    return MediaServer().start()
+
+def media_url(path, filename=None, download=False):
+    """Link to path on the media server, on the host this browser reached the app at"""
+    headers = _get_websocket_headers() or {}
+    return get_media_server().publish(path, filename, download=download, request_host=headers.get("Host"))
+
+@st.cache_resource
+def get_proxy_store():
+    """Downscaled copies of uploads that previews are rendered from"""
+    return ProxyStore()
+
+@st.cache_resource
+def get_scratch():
+    """Scratch workspace manager, with its sweeper for files orphaned by crashed renders"""
+    return get_workspace_manager().start_sweeper()
+
+@st.cache_resource
+def get_filmstrip_store():
+    """Timeline thumbnail sprites, made once per asset"""
+    return FilmstripStore()
+
+def get_trim_instructions(prompt, video_path=None):
     try:
-        chat_completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3
-        )
-        raw_response = chat_completion.choices[0].message.content.strip()
-        edit_data = json.loads(raw_response)
-        return {
-            "start_time": float(edit_data["start_time"]),
-            "duration": float(edit_data["duration"])
-        }
+        if video_path:
+            prompt = resolve_prompt_anchors(prompt, video_path, scan=False)
+        return get_instruction_resolver().trim(prompt)
+    except AnalysisPending:
+        return anchors_unavailable()
     except Exception as e:
-        st.error(f"Error getting trim instructions: {e}\nResponse: {raw_response}")
+        st.error(f"Error getting trim instructions: {e}")
         return None
 
-def get_text_overlay_instructions(prompt):
-    system_prompt = """You are a video editing assistant. Respond ONLY in valid JSON with these EXACT fields:
-{"text": "text", "start_time": "number", "duration": "number", 
-"font_size": "number", "font_color": "color", "x_position": "string", "y_position": "string"}
-Rules:
-1. Use basic colors (white, black, red, etc.)
-2. Font size 20-72
-Example: 'Add title at top center from 5-10s' -> 
-{"text": "My Title", "start_time": "5", "duration": "5", 
-"font_size": "48", "font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50"}
-NO EXPLANATIONS, just the JSON."""
-    
+def get_text_overlay_instructions(prompt, video_path=None):
     try:
-        chat_completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3
-        )
-        raw_response = chat_completion.choices[0].message.content.strip()
-        data = json.loads(raw_response)
-        return {
-            "text": data["text"],
-            "start_time": float(data["start_time"]),
-            "duration": float(data["duration"]),
-            "font_size": int(data["font_size"]),
-            "font_color": data["font_color"],
-            "x_position": data["x_position"],
-            "y_position": data["y_position"]
-        }
+        if video_path:
+            prompt = resolve_prompt_anchors(prompt, video_path, scan=False)
+        return get_instruction_resolver().text_overlay(prompt)
+    except AnalysisPending:
+        return anchors_unavailable()
     except Exception as e:
         st.error(f"Error getting text instructions: {e}")
         return None
 
+def get_edit_operations(prompt, video_path=None, offset=0.0):
+    """Ordered trim/text/subtitles/audio ops for a compound request, in one LLM round trip at most
+
+    With video_path, scene and silence anchors in the prompt are resolved against its
+    background analysis; offset is where the edited timeline starts in the video.
+    """
+    try:
+        if video_path:
+            prompt = resolve_prompt_anchors(prompt, video_path, offset, scan=False)
+        return get_instruction_resolver().operations(prompt)
+    except AnalysisPending:
+        return anchors_unavailable()
+    except Exception as e:
+        st.error(f"Error getting edit instructions: {e}")
+        return None
+
+def anchors_unavailable():
+    """Explain why scene and silence names can't be resolved yet; returns None"""
+    error = st.session_state.get("analysis_failed", {}).get(video_digest)
+    if error:
+        st.error(f"Scene and silence analysis failed, so those names can't be used: {error}")
+    else:
+        st.info("Still finding scenes and silences in this video; submit again in a moment")
+    return None
+
+def edit_fits(media, ops):
+    """Check edit params against the upload's indexed duration/frame size before any render"""
+    try:
+        media.check_ops(ops)
+    except ValueError as e:
+        st.error(f"That edit doesn't fit this video: {e}")
+        return False
+    return True
+
 # --- Audio/Subtitle Functions ---
 
-def extract_audio(video_path):
-    """Extract audio from video as WAV file"""
-    audio_path = tempfile.NamedTemporaryFile(suffix='.wav', delete=False).name
-    (
-        ffmpeg
-        .input(video_path)
-        .output(audio_path, acodec='pcm_s16le', ac=1, ar='16k')
-        .run(overwrite_output=True, quiet=True)
-    )
-    return audio_path
+@st.cache_resource
+def get_transcriber():
+    """Silence-chunked parallel transcriber with a per-chunk result cache"""
+    return Transcriber(GoogleSpeechBackend(), TranscriptCache())
 
 def transcribe_audio(audio_path):
-    """Transcribe audio to text using speech recognition"""
+    """Transcribe audio into timed (start, end, text) cues using speech recognition"""
     try:
-        with sr.AudioFile(audio_path) as source:
-            audio = recognizer.record(source)
-            text = recognizer.recognize_google(audio)
-            return text
+        cues = get_transcriber().transcribe(audio_path)
+        if not cues:
+            st.error("Speech recognition error: no speech recognized")
+            return None
+        return cues
     except Exception as e:
         st.error(f"Speech recognition error: {str(e)}")
         return None
 
-def generate_subtitles(text, chunk_size=5):
-    """Generate simple subtitles from transcribed text"""
-    words = text.split()
-    subtitles = []
-    for i in range(0, len(words), chunk_size):
-        chunk = ' '.join(words[i:i+chunk_size])
-        start_time = i * 0.5  # Approximate timing (0.5s per word)
-        end_time = start_time + (chunk_size * 0.5)
-        
-        # Format times as HH:MM:SS,ms
-        start_str = str(timedelta(seconds=start_time)).split('.')[0] + ",000"
-        end_str = str(timedelta(seconds=end_time)).split('.')[0] + ",000"
-        
-        subtitles.append(f"{len(subtitles)+1}\n{start_str} --> {end_str}\n{chunk}\n")
-    
-    return "\n".join(subtitles)
-
 # --- Video Processing Functions ---
 
-def trim_video(input_path, output_path, start_time, duration):
+def trim_video(input_path, output_path, start_time, duration, accurate=False):
     try:
-        (
-            ffmpeg
-            .input(input_path, ss=start_time)
-            .output(output_path, t=duration, c="copy")
-            .run(overwrite_output=True, quiet=True)
-        )
+        render_trim(input_path, output_path, start_time, duration, accurate)
         return True
     except ffmpeg.Error as e:
         st.error(f"Trim error: {e.stderr.decode() if e.stderr else str(e)}")
         return False
 
 def add_text_to_video(input_path, output_path, text_params):
-    """Ultra-robust text overlay function with multiple fallbacks"""
     try:
-        # First try: Simple approach with default font
-        try:
-            (
-                ffmpeg
-                .input(input_path)
-                .filter_('drawtext',
-                        text=text_params["text"],
-                        enable=f'between(t,{text_params["start_time"]},{text_params["start_time"] + text_params["duration"]})',
-                        x=text_params["x_position"],
-                        y=text_params["y_position"],
-                        fontsize=text_params["font_size"],
-                        fontcolor=text_params["font_color"])
-                .output(output_path,
-                       vcodec='libx264',
-                       acodec='copy',
-                       pix_fmt='yuv420p')
-                .global_args('-hide_banner')
-                .global_args('-loglevel', 'error')
-                .run(overwrite_output=True)
-            )
-            return True
-            
-        except ffmpeg.Error as e:
-            st.warning("Standard method failed, trying alternative approach...")
-            
-            # Second try: Use libass subtitle filter instead
-            try:
-                # Create temporary ASS subtitle file
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.ass', delete=False) as sub_file:
-                    sub_file.write(f"""
-[Script Info]
-ScriptType: v4.00+
-PlayResX: 384
-PlayResY: 288
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Arial,{text_params["font_size"]},&H00FFFFFF,&H000000FF,&H00000000,0,0,0,0,100,100,0,0,1,1,0,5,10,10,10,0
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-Dialogue: 0,0:00:{text_params["start_time"]:02.1f},0:00:{text_params["start_time"] + text_params["duration"]:02.1f},Default,,0,0,0,,{text_params["text"]}
-""")
-                    sub_path = sub_file.name
-
-                (
-                    ffmpeg
-                    .input(input_path)
-                    .filter_('ass', filename=sub_path)
-                    .output(output_path,
-                           vcodec='libx264',
-                           acodec='copy',
-                           pix_fmt='yuv420p')
-                    .global_args('-hide_banner')
-                    .global_args('-loglevel', 'error')
-                    .run(overwrite_output=True)
-                )
-                os.unlink(sub_path)
-                return True
-                
-            except ffmpeg.Error as e:
-                st.warning("ASS subtitle method failed, trying final fallback...")
-                
-                # Final try: Use images instead of text
-                try:
-                    # Create temporary image with text
-                    from PIL import Image, ImageDraw, ImageFont
-                    img = Image.new('RGBA', (400, 100), (0, 0, 0, 0))
-                    try:
-                        font = ImageFont.truetype("arial.ttf", text_params["font_size"])
-                    except:
-                        font = ImageFont.load_default()
-                    
-                    d = ImageDraw.Draw(img)
-                    d.text((10, 10), text_params["text"], fill=text_params["font_color"], font=font)
-                    
-                    img_path = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-                    img.save(img_path)
-                    
-                    (
-                        ffmpeg
-                        .input(input_path)
-                        .filter_('movie', filename=img_path, loop=0, shortest=1)
-                        .overlay(ffmpeg.input(input_path), 
-                                enable=f'between(t,{text_params["start_time"]},{text_params["start_time"] + text_params["duration"]})',
-                                x=text_params["x_position"],
-                                y=text_params["y_position"])
-                        .output(output_path,
-                               vcodec='libx264',
-                               acodec='copy',
-                               pix_fmt='yuv420p')
-                        .global_args('-hide_banner')
-                        .global_args('-loglevel', 'error')
-                        .run(overwrite_output=True)
-                    )
-                    os.unlink(img_path)
-                    return True
-                    
-                except Exception as img_e:
-                    st.error(f"All text overlay methods failed. Last error: {str(img_e)}")
-                    return False
-                    
-    except Exception as e:
-        st.error(f"Unexpected error: {str(e)}")
+        render_text_overlay(input_path, output_path, text_params)
+        return True
+    except RuntimeError as e:
+        st.error(str(e))
         return False
 
-def add_subtitles_to_video(input_path, output_path, srt_content):
-    """Burn subtitles into video"""
+def add_subtitles_to_video(input_path, output_path, srt_content, soft=False):
     try:
-        # Create temporary SRT file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.srt', delete=False) as srt_file:
-            srt_file.write(srt_content)
-            srt_path = srt_file.name
-        
-        (
-            ffmpeg
-            .input(input_path)
-            .filter_('subtitles', filename=srt_path)
-            .output(output_path, vcodec='libx264', acodec='copy', pix_fmt='yuv420p')
-            .run(overwrite_output=True, quiet=True)
-        )
-        os.unlink(srt_path)
+        render_subtitles(input_path, output_path, srt_content, soft)
         return True
+    except ValueError as e:
+        st.error(str(e))
+        return False
     except ffmpeg.Error as e:
         st.error(f"Subtitle error: {e.stderr.decode() if e.stderr else str(e)}")
-        if os.path.exists(srt_path):
-            os.unlink(srt_path)
         return False
 
+def render_edit_plan(input_path, output_path, plan):
+    """Render trims, text overlays, subtitles and audio edits together with a single encode"""
+    try:
+        plan.render(input_path, output_path)
+        return True
+    except ffmpeg.Error as e:
+        st.error(f"Render error: {e.stderr.decode() if e.stderr else str(e)}")
+        return False
+    except ValueError as e:
+        st.error(f"Invalid edit: {str(e)}")
+        return False
+
+# --- Render Jobs ---
+
+@st.cache_resource
+def get_scheduler():
+    """Bounded background render pool and job table shared by all sessions"""
+    return RenderScheduler()
+
+def submit_render(state_key, key, label, render_fn, total_seconds=None):
+    """Queue render_fn(output_path) through the render cache as a background job"""
+    cache = get_render_cache()
+
+    def run(job):
+        job.total_seconds = total_seconds
+        output_path = cache.render(key, ".mp4", lambda out: render_fn(out) or True)
+        return {"output_path": output_path}
+
+    st.session_state[state_key] = get_scheduler().submit(key, run, label, profile=profile_renders, pins=(video_path,)).id
+
+def render_preview(cache, proxies, digest, source_path, operation, params, label, render_fn, total_seconds=None):
+    """Render render_fn(input_path, output_path, scale) on the asset's proxy, through the render cache
+
+    Runs inside a job. The result's 'export' entry is what submit_render() needs to run
+    the same edit, with the same params, on the full-quality source.
+    """
+    proxy_path, scale = proxies.ensure(digest, source_path)
+    with pinned(proxy_path):
+        output_path = cache.render(
+            render_key(digest, f"{operation}@{proxies.height}p", params), ".mp4",
+            lambda out: render_fn(proxy_path, out, scale) or True)
+    export = {"key": render_key(digest, operation, params), "label": label,
+              "render_fn": lambda out: render_fn(source_path, out, 1.0), "total_seconds": total_seconds}
+    return {"output_path": output_path, "export": export}
+
+def submit_preview(state_key, operation, params, label, render_fn, total_seconds=None):
+    """Queue a proxy preview of an edit; the full-quality render waits until export is asked for"""
+    cache, proxies, digest, source_path = get_render_cache(), get_proxy_store(), video_digest, video_path
+
+    def run(job):
+        job.total_seconds = total_seconds
+        return render_preview(cache, proxies, digest, source_path, operation, params, label, render_fn, total_seconds)
+
+    st.session_state.pop(f"{state_key}_export", None)
+    st.session_state[state_key] = get_scheduler().submit(
+        render_key(digest, f"{operation}-preview", params), run, f"{label} preview", profile=profile_renders,
+        pins=(source_path,)).id
+
+def show_render_job(state_key, download_name):
+    """Show the job remembered under state_key; returns True while it still needs polling"""
+    job = get_scheduler().get(st.session_state.get(state_key))
+    if job is None:
+        return False
+
+    if job.status in (QUEUED, RUNNING):
+        progress = job.progress
+        text = f"{job.label}: {job.status}"
+        if job.status == RUNNING:
+            text += f" ({progress['out_time']:.1f}s encoded, {progress['fps']:.0f} fps, {progress['speed']:.1f}x)"
+        st.progress(progress.get("fraction", 0.0), text=text)
+        if st.button("Cancel", key=f"{state_key}_cancel"):
+            get_scheduler().cancel(job.id)
+        return True
+
+    if job.status == DONE:
+        result = job.result
+        if result.get("transcription"):
+            st.text_area("Transcription", result["transcription"], height=150, key=f"{state_key}_transcription")
+            st.text_area("Generated Subtitles", result["subtitles"], height=200, key=f"{state_key}_subtitles")
+        if result.get("rendered_steps") is not None:
+            st.caption(f"Re-rendered {result['rendered_steps']} step(s); the rest came from cache")
+        if result.get("export"):
+            return show_preview(state_key, job.label, result["output_path"], result["export"], download_name)
+        st.success(f"{job.label} finished!")
+        if result.get("soft_subtitles"):
+            # Browsers don't render muxed tracks, so the preview gets the cues as WebVTT
+            st.video(media_url(result["output_path"]), subtitles=result["subtitles"])
+        st.link_button("Download", media_url(result["output_path"], download_name, download=True))
+    elif job.status == FAILED:
+        st.error(f"{job.label} failed: {job.error}")
+    else:
+        st.info(f"{job.label} cancelled")
+    return False
+
+def show_preview(state_key, label, output_path, export, download_name):
+    """Show a preview with its full-quality export button; returns True while the export needs polling"""
+    export_key = f"{state_key}_export"
+    st.success(f"{label} ready")
+    st.video(media_url(output_path))
+    if st.button("Render full quality for download", key=f"{state_key}_export_btn"):
+        submit_render(export_key, export["key"], export["label"], export["render_fn"], export["total_seconds"])
+    return show_render_job(export_key, download_name)
+
+# --- Edit History ---
+
+def get_history():
+    """This session's step-by-step edit history of the current upload"""
+    return st.session_state.setdefault(f"history:{video_digest}", EditHistory())
+
+def history_operations(prompt, history, index=None):
+    """Ops for one history step (replacing step index if given), or None after reporting why not"""
+    before = history.ops(index) if index is not None else history.ops()
+    operations = get_edit_operations(prompt, video_path, EditPlan(before).resolve()[0])
+    if not operations:
+        return None
+    ops = []
+    for op in operations:
+        if op["op"] == "subtitles":
+            st.warning("Subtitles can't be applied step by step yet; skipping")
+        else:
+            ops.append(op)
+    if not ops or not edit_fits(media, before + ops):
+        return None
+    return ops
+
+def show_history_version(history):
+    """Preview the version under the history cursor, rendering it if needed; returns True while polling"""
+    cache, proxies = get_render_cache(), get_proxy_store()
+    base_key = f"{video_digest}@{proxies.height}p"
+    ops = history.ops()
+    export = {"key": render_key(video_digest, "plan", ops), "label": "Edited video",
+              "render_fn": lambda out: EditPlan(ops).render(video_path, out),
+              "total_seconds": EditPlan(ops).resolve()[1] or media.duration}
+
+    output_path = history.cached_output(cache, base_key)
+    if output_path:
+        # Undo/redo onto a version rendered before: no job, it shows at once
+        return show_preview("history_job", f"Version {history.position}", output_path, export, "edited.mp4")
+
+    version_key = history.keys(base_key)[-1]
+    if st.session_state.get("history_job_key") != version_key:
+        snapshot, digest, source_path = copy.deepcopy(history), video_digest, video_path
+
+        def run(job):
+            proxy_path, scale = proxies.ensure(digest, source_path)
+            with pinned(proxy_path):
+                path, rendered = snapshot.render(cache, base_key, proxy_path, scale=scale)
+            return {"output_path": path, "export": export, "rendered_steps": rendered}
+
+        st.session_state.pop("history_job_export", None)
+        st.session_state["history_job_key"] = version_key
+        st.session_state["history_job"] = get_scheduler().submit(
+            version_key, run, f"Version {history.position}", profile=profile_renders, pins=(source_path,)).id
+    return show_render_job("history_job", "edited.mp4")
+
+# --- Timeline ---
+
+TIMELINE_HTML = """
+<div id="strip" style="height:24px;margin-top:{tile_height}px;cursor:crosshair;background:#444;border-radius:4px"></div>
+<div id="hover" style="display:none;position:absolute;top:0;width:{tile_width}px;height:{tile_height}px;
+     background-image:url('{sprite_url}');border:1px solid #fff;box-shadow:0 2px 6px #0008">
+  <span id="time" style="position:absolute;bottom:0;left:0;padding:0 4px;font:12px sans-serif;
+        color:#fff;background:#0009"></span>
+</div>
+<script>
+const index = {index};
+const strip = document.getElementById("strip"), hover = document.getElementById("hover");
+strip.onmousemove = (event) => {{
+  const box = strip.getBoundingClientRect();
+  const fraction = Math.min(Math.max((event.clientX - box.left) / box.width, 0), 1);
+  const seconds = fraction * index.duration;
+  const tile = Math.min(index.count - 1, Math.round(seconds / index.interval));
+  const column = tile % index.columns, row = Math.floor(tile / index.columns);
+  hover.style.backgroundPosition = `-${{column * index.tile_width}}px -${{row * index.tile_height}}px`;
+  hover.style.left = Math.min(Math.max(event.clientX - index.tile_width / 2, 0), box.width - index.tile_width) + "px";
+  document.getElementById("time").textContent =
+    `${{Math.floor(seconds / 60)}}:${{String(Math.floor(seconds % 60)).padStart(2, "0")}}`;
+  hover.style.display = "block";
+}};
+strip.onmouseleave = () => {{ hover.style.display = "none"; }};
+</script>
+"""
+
+def show_timeline():
+    """Hover-to-preview filmstrip under the player; returns True while its sprite is still being made"""
+    store = get_filmstrip_store()
+    cached = store.get(video_digest)
+    if cached is None:
+        # A failed sprite isn't retried for this upload, or every rerun would resubmit it
+        failed = st.session_state.setdefault("filmstrip_failed", {})
+        if video_digest in failed:
+            return False
+        job = get_scheduler().submit(("filmstrip", video_digest),
+                                     lambda job: store.ensure(video_digest, video_path), "Timeline", pins=(video_path,))
+        if job.status in (QUEUED, RUNNING):
+            st.caption("Building timeline thumbnails...")
+            return True
+        if job.status != DONE:
+            failed[video_digest] = job.error
+            return False
+        cached = job.result
+    sprite_path, index = cached
+    components.html(TIMELINE_HTML.format(
+        sprite_url=media_url(sprite_path), index=json.dumps(index),
+        tile_width=index["tile_width"], tile_height=index["tile_height"],
+    ), height=index["tile_height"] + 40)
+    return False
+
+# --- Content Analysis ---
+
+def start_content_analysis():
+    """Find the upload's scenes and silences in a background job; returns True while it runs
+
+    Prompts naming anchors are only resolved from the finished analysis, so the full
+    decode never runs in the script thread.
+    """
+    failed = st.session_state.setdefault("analysis_failed", {})
+    if video_digest in failed or get_content_index().get(video_path) is not None:
+        return False
+    job = get_scheduler().submit(("content_analysis", video_digest),
+                                 lambda job: analyze_content(video_path), "Scene analysis", pins=(video_path,))
+    if job.status in (QUEUED, RUNNING):
+        return True
+    if job.status != DONE:
+        failed[video_digest] = job.error
+    return False
+
 # --- Streamlit UI ---
 
 st.title("🎬 AI Video Editor")
 st.write("Trim videos, add text overlays, or generate automatic subtitles")
 
+with st.sidebar.expander("Pipeline timings"):
+    profile_renders = st.checkbox("Write a cProfile dump for each render", key="profile_renders")
+    for stage, stats in sorted(tracer.summary().items()):
+        st.write(f"**{stage}**: p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s ({stats['count']} runs)")
+    scratch = get_scratch().usage()
+    st.write(f"**scratch**: {scratch['disk_bytes'] / 1024 ** 2:.0f} MiB on disk, "
+             f"{scratch['ram_bytes'] / 1024 ** 2:.0f} MiB in RAM, {scratch['active']} workspaces")
+
 video_file = st.file_uploader("Upload Video", type=["mp4", "mov", "avi"])
 if not video_file:
     st.stop()
 
-# Save uploaded file
-with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_video:
-    tmp_video.write(video_file.read())
-    video_path = tmp_video.name
+# Save uploaded file (stored once per content hash and reused across reruns)
+video_digest, video_path = persist_upload(get_asset_store(), video_file, st.session_state)
+
+try:
+    media = index_media(video_path)
+except (ffmpeg.Error, OSError) as e:
+    st.error(f"Could not read the video: {e}")
+    st.stop()
 
-st.video(video_path)
+st.video(media_url(video_path))
+polling = show_timeline()
+analyzing = start_content_analysis()
+polling |= analyzing
 
-tab1, tab2, tab3 = st.tabs(["✂️ Trim", "🖋️ Text Overlay", "🔤 Auto-Subtitles"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["✂️ Trim", "🖋️ Text Overlay", "🔤 Auto-Subtitles", "🧩 Combined Edit",
+                                        "🕘 Step by Step"])
 
 with tab1:
     st.subheader("Trim Video")
-    trim_prompt = st.text_area("How should we trim? (e.g., 'Keep first 30 seconds')", key="trim_prompt")
+    trim_prompt = st.text_area("How should we trim? (e.g., 'Keep first 30 seconds' or 'Cut the silent part at the start')",
+                               key="trim_prompt")
+    analysis = get_content_index().get(video_path)
+    if analysis:
+        st.caption("Found in this video: " + ", ".join(
+            f"{name} {seconds:.1f}s" for name, seconds in analysis.anchors().items() if name not in ("end", "scene 1")))
+    elif analyzing:
+        st.caption("Finding scenes and silences...")
+    accurate_trim = st.checkbox("Frame-accurate cut (re-encodes only the boundary frames)", value=True, key="trim_accurate")
     if st.button("Trim", key="trim_btn") and trim_prompt:
-        with st.spinner("Processing trim..."):
-            params = get_trim_instructions(trim_prompt)
-            if params:
-                output_path = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False).name
-                if trim_video(video_path, output_path, params["start_time"], params["duration"]):
-                    st.success("Trim successful!")
-                    st.video(output_path)
-                    with open(output_path, 'rb') as f:
-                        st.download_button("Download", f, "trimmed.mp4")
-                    os.unlink(output_path)
+        with st.spinner("Reading trim instructions..."):
+            params = get_trim_instructions(trim_prompt, video_path)
+        if params and edit_fits(media, [dict(params, op="trim")]):
+            submit_preview(
+                "trim_job", "trim", dict(params, accurate=accurate_trim), "Trim",
+                lambda source, out, scale: render_trim(source, out, params["start_time"], params["duration"], accurate_trim),
+                total_seconds=params["duration"])
+    polling |= show_render_job("trim_job", "trimmed.mp4")
 
 with tab2:
     st.subheader("Add Text Overlay")
     text_prompt = st.text_area("Describe your text (e.g., 'Add \"Welcome\" at bottom center from 5-10s')", key="text_prompt")
     if st.button("Add Text", key="text_btn") and text_prompt:
-        with st.spinner("Adding text..."):
-            params = get_text_overlay_instructions(text_prompt)
-            if params:
-                output_path = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False).name
-                if add_text_to_video(video_path, output_path, params):
-                    st.success("Text added!")
-                    st.video(output_path)
-                    with open(output_path, 'rb') as f:
-                        st.download_button("Download", f, "with_text.mp4")
-                    os.unlink(output_path)
+        with st.spinner("Reading text instructions..."):
+            params = get_text_overlay_instructions(text_prompt, video_path)
+        if params and edit_fits(media, [dict(params, op="text")]):
+            submit_preview(
+                "text_job", "text", params, "Text overlay",
+                lambda source, out, scale: render_text_overlay(source, out, params, scale),
+                total_seconds=media.duration)
+    polling |= show_render_job("text_job", "with_text.mp4")
 
 with tab3:
     st.subheader("Generate Subtitles from Audio")
+    burn_subtitles = st.checkbox("Burn into the picture (re-encodes the video; otherwise added as a subtitle track)",
+                                 key="sub_burn")
     if st.button("Generate Subtitles Automatically", key="sub_btn"):
-        with st.spinner("Processing..."):
-            # Step 1: Extract audio
+        transcriber, cache, proxies = get_transcriber(), get_render_cache(), get_proxy_store()
+        total_seconds = media.duration
+
+        def auto_subtitles(job):
+            job.total_seconds = total_seconds
             audio_path = extract_audio(video_path)
-            
-            # Step 2: Transcribe audio
-            st.info("Transcribing audio...")
-            transcription = transcribe_audio(audio_path)
-            os.unlink(audio_path)
-            
-            if transcription:
-                st.success("Transcription successful!")
-                st.text_area("Transcription", transcription, height=150)
-                
-                # Step 3: Generate subtitles
-                st.info("Generating subtitles...")
-                subtitles = generate_subtitles(transcription)
-                st.text_area("Generated Subtitles", subtitles, height=200)
-                
-                # Step 4: Add subtitles to video
-                st.info("Adding subtitles to video...")
-                output_path = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False).name
-                if add_subtitles_to_video(video_path, output_path, subtitles):
-                    st.success("Subtitles added successfully!")
-                    st.video(output_path)
-                    
-                    with open(output_path, 'rb') as f:
-                        st.download_button(
-                            "Download Subtitled Video",
-                            f,
-                            "subtitled_video.mp4",
-                            "video/mp4"
-                        )
-                    
-                    os.unlink(output_path)
-
-# Cleanup
-os.unlink(video_path)
+            try:
+                cues = transcriber.transcribe(audio_path)
+            finally:
+                os.unlink(audio_path)
+            if not cues:
+                raise RuntimeError("Speech recognition error: no speech recognized")
+            subtitles = generate_subtitles(cues)
+            transcription = " ".join(text for _, _, text in cues)
+            if not burn_subtitles:
+                # A remux takes about as long as a file copy, so the full-quality file is the preview
+                output_path = cache.render(
+                    render_key(video_digest, "soft-subtitles", {"srt_content": subtitles}), ".mp4",
+                    lambda out: render_subtitles(video_path, out, subtitles, soft=True) or True)
+                return {"output_path": output_path, "subtitles": subtitles, "transcription": transcription,
+                        "soft_subtitles": True}
+            result = render_preview(
+                cache, proxies, video_digest, video_path, "subtitles", {"srt_content": subtitles}, "Auto-subtitles",
+                lambda source, out, scale: render_subtitles(source, out, subtitles), total_seconds)
+            return dict(result, subtitles=subtitles, transcription=transcription)
+
+        st.session_state.pop("sub_job_export", None)
+        st.session_state["sub_job"] = get_scheduler().submit(
+            ("auto-subtitles", video_digest, burn_subtitles), auto_subtitles, "Auto-subtitles preview", profile=profile_renders,
+            pins=(video_path,)).id
+    polling |= show_render_job("sub_job", "subtitled_video.mp4")
+
+with tab4:
+    st.subheader("Combine Edits in One Render")
+    combo_prompt = st.text_area("Describe all edits (e.g., 'Keep 0:30 to 1:00 and add \"Intro\" at top center from 0-3s')",
+                                key="combo_prompt")
+    combo_subtitles = st.checkbox("Add automatic subtitles", key="combo_subtitles")
+    combo_burn = st.checkbox("Burn subtitles into the picture instead of adding a subtitle track", key="combo_burn")
+    if st.button("Render", key="combo_btn"):
+        plan, ok = EditPlan(), True
+        if combo_prompt.strip():
+            with st.spinner("Reading edit instructions..."):
+                operations = get_edit_operations(combo_prompt, video_path)
+            ok = operations is not None
+            for op in operations or []:
+                if op["op"] == "subtitles":
+                    combo_subtitles = True
+                else:
+                    plan.ops.append(op)
+            ok = ok and edit_fits(media, plan.ops)
+
+        if ok and (plan.ops or combo_subtitles):
+            transcriber, cache, proxies = get_transcriber(), get_render_cache(), get_proxy_store()
+
+            def combined_edit(job):
+                final_plan = plan
+                if combo_subtitles:
+                    audio_path = extract_audio(video_path)
+                    try:
+                        cues = transcriber.transcribe(audio_path)
+                    finally:
+                        os.unlink(audio_path)
+                    if not cues:
+                        raise RuntimeError("Speech recognition error: no speech recognized")
+                    # Cues are on the source timeline, so they go before the trim
+                    subtitles = EditPlan().subtitles(generate_subtitles(cues), soft=not combo_burn).ops
+                    final_plan = EditPlan(subtitles + plan.ops)
+                _, job.total_seconds, _ = final_plan.resolve()
+                return render_preview(
+                    cache, proxies, video_digest, video_path, "plan", final_plan.ops, "Combined edit",
+                    lambda source, out, scale: EditPlan(scale_edit_ops(final_plan.ops, scale)).render(source, out),
+                    job.total_seconds)
+
+            st.session_state.pop("combo_job_export", None)
+            st.session_state["combo_job"] = get_scheduler().submit(
+                render_key(video_digest, "plan-job",
+                           {"ops": plan.ops, "subtitles": combo_subtitles, "burn": combo_burn}),
+                combined_edit, "Combined edit preview", profile=profile_renders, pins=(video_path,)).id
+    polling |= show_render_job("combo_job", "edited.mp4")
+
+with tab5:
+    st.subheader("Edit Step by Step")
+    history = get_history()
+    history_prompt = st.text_input("Next edit, applied to the current version (e.g., 'Add \"Intro\" at the top from 0-3s')",
+                                   key="history_prompt")
+    apply_col, undo_col, redo_col = st.columns(3)
+    if apply_col.button("Apply", key="history_apply") and history_prompt.strip():
+        with st.spinner("Reading edit instructions..."):
+            ops = history_operations(history_prompt, history)
+        if ops:
+            history.push(ops, history_prompt)
+    undo_col.button("↶ Undo", key="history_undo", on_click=history.undo, disabled=history.position == 0)
+    redo_col.button("↷ Redo", key="history_redo", on_click=history.redo,
+                    disabled=history.position == len(history.steps))
+
+    for index, step in enumerate(history.steps):
+        marker = "✅" if index < history.position else "↩️"
+        with st.expander(f"{marker} Step {index + 1}: {step['prompt'] or step['op']['op']}"):
+            new_prompt = st.text_input("Change this step to", value=step["prompt"], key=f"history_step_{index}")
+            if st.button("Replace step", key=f"history_replace_{index}") and new_prompt.strip():
+                ops = history_operations(new_prompt, history, index)
+                if ops:
+                    history.replace(index, ops, new_prompt)
+                    st.rerun()
+
+    if history.position:
+        polling |= show_history_version(history)
+
+# Poll running jobs instead of blocking the script on them
+if polling:
+    time.sleep(1)
+    st.rerun()
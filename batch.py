@@ -0,0 +1,265 @@
+"""Apply prompt-driven or structured edits to a directory or manifest of videos, in parallel.
+
+    python batch.py videos/ --output-dir out/ --trim "keep first 30 seconds" \\
+        --text 'Add "Hello" at top center from 1-4s' --subtitles --workers 4
+    python batch.py manifest.jsonl --output-dir out/ --ops ops.json
+    python batch.py videos/ --output-dir out/ --edit "remove background noise and normalize the audio"
+
+A manifest is a JSON list or JSON lines of {"input": ..., "output": ..., "ops": [...],
+"prompts": {"edit": ..., "trim": ..., "text": [...], "subtitles": "soft" | "burn"}}; only "input" is required and
+entries without ops or prompts use the ones given on the command line. Relative "input" and
+"output" paths are taken from the manifest's directory. Ops are EditPlan
+operations, plus {"op": "auto_subtitles"} for transcribed subtitles, muxed as a subtitle track
+unless "soft" is false, which burns them in.
+Prompts may name scene and silence anchors ("trim the intro", 'add "Hi" at first speech for 3s');
+a video is analyzed for them once, the first time one of its prompts does.
+
+Every finished file is appended to the progress file as one JSON result. Re-running the
+same command skips files whose result is "ok" and whose output still exists, so an
+interrupted batch picks up where it stopped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ffmpeg
+
+from engine.content_analysis import resolve_prompt_anchors
+from engine.edit_plan import EditPlan
+from engine.editing import extract_audio, generate_subtitles
+from engine.media_index import index_media
+from engine.render_cache import render_key
+from engine.settings import RENDER_WORKERS
+from engine.workspace import get_workspace_manager, workspace
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+_transcriber = None
+
+
+# --- Task Planning ---
+
+
+def load_entries(source):
+    """Manifest entries, or one entry per video file found under a directory"""
+    if os.path.isdir(source):
+        entries = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    entries.append({"input": path, "relative": os.path.relpath(path, source)})
+        return sorted(entries, key=lambda entry: entry["relative"])
+
+    with open(source) as f:
+        if source.endswith(".jsonl"):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(source))
+    for entry in entries:
+        entry["input"] = os.path.join(base, entry["input"])
+        if entry.get("output"):
+            entry["output"] = os.path.join(base, entry["output"])
+        entry.setdefault("relative", os.path.basename(entry["input"]))
+    return entries
+
+
+def resolve_ops(resolver, prompts, memo, input_path=None):
+    """EditPlan ops for {'edit', 'trim', 'text', 'subtitles'} prompts, asking for each distinct prompt once
+
+    With input_path, scene and silence anchors in the prompts are resolved against that video.
+    """
+    def resolve(kind, prompt):
+        if input_path:
+            # Prompts apply after the trims resolved so far, so anchors shift by their starts
+            offset = sum(op["start_time"] for op in ops if op["op"] == "trim")
+            prompt = resolve_prompt_anchors(prompt, input_path, offset)
+        if (kind, prompt) not in memo:
+            method = {"edit": resolver.operations, "trim": resolver.trim, "text": resolver.text_overlay}[kind]
+            memo[kind, prompt] = method(prompt)
+        return memo[kind, prompt]
+
+    ops = []
+    if prompts.get("subtitles"):
+        ops.append({"op": "auto_subtitles", "soft": prompts["subtitles"] != "burn"})
+    if prompts.get("edit"):
+        ops.extend(resolve("edit", prompts["edit"]))
+    if prompts.get("trim"):
+        params = resolve("trim", prompts["trim"])
+        ops.append({"op": "trim", "start_time": float(params["start_time"]), "duration": float(params["duration"])})
+    for prompt in prompts.get("text") or []:
+        ops.append(dict(resolve("text", prompt), op="text"))
+    return ops
+
+
+def task_id(input_path, output_path, ops):
+    """Identity of one unit of work: the input file's size/mtime, the output and the ops"""
+    stat = os.stat(input_path)
+    return render_key(f"{os.path.abspath(input_path)}:{stat.st_size}:{stat.st_mtime_ns}", "batch",
+                      {"output": os.path.abspath(output_path), "ops": ops})
+
+
+def load_progress(path):
+    """{task id: result} for every task already finished successfully"""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interruption
+                if result.get("status") == "ok":
+                    done[result["id"]] = result
+    return done
+
+
+# --- Workers ---
+
+
+def _get_transcriber():
+    global _transcriber
+    if _transcriber is None:
+        from engine.transcription import GoogleSpeechBackend, TranscriptCache, Transcriber
+        _transcriber = Transcriber(GoogleSpeechBackend(), TranscriptCache())
+    return _transcriber
+
+
+def _is_auto_subtitles(op):
+    return op["op"] == "auto_subtitles" or (op["op"] == "subtitles" and "srt_content" not in op)
+
+
+def materialize_ops(ops, input_path):
+    """Replace auto_subtitles ops with subtitles transcribed from input_path"""
+    if not any(_is_auto_subtitles(op) for op in ops):
+        return ops
+    audio_path = extract_audio(input_path)
+    try:
+        cues = _get_transcriber().transcribe(audio_path)
+    finally:
+        os.unlink(audio_path)
+    if not cues:
+        raise RuntimeError("no speech recognized")
+    soft = all(op.get("soft", True) for op in ops if _is_auto_subtitles(op))
+    # Cues are on the source timeline, so the subtitles go before any trim
+    return (EditPlan().subtitles(generate_subtitles(cues), soft).ops
+            + [op for op in ops if not _is_auto_subtitles(op)])
+
+
+def run_task(task, parallel=False):
+    """Render one task; always returns a result dict, never raises"""
+    started = time.perf_counter()
+    result = {"id": task["id"], "input": task["input"], "output": task["output"]}
+    stem, extension = os.path.splitext(task["output"])
+    partial_path = f"{stem}.partial{extension}"
+    try:
+        os.makedirs(os.path.dirname(task["output"]) or ".", exist_ok=True)
+        with workspace("batch"):
+            EditPlan(materialize_ops(task["ops"], task["input"])).render(task["input"], partial_path, parallel=parallel)
+        os.replace(partial_path, task["output"])
+        result.update(status="ok", output_bytes=os.path.getsize(task["output"]))
+    except Exception as e:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        result.update(status="failed", error=describe_error(e))
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def describe_error(error):
+    if isinstance(error, ffmpeg.Error) and error.stderr:
+        return error.stderr.decode(errors="replace").strip().splitlines()[-1]
+    return f"{type(error).__name__}: {error}"
+
+
+# --- Command Line ---
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory of videos or a .json/.jsonl manifest")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--edit", help="compound edit prompt, resolved in one LLM call")
+    parser.add_argument("--trim", help="trim prompt")
+    parser.add_argument("--text", action="append", default=[], help="text overlay prompt (repeatable)")
+    parser.add_argument("--subtitles", nargs="?", const="soft", choices=("soft", "burn"),
+                        help="add transcribed subtitles as a track (soft, the default) or burn them in")
+    parser.add_argument("--ops", help="JSON file with a list of EditPlan ops, instead of prompts")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS)
+    parser.add_argument("--progress", help="results/progress file (default: <output-dir>/batch-progress.jsonl)")
+    args = parser.parse_args()
+
+    get_workspace_manager().sweep()  # scratch left behind by earlier, killed runs
+    progress_path = args.progress or os.path.join(args.output_dir, "batch-progress.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(progress_path)), exist_ok=True)
+    default_prompts = {"edit": args.edit, "trim": args.trim, "text": args.text, "subtitles": args.subtitles}
+    default_ops = None
+    if args.ops:
+        with open(args.ops) as f:
+            default_ops = json.load(f)
+
+    resolver, memo = None, {}
+    done = load_progress(progress_path)
+    tasks, results, skipped = [], [], 0
+    for entry in load_entries(args.source):
+        output_path = entry.get("output") or os.path.join(args.output_dir, entry["relative"])
+        result = {"input": entry["input"], "output": output_path}
+        try:
+            ops = entry.get("ops")
+            if ops is None and (entry.get("prompts") or default_ops is None):
+                prompts = entry.get("prompts") or default_prompts
+                if resolver is None and (prompts.get("edit") or prompts.get("trim") or prompts.get("text")):
+                    resolver = _make_resolver()
+                ops = resolve_ops(resolver, prompts, memo, entry["input"])
+            elif ops is None:
+                ops = default_ops
+            index_media(entry["input"]).check_ops(ops)
+            result["id"] = task_id(entry["input"], output_path, ops)
+        except Exception as e:
+            results.append(dict(result, id=None, status="failed", error=describe_error(e), seconds=0.0))
+            continue
+        if result["id"] in done and os.path.exists(output_path):
+            skipped += 1
+            continue
+        tasks.append(dict(result, ops=ops))
+
+    print(f"{len(tasks)} to render, {len(results)} failed to plan, {skipped} already done", file=sys.stderr)
+    with open(progress_path, "a") as progress:
+        for result in results:
+            progress.write(json.dumps(result) + "\n")
+
+        # Several files at once: each render stays on one process instead of splitting into chunks
+        parallel = args.workers <= 1
+        with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = [pool.submit(run_task, task, parallel) for task in tasks]
+            try:
+                for count, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    results.append(result)
+                    progress.write(json.dumps(result) + "\n")
+                    progress.flush()
+                    print(f"[{count}/{len(tasks)}] {result['status']:<6} {result['input']} ({result['seconds']}s)"
+                          + (f": {result['error']}" if result["status"] != "ok" else ""), file=sys.stderr)
+            except KeyboardInterrupt:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    failed = [result for result in results if result["status"] != "ok"]
+    print(json.dumps({"rendered": len(results) - len(failed), "failed": len(failed), "skipped": skipped,
+                      "progress": progress_path}))
+    sys.exit(1 if failed else 0)
+
+
+def _make_resolver():
+    from engine.clients import get_llm_client
+    from engine.instruction_cache import InstructionCache
+    from engine.instructions import InstructionResolver
+    return InstructionResolver(get_llm_client(), InstructionCache())
+
+
+if __name__ == "__main__":
+    main()
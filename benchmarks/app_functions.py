@@ -0,0 +1,342 @@
+"""Benchmark the media functions of app4.py over a matrix of synthetic clips and compare runs.
+
+    python -m benchmarks.app_functions run [--preset quick|full] [--resolutions 480p,1080p]
+        [--durations 10,60] [--codecs libx264,libx265] [--repeat 3] [--output results.json]
+    python -m benchmarks.app_functions compare baseline.json results.json [--threshold 0.15]
+
+Sources are rendered with lavfi testsrc2 + sine, Groq and the speech recognizer are
+stubbed, and every case runs in a fresh process so peak RSS belongs to that case alone.
+compare exits with status 1 when any case got slower, heavier or bigger than the
+baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.media import synthesize_video
+from benchmarks.stubs import StubChatClient, StubRecognizer
+from engine.edit_plan import EditPlan
+from engine.editing import media_duration
+from engine.ffmpeg_caps import get_capabilities
+from engine.instructions import InstructionResolver
+from engine.instrumentation import tracer
+from engine.subtitle_utils import format_srt
+from engine.transcription import Transcriber
+
+# Bump when the result layout changes; compare refuses to mix versions
+SCHEMA_VERSION = 1
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app4.py")
+UI_MARKER = "# --- Streamlit UI ---"
+
+RESOLUTIONS = {"480p": (854, 480), "720p": (1280, 720), "1080p": (1920, 1080), "2160p": (3840, 2160)}
+PRESETS = {
+    "quick": {"resolutions": ["480p", "1080p"], "durations": [10], "codecs": ["libx264"]},
+    "full": {"resolutions": list(RESOLUTIONS), "durations": [10, 60], "codecs": ["libx264", "libx265"]},
+}
+
+# Worded so the local parser declines them and the (stubbed) LLM round trip is exercised
+TRIM_PROMPT = "keep the most interesting bit near the beginning"
+TEXT_PROMPT = "put a friendly greeting somewhere near the top"
+
+# Metrics compared against the baseline, lower is better for all of them
+METRICS = ("wall_seconds", "cpu_seconds", "peak_rss_bytes", "output_bytes")
+
+# Time changes smaller than this are noise, whatever their ratio
+MIN_SECONDS_DELTA = 0.05
+
+
+def load_app_functions(path=APP_PATH):
+    """Execute app4.py up to its Streamlit UI section and return the resulting namespace"""
+    with open(path) as f:
+        source = f.read().split(UI_MARKER)[0]
+    namespace = {"__name__": "app4_functions", "__file__": path}
+    exec(compile(source, path, "exec"), namespace)
+    return namespace
+
+
+def stub_services(app, llm_latency=0.0, recognizer_latency=0.0):
+    """Point app4's resolver and transcriber getters at offline stubs without caches"""
+    resolver = InstructionResolver(StubChatClient(llm_latency), None)
+    transcriber = Transcriber(StubRecognizer(recognizer_latency), None)
+    app["get_instruction_resolver"] = lambda: resolver
+    app["get_transcriber"] = lambda: transcriber
+
+
+# --- Cases ---
+#
+# Each case is (setup, run). setup(app, source, workdir) prepares untimed inputs;
+# run(app, source, output_path, prepared) is timed and returns the path it wrote,
+# or None when the function reported failure.
+
+
+def _no_setup(app, source, workdir):
+    return None
+
+
+def _trim(accurate):
+    def run(app, source, output_path, prepared):
+        params = app["get_trim_instructions"](TRIM_PROMPT)
+        if params and app["trim_video"](source, output_path, params["start_time"], params["duration"], accurate):
+            return output_path
+        return None
+    return run
+
+
+def _add_text(app, source, output_path, prepared):
+    params = app["get_text_overlay_instructions"](TEXT_PROMPT)
+    if params and app["add_text_to_video"](source, output_path, params):
+        return output_path
+    return None
+
+
+def _subtitle_setup(app, source, workdir):
+    duration = media_duration(source) or 10.0
+    cues = [(t, min(t + 2.5, duration), f"Line {i} of the benchmark") for i, t in enumerate(range(0, int(duration), 3))]
+    return format_srt(cues)
+
+
+def _add_subtitles(soft):
+    def run(app, source, output_path, prepared):
+        return output_path if app["add_subtitles_to_video"](source, output_path, prepared, soft) else None
+    return run
+
+
+def _audio_edit(app, source, output_path, prepared):
+    plan = EditPlan().audio("denoise").audio("mute", start_time=1, duration=2).audio("normalize")
+    return output_path if app["render_edit_plan"](source, output_path, plan) else None
+
+
+def _extract_audio(app, source, output_path, prepared):
+    audio_path = app["extract_audio"](source)
+    shutil.move(audio_path, output_path)  # scratch may be on another filesystem (tmpfs)
+    return output_path
+
+
+def _audio_setup(app, source, workdir):
+    return app["extract_audio"](source)
+
+
+def _generate_subtitles(app, source, output_path, prepared):
+    cues = app["transcribe_audio"](prepared)
+    if not cues:
+        return None
+    with open(output_path, "w") as f:
+        f.write(app["generate_subtitles"](cues))
+    return output_path
+
+
+CASES = {
+    "trim_video": (_no_setup, _trim(False), ".mp4"),
+    "trim_video[accurate]": (_no_setup, _trim(True), ".mp4"),
+    "add_text_to_video": (_no_setup, _add_text, ".mp4"),
+    "add_subtitles_to_video": (_subtitle_setup, _add_subtitles(False), ".mp4"),
+    "add_subtitles_to_video[soft]": (_subtitle_setup, _add_subtitles(True), ".mp4"),
+    "render_edit_plan[audio]": (_no_setup, _audio_edit, ".mp4"),
+    "extract_audio": (_no_setup, _extract_audio, ".wav"),
+    "generate_subtitles": (_audio_setup, _generate_subtitles, ".srt"),
+}
+
+
+def _cpu_seconds():
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _max_rss_bytes(who):
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure_case(name, source, workdir, repeat, llm_latency, recognizer_latency):
+    """Run one case repeat times in this (fresh) process; returns medians and peaks"""
+    tracer.metrics_dir = os.path.join(workdir, "metrics")
+    app = load_app_functions()
+    stub_services(app, llm_latency, recognizer_latency)
+    setup, run, suffix = CASES[name]
+    try:
+        prepared = setup(app, source, workdir)
+    except Exception as e:
+        return {"ok": False, "error": f"setup: {type(e).__name__}: {e}"}
+
+    walls, cpus, output_bytes = [], [], None
+    for attempt in range(repeat):
+        output_path = os.path.join(workdir, f"{name}-{attempt}{suffix}")
+        cpu_started, started = _cpu_seconds(), time.perf_counter()
+        try:
+            written = run(app, source, output_path, prepared)
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        walls.append(time.perf_counter() - started)
+        cpus.append(_cpu_seconds() - cpu_started)
+        if written is None:
+            return {"ok": False}
+        output_bytes = os.path.getsize(written)
+        os.unlink(written)
+
+    return {
+        "ok": True,
+        "wall_seconds": sorted(walls)[len(walls) // 2],
+        "cpu_seconds": sorted(cpus)[len(cpus) // 2],
+        "peak_rss_bytes": max(_max_rss_bytes(resource.RUSAGE_SELF), _max_rss_bytes(resource.RUSAGE_CHILDREN)),
+        "peak_rss_ffmpeg_bytes": _max_rss_bytes(resource.RUSAGE_CHILDREN),
+        "output_bytes": output_bytes,
+    }
+
+
+def _ffmpeg_version():
+    try:
+        return subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP_PATH)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(resolutions, durations, codecs, cases, repeat, llm_latency, recognizer_latency, workdir):
+    encoders = set(get_capabilities()["encoders"])
+    results = []
+    for codec in codecs:
+        if codec not in encoders:
+            print(f"skipping {codec}: not available in this ffmpeg build")
+            continue
+        for label in resolutions:
+            width, height = RESOLUTIONS[label]
+            for seconds in durations:
+                source = os.path.join(workdir, f"source-{label}-{seconds}s-{codec}.mp4")
+                if not os.path.exists(source):
+                    synthesize_video(source, width, height, seconds, vcodec=codec)
+                for name in cases:
+                    # A fresh process per case keeps peak RSS and child CPU time per case
+                    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                        measured = pool.submit(measure_case, name, source, workdir, repeat,
+                                               llm_latency, recognizer_latency).result()
+                    result = {"id": f"{name}/{label}/{seconds}s/{codec}", "function": name,
+                              "resolution": label, "duration": seconds, "codec": codec, **measured}
+                    results.append(result)
+                    if measured["ok"]:
+                        print(f"{result['id']:<48} {measured['wall_seconds']:8.3f}s wall "
+                              f"{measured['cpu_seconds']:8.3f}s cpu {measured['peak_rss_bytes'] / 2**20:8.1f} MiB")
+                    else:
+                        print(f"{result['id']:<48} FAILED {measured.get('error', '')}")
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Rows of (case id, metric, baseline, current, ratio, flag); flag is '' or 'REGRESSION'"""
+    rows = []
+    before = {result["id"]: result for result in baseline["results"]}
+    for result in current["results"]:
+        old = before.get(result["id"])
+        if old is None:
+            rows.append((result["id"], "-", None, None, None, "NEW"))
+            continue
+        if not result["ok"]:
+            rows.append((result["id"], "-", None, None, None, "FAILED" if old["ok"] else ""))
+            continue
+        if not old["ok"]:
+            continue
+        for metric in METRICS:
+            ratio = result[metric] / old[metric] if old[metric] else 1.0
+            regressed = ratio > 1 + threshold
+            if metric.endswith("_seconds"):
+                regressed = regressed and result[metric] - old[metric] > MIN_SECONDS_DELTA
+            rows.append((result["id"], metric, old[metric], result[metric], ratio,
+                         "REGRESSION" if regressed else ""))
+    return rows
+
+
+def _format_value(metric, value):
+    if value is None:
+        return "-"
+    if metric.endswith("_bytes"):
+        return f"{value / 2**20:.1f} MiB"
+    return f"{value:.3f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmark matrix and write a results file")
+    run_parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    run_parser.add_argument("--resolutions", help=f"comma separated, from {', '.join(RESOLUTIONS)}")
+    run_parser.add_argument("--durations", help="comma separated clip lengths in seconds")
+    run_parser.add_argument("--codecs", help="comma separated source encoders")
+    run_parser.add_argument("--cases", default=",".join(CASES), help="comma separated function cases")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--llm-latency", type=float, default=0.0)
+    run_parser.add_argument("--recognizer-latency", type=float, default=0.0)
+    run_parser.add_argument("--workdir", help="keep synthesized sources here between runs")
+    run_parser.add_argument("--output", default="benchmark-results.json")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions against a baseline results file")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative increase")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        preset = PRESETS[args.preset]
+        resolutions = args.resolutions.split(",") if args.resolutions else preset["resolutions"]
+        durations = [int(d) for d in args.durations.split(",")] if args.durations else preset["durations"]
+        codecs = args.codecs.split(",") if args.codecs else preset["codecs"]
+        cases = args.cases.split(",")
+        with tempfile.TemporaryDirectory(prefix="editz-bench-") as tmp:
+            workdir = args.workdir or tmp
+            os.makedirs(workdir, exist_ok=True)
+            results = run_suite(resolutions, durations, codecs, cases, args.repeat,
+                                args.llm_latency, args.recognizer_latency, workdir)
+        report = {
+            "schema_version": SCHEMA_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": _git_revision(),
+            "host": {"platform": platform.platform(), "python": platform.python_version(),
+                     "cpus": os.cpu_count(), "ffmpeg": _ffmpeg_version()},
+            "settings": {"repeat": args.repeat, "llm_latency": args.llm_latency,
+                         "recognizer_latency": args.recognizer_latency},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {len(results)} results to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("schema_version") != current.get("schema_version"):
+        sys.exit(f"schema version mismatch: {baseline.get('schema_version')} vs {current.get('schema_version')}")
+    if baseline.get("host") != current.get("host"):
+        print("warning: results come from different hosts or ffmpeg builds")
+
+    rows = compare(baseline, current, args.threshold)
+    for case_id, metric, old, new, ratio, flag in rows:
+        change = f"{(ratio - 1) * 100:+7.1f}%" if ratio is not None else ""
+        print(f"{case_id:<48} {metric:<16} {_format_value(metric, old):>12} -> "
+              f"{_format_value(metric, new):>12} {change:>9} {flag}")
+    regressions = [row for row in rows if row[5] in ("REGRESSION", "FAILED")]
+    print(f"{len(regressions)} regression(s) at a {args.threshold:.0%} threshold")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compare resolving a compound edit request per tab (one LLM call per edit) with one plan call.
+
+    python -m benchmarks.edit_operations [--latency 0.4] [--texts 2] [--runs 10]
+
+Both strategies talk to a local fake chat server, so the numbers show round-trip cost
+only: the per-tab flow pays one trim call plus one call per text overlay, the plan
+flow a single request_edit_operations call for the same edits.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.fake_llm import FakeLLMServer, HTTPChatClient
+from engine.instructions import (
+    request_edit_operations,
+    request_text_overlay_instructions,
+    request_trim_instructions,
+)
+
+
+def per_tab(client, texts):
+    ops = [dict(request_trim_instructions(client, "keep the first 5 seconds"), op="trim")]
+    for index in range(texts):
+        ops.append(dict(request_text_overlay_instructions(client, f"add caption {index} at the top"), op="text"))
+    return ops
+
+
+def single_plan(client, texts):
+    captions = ", ".join(f"add caption {index} at the top" for index in range(texts))
+    return request_edit_operations(client, f"keep the first 5 seconds, {captions}")
+
+
+def measure(strategy, client, server, texts, runs):
+    """(median seconds, requests per run, failed runs) for one strategy"""
+    samples, failed, before = [], 0, server.requests
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            strategy(client, texts)
+        except Exception:
+            failed += 1  # retries exhausted; still timed, the user waited for it
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), (server.requests - before) / runs, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.4, help="fake server seconds per reply")
+    parser.add_argument("--texts", type=int, default=2, help="text overlays in the request")
+    parser.add_argument("--messy-rate", type=float, default=0.0, help="fraction of replies wrapped in chatter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 429/503")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(latency=args.latency, error_rate=args.error_rate, messy_rate=args.messy_rate,
+                           seed=0).start()
+    client = HTTPChatClient(server.url)
+    try:
+        results = {name: measure(strategy, client, server, args.texts, args.runs)
+                   for name, strategy in (("per-tab calls", per_tab), ("single plan call", single_plan))}
+    finally:
+        server.stop()
+
+    for name, (seconds, requests, failed) in results.items():
+        print(f"{name:<18} {seconds * 1000:8.1f} ms   {requests:.1f} requests   {failed} failed")
+    print(f"speedup: {results['per-tab calls'][0] / results['single plan call'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""A local OpenAI-compatible chat server with canned edit replies, for offline LLM benchmarks.
+
+    python -m benchmarks.fake_llm --port 8600 --latency 0.4 --error-rate 0.05
+    EDITZ_LLM_BASE_URL=http://127.0.0.1:8600 streamlit run app4.py
+
+Any POST ending in /chat/completions is answered (Groq clients use /openai/v1/...,
+OpenAI clients /v1/...). The reply is picked from the system prompt: trim parameters,
+a text overlay, or an operation list. Latency, failed requests (429/503) and replies
+wrapped in chatter or code fences can be injected to exercise the client's retries.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+TRIM_REPLY = {"start_time": 0, "duration": 5}
+TEXT_REPLY = {"text": "Hello", "start_time": 1, "duration": 3, "font_size": 48, "font_color": "white",
+              "x_position": "(w-text_w)/2", "y_position": "50"}
+PLAN_REPLY = {"operations": [dict(TRIM_REPLY, op="trim"), dict(TEXT_REPLY, op="text"),
+                             dict(TEXT_REPLY, op="text", text="Bye", start_time=3, y_position="h-th-50")]}
+
+
+def canned_reply(system_prompt):
+    """Reply for whichever instruction prompt is being answered"""
+    if '"operations"' in system_prompt:
+        return PLAN_REPLY
+    if '"font_size"' in system_prompt:
+        return TEXT_REPLY
+    return TRIM_REPLY
+
+
+class FakeLLMServer:
+    """Threaded fake chat-completions endpoint with injectable latency and faults"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 messy_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.messy_rate = messy_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name="fake-llm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _draw(self):
+        """(delay, fail, messy) for one request"""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            fail = self._random.random() < self.error_rate
+            messy = self._random.random() < self.messy_rate
+            self.errors += fail
+        return delay, fail, messy
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    return self._reply(404, {"error": {"message": "not found"}})
+                delay, fail, messy = server._draw()
+                time.sleep(delay)
+                if fail:
+                    return self._reply(random.choice((429, 503)), {"error": {"message": "injected failure"}})
+
+                system_prompt = next((m["content"] for m in body.get("messages", []) if m["role"] == "system"), "")
+                content = json.dumps(canned_reply(system_prompt))
+                if messy:
+                    content = f"Sure! Here is the JSON:\n```json\n{content}\n```"
+                self._reply(200, {
+                    "id": f"chatcmpl-{server.requests}", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+# --- Client ---
+
+
+class ChatAPIError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+
+
+class HTTPChatClient:
+    """Minimal OpenAI-compatible client exposing client.chat.completions.create, as ask_llm expects"""
+
+    def __init__(self, base_url, path="/openai/v1/chat/completions"):
+        self.endpoint = base_url.rstrip("/") + path
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, timeout=None, **request_args):
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(dict(request_args, model=model, messages=messages)).encode(),
+            headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise ChatAPIError(e.code, e.read().decode(errors="replace")) from e
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(**choice["message"]))
+                                        for choice in payload["choices"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.3, help="mean seconds per reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="standard deviation of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 429/503")
+    parser.add_argument("--messy-rate", type=float, default=0.0, help="fraction of replies wrapped in chatter")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.messy_rate)
+    print(f"fake chat completions on {server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
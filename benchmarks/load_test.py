@@ -0,0 +1,404 @@
+"""Load-test one app4.py instance with concurrent simulated editing sessions.
+
+    python -m benchmarks.load_test run [--sessions 1,4,8] [--iterations 5] [--scenario mixed]
+        [--llm-latency 0.4] [--error-rate 0.02] [--resolution 720p] [--duration 20] [--output load.json]
+    python -m benchmarks.load_test compare baseline.json load.json [--threshold 0.15]
+
+Each session repeats the app's trim, text overlay and auto-subtitle flows on a
+synthetic lavfi clip: its prompt is resolved through a local fake chat server
+(fake_llm.py, with injectable latency and failures), and its render goes through
+a RenderScheduler shared by all sessions, as in the app. Speech recognition is
+stubbed. Flow order and think times come from --seed, so runs are reproducible.
+Every sessions level runs in a fresh process and reports end-to-end latency
+percentiles, throughput, CPU use and peak scratch disk, RAM and RSS.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.app_functions import (
+    RESOLUTIONS,
+    TEXT_PROMPT,
+    TRIM_PROMPT,
+    _ffmpeg_version,
+    _git_revision,
+    _max_rss_bytes,
+    load_app_functions,
+)
+from benchmarks.fake_llm import FakeLLMServer, HTTPChatClient
+from benchmarks.media import synthesize_video
+from benchmarks.stubs import StubRecognizer
+from engine.instructions import InstructionResolver
+from engine.render_jobs import DONE, FINISHED, RenderScheduler
+from engine.settings import RENDER_WORKERS
+from engine.transcription import Transcriber
+from engine.workspace import directory_bytes, get_workspace_manager
+
+# Bump when the report layout changes; compare refuses to mix versions
+SCHEMA_VERSION = 1
+
+# Relative weights of the flows a session picks from
+SCENARIOS = {
+    "mixed": {"trim": 2, "text": 2, "subtitles": 1},
+    "trim": {"trim": 1},
+    "text": {"text": 1},
+    "subtitles": {"subtitles": 1},
+}
+
+PERCENTILES = (50, 95, 99)
+
+# Latency and throughput changes compared against the baseline
+METRICS = ("p50", "p95", "p99", "throughput_per_minute")
+
+
+def percentile(values, q):
+    """q-th percentile of values by linear interpolation (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values):
+    summary = {f"p{q}": percentile(values, q) for q in PERCENTILES}
+    summary.update(count=len(values), mean=sum(values) / len(values) if values else None)
+    return summary
+
+
+def session_plan(seed, session, scenario, iterations, think_time):
+    """[(flow, think seconds)] for one session, the same for the same seed"""
+    rng = random.Random(f"{seed}:{session}")
+    flows, weights = zip(*SCENARIOS[scenario].items())
+    return [(rng.choices(flows, weights)[0], rng.expovariate(1 / think_time) if think_time else 0.0)
+            for _ in range(iterations)]
+
+
+# --- Flows ---
+#
+# Each flow is flow(app, source, output_path) -> (llm seconds, job fn). The LLM
+# round trip runs in the session thread like the app's script run does; job fn
+# is what the app would submit to the render scheduler, and raises on failure.
+
+
+def _trim_flow(app, source, output_path):
+    started = time.perf_counter()
+    params = app["get_trim_instructions"](TRIM_PROMPT)
+    llm_seconds = time.perf_counter() - started
+    if not params:
+        raise RuntimeError("trim instructions failed")
+
+    def job(_):
+        if not app["trim_video"](source, output_path, params["start_time"], params["duration"]):
+            raise RuntimeError("trim failed")
+    return llm_seconds, job
+
+
+def _text_flow(app, source, output_path):
+    started = time.perf_counter()
+    params = app["get_text_overlay_instructions"](TEXT_PROMPT)
+    llm_seconds = time.perf_counter() - started
+    if not params:
+        raise RuntimeError("text instructions failed")
+
+    def job(_):
+        if not app["add_text_to_video"](source, output_path, params):
+            raise RuntimeError("text overlay failed")
+    return llm_seconds, job
+
+
+def _subtitles_flow(app, source, output_path):
+    def job(_):
+        audio_path = app["extract_audio"](source)
+        try:
+            cues = app["transcribe_audio"](audio_path)
+        finally:
+            os.unlink(audio_path)
+        if not cues or not app["add_subtitles_to_video"](source, output_path, app["generate_subtitles"](cues), True):
+            raise RuntimeError("auto-subtitles failed")
+    return 0.0, job
+
+
+FLOWS = {"trim": _trim_flow, "text": _text_flow, "subtitles": _subtitles_flow}
+
+
+# --- Resource Sampling ---
+
+
+class ResourceSampler:
+    """Samples CPU use, load average, free memory and scratch/output disk use in a background thread"""
+
+    def __init__(self, workdir, interval=0.5):
+        self.workdir = workdir
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-sampler", daemon=True)
+
+    def start(self):
+        self._started = os.times()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and return the peaks and means of the run"""
+        self._stop.set()
+        self._thread.join()
+        cores = os.cpu_count() or 1
+        times = os.times()
+        cpu = sum(times[:4]) - sum(self._started[:4])
+        wall = times.elapsed - self._started.elapsed
+        peak = lambda name: max((sample[name] for sample in self.samples if sample[name] is not None), default=None)
+        available = [sample["mem_available_bytes"] for sample in self.samples if sample["mem_available_bytes"]]
+        return {
+            "cpu_seconds": cpu,
+            "cpu_mean": cpu / wall / cores if wall else None,
+            "cpu_peak": peak("cpu"),
+            "load_peak": peak("load"),
+            "scratch_disk_peak_bytes": peak("scratch_disk_bytes"),
+            "scratch_ram_peak_bytes": peak("scratch_ram_bytes"),
+            "output_disk_peak_bytes": peak("output_bytes"),
+            "mem_available_min_bytes": min(available) if available else None,
+            "peak_rss_bytes": _max_rss_bytes(resource.RUSAGE_SELF),
+            "peak_rss_ffmpeg_bytes": _max_rss_bytes(resource.RUSAGE_CHILDREN),
+        }
+
+    def _run(self):
+        manager, cores, last = get_workspace_manager(), os.cpu_count() or 1, os.times()
+        while not self._stop.wait(self.interval):
+            now = os.times()
+            wall = now.elapsed - last.elapsed
+            # Child CPU time is only counted once an ffmpeg exits, so short windows can read over 100%
+            cpu = (sum(now[:4]) - sum(last[:4])) / wall / cores if wall else None
+            last = now
+            usage = manager.usage()
+            self.samples.append({
+                "cpu": cpu,
+                "load": os.getloadavg()[0] if hasattr(os, "getloadavg") else None,
+                "scratch_disk_bytes": usage["disk_bytes"],
+                "scratch_ram_bytes": usage["ram_bytes"],
+                "output_bytes": directory_bytes(self.workdir),
+                "mem_available_bytes": _mem_available(),
+            })
+
+
+def _mem_available():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+# --- Sessions ---
+
+
+def run_level(sessions, settings, source, llm_url, workdir):
+    """Drive sessions concurrent sessions in this (fresh) process; returns the level's report"""
+    app = load_app_functions()
+    resolver = InstructionResolver(HTTPChatClient(llm_url), None)
+    transcriber = Transcriber(StubRecognizer(settings["recognizer_latency"]), None)
+    app["get_instruction_resolver"] = lambda: resolver
+    app["get_transcriber"] = lambda: transcriber
+    scheduler = RenderScheduler(max_workers=settings["render_workers"])
+    outputs = os.path.join(workdir, f"outputs-{sessions}")
+    os.makedirs(outputs, exist_ok=True)
+
+    results, lock = [], threading.Lock()
+
+    def session(number):
+        plan = session_plan(settings["seed"], number, settings["scenario"], settings["iterations"],
+                            settings["think_time"])
+        for index, (flow, think) in enumerate(plan):
+            time.sleep(think)
+            output_path = os.path.join(outputs, f"s{number}-{index}-{flow}.mp4")
+            result = {"flow": flow, "ok": False}
+            started = time.perf_counter()
+            try:
+                result["llm_seconds"], fn = FLOWS[flow](app, source, output_path)
+                job = scheduler.submit(f"load:{number}:{index}", fn, f"load {flow}")
+                while job.status not in FINISHED:
+                    time.sleep(0.02)
+                result.update(ok=job.status == DONE, error=job.error,
+                              queue_seconds=job.started - job.created if job.started else None,
+                              render_seconds=job.finished - job.started if job.started else None)
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["seconds"] = time.perf_counter() - started
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            with lock:
+                results.append(result)
+
+    sampler = ResourceSampler(outputs).start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(number,), name=f"session-{number}")
+               for number in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    resources = sampler.stop()
+
+    done = [result for result in results if result["ok"]]
+    errors = sorted({result["error"] for result in results if not result["ok"] and result.get("error")})
+    return {
+        "sessions": sessions,
+        "completed": len(done),
+        "failed": len(results) - len(done),
+        "errors": errors[:5],
+        "wall_seconds": wall,
+        "throughput_per_minute": len(done) / wall * 60 if wall else None,
+        "latency": dict(summarize([result["seconds"] for result in done]),
+                        **{flow: summarize([result["seconds"] for result in done if result["flow"] == flow])
+                           for flow in SCENARIOS[settings["scenario"]]}),
+        "stages": {stage: summarize([result[stage] for result in done if result.get(stage) is not None])
+                   for stage in ("llm_seconds", "queue_seconds", "render_seconds")},
+        "resources": resources,
+    }
+
+
+def run_load_test(levels, settings, workdir):
+    width, height = RESOLUTIONS[settings["resolution"]]
+    source = os.path.join(workdir, f"source-{settings['resolution']}-{settings['duration']}s.mp4")
+    if not os.path.exists(source):
+        synthesize_video(source, width, height, settings["duration"])
+
+    reports = []
+    for sessions in levels:
+        # A fresh server per level, seeded, so every level sees the same latency and fault sequence
+        server = FakeLLMServer(latency=settings["llm_latency"], jitter=settings["llm_jitter"],
+                               error_rate=settings["error_rate"], seed=settings["seed"]).start()
+        try:
+            # A fresh process per level keeps peak RSS, CPU time and app state per level
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                report = pool.submit(run_level, sessions, settings, source, server.url, workdir).result()
+        finally:
+            server.stop()
+        report.update(llm_requests=server.requests, llm_errors=server.errors)
+        reports.append(report)
+        _print_level(report)
+    return reports
+
+
+def _print_level(report):
+    latency, resources = report["latency"], report["resources"]
+    ms = lambda value: f"{value * 1000:8.0f}" if value is not None else "       -"
+    print(f"{report['sessions']:>4} sessions  {report['completed']:>4} ok {report['failed']:>3} failed  "
+          f"{report['throughput_per_minute']:7.1f}/min  p50 {ms(latency['p50'])} p95 {ms(latency['p95'])} "
+          f"p99 {ms(latency['p99'])} ms  cpu {resources['cpu_mean'] * 100:5.1f}% "
+          f"scratch {(resources['scratch_disk_peak_bytes'] or 0) / 2**20:7.1f} MiB "
+          f"rss {resources['peak_rss_bytes'] / 2**20:7.1f} MiB", flush=True)
+    for error in report["errors"]:
+        print(f"      {error}")
+
+
+def compare(baseline, current, threshold):
+    """Rows of (sessions, metric, baseline, current, ratio, flag); flag is '' or 'REGRESSION'"""
+    rows = []
+    before = {level["sessions"]: level for level in baseline["levels"]}
+    for level in current["levels"]:
+        old = before.get(level["sessions"])
+        if old is None:
+            rows.append((level["sessions"], "-", None, None, None, "NEW"))
+            continue
+        for metric in METRICS:
+            old_value = old[metric] if metric in old else old["latency"][metric]
+            new_value = level[metric] if metric in level else level["latency"][metric]
+            if not old_value or new_value is None:
+                continue
+            ratio = new_value / old_value
+            # Latency should not go up, throughput should not go down
+            regressed = ratio < 1 - threshold if metric == "throughput_per_minute" else ratio > 1 + threshold
+            rows.append((level["sessions"], metric, old_value, new_value, ratio, "REGRESSION" if regressed else ""))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the load test and write a report")
+    run_parser.add_argument("--sessions", default="1,2,4,8", help="comma separated concurrent session counts")
+    run_parser.add_argument("--iterations", type=int, default=5, help="flows per session")
+    run_parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    run_parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a session's flows")
+    run_parser.add_argument("--llm-latency", type=float, default=0.4)
+    run_parser.add_argument("--llm-jitter", type=float, default=0.1)
+    run_parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM requests failing")
+    run_parser.add_argument("--recognizer-latency", type=float, default=0.3)
+    run_parser.add_argument("--render-workers", type=int, default=RENDER_WORKERS)
+    run_parser.add_argument("--resolution", choices=list(RESOLUTIONS), default="720p")
+    run_parser.add_argument("--duration", type=int, default=20, help="source clip seconds")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--workdir", help="keep the synthesized source here between runs")
+    run_parser.add_argument("--output", default="load-test.json")
+
+    compare_parser = commands.add_parser("compare", help="Flag capacity regressions against a baseline report")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative change")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        settings = {name: getattr(args, name) for name in (
+            "iterations", "scenario", "think_time", "llm_latency", "llm_jitter", "error_rate",
+            "recognizer_latency", "render_workers", "resolution", "duration", "seed")}
+        levels = [int(sessions) for sessions in args.sessions.split(",")]
+        with tempfile.TemporaryDirectory(prefix="editz-load-") as tmp:
+            workdir = args.workdir or tmp
+            os.makedirs(workdir, exist_ok=True)
+            reports = run_load_test(levels, settings, workdir)
+        report = {
+            "schema_version": SCHEMA_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": _git_revision(),
+            "host": {"platform": platform.platform(), "python": platform.python_version(),
+                     "cpus": os.cpu_count(), "ffmpeg": _ffmpeg_version()},
+            "settings": settings,
+            "levels": reports,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {len(reports)} levels to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("schema_version") != current.get("schema_version"):
+        sys.exit(f"schema version mismatch: {baseline.get('schema_version')} vs {current.get('schema_version')}")
+    if baseline.get("settings") != current.get("settings"):
+        print("warning: the reports were made with different settings")
+    if baseline.get("host") != current.get("host"):
+        print("warning: results come from different hosts or ffmpeg builds")
+
+    rows = compare(baseline, current, args.threshold)
+    for sessions, metric, old, new, ratio, flag in rows:
+        if metric == "-":
+            print(f"{sessions:>4} sessions  {flag}")
+            continue
+        unit = "/min" if metric == "throughput_per_minute" else "s"
+        print(f"{sessions:>4} sessions  {metric:<22} {old:10.3f}{unit} -> {new:10.3f}{unit}  {ratio:6.2f}x  {flag}")
+    if any(flag == "REGRESSION" for *_, flag in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import ffmpeg
+
+from engine.ffmpeg_runner import run_ffmpeg
+
+# --- Synthetic Test Media ---
+
+
+def synthesize_video(path, width=1280, height=720, seconds=30, fps=30, vcodec="libx264", gop=None, audio=True):
+    """Render a lavfi testsrc2 clip (with a sine tone) so benchmarks need no sample files"""
+    video = ffmpeg.input(f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}", f="lavfi")
+    streams = [video]
+    output_args = {"vcodec": vcodec, "pix_fmt": "yuv420p", "g": gop or fps * 2}
+    if audio:
+        streams.append(ffmpeg.input(f"sine=frequency=440:duration={seconds}", f="lavfi"))
+        output_args.update(acodec="aac", shortest=None)
+    run_ffmpeg(
+        ffmpeg
+        .output(*streams, path, **output_args)
+        .global_args('-hide_banner', '-loglevel', 'error')
+    )
+    return path
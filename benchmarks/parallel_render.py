@@ -0,0 +1,42 @@
+"""Compare single-process and chunked parallel full re-encodes (subtitle burn-in).
+
+    python -m benchmarks.parallel_render [--seconds 120] [--height 1080]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.media import synthesize_video
+from engine.edit_plan import EditPlan
+from engine.subtitle_utils import format_srt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=120)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    width = args.height * 16 // 9
+    cues = [(t, t + 2.5, f"Line {i}") for i, t in enumerate(range(0, args.seconds, 3))]
+    plan = EditPlan().subtitles(format_srt(cues))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = synthesize_video(os.path.join(tmp, "source.mp4"), width, args.height, args.seconds)
+
+        started = time.perf_counter()
+        plan.render(source, os.path.join(tmp, "single.mp4"), parallel=False)
+        single = time.perf_counter() - started
+
+        started = time.perf_counter()
+        plan.render(source, os.path.join(tmp, "parallel.mp4"), parallel=True)
+        parallel = time.perf_counter() - started
+
+    print(f"source:            {width}x{args.height}, {args.seconds}s on {os.cpu_count()} cores")
+    print(f"single process:    {single:8.2f}s")
+    print(f"parallel chunks:   {parallel:8.2f}s  ({single / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Replay a prompt corpus through the instruction resolver against a stubbed LLM.
+
+    python -m benchmarks.prompt_resolution [--latency 0.5] [--rounds 3] [--corpus prompts.txt]
+
+Corpus files hold one prompt per line, prefixed with "trim:" or "text:".
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.stubs import StubChatClient
+from engine.instruction_cache import InstructionCache
+from engine.instructions import InstructionResolver
+
+DEFAULT_CORPUS = [
+    ("trim", "trim first 5 seconds"),
+    ("trim", "Keep first 30 seconds"),
+    ("trim", "keep 0:30 to 1:00"),
+    ("trim", "from 10s to 25s"),
+    ("trim", "start at 1:00 for 20 seconds"),
+    ("trim", "cut out the boring middle part"),
+    ("trim", "keep only the part where the dog jumps"),
+    ("text", 'Add "Welcome" at bottom center from 5-10s'),
+    ("text", "Add title My Video from 5s to 10s in large white text at the top center"),
+    ("text", "Add 'Subscribe!' in red at top right at 3 for 4 seconds"),
+    ("text", "put a funny caption about cats near the end"),
+]
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            kind, _, prompt = line.strip().partition(":")
+            if prompt:
+                corpus.append((kind.strip(), prompt.strip()))
+    return corpus
+
+
+def replay(resolver, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for kind, prompt in corpus:
+            if kind == "trim":
+                resolver.trim(prompt)
+            else:
+                resolver.text_overlay(prompt)
+    return time.perf_counter() - started
+
+
+class _LLMOnlyResolver(InstructionResolver):
+    """Baseline: every prompt goes to the model, as before the fast path existed"""
+
+    def _resolve(self, kind, prompt, parse, request):
+        self.llm_calls += 1
+        return request(self.client, prompt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="stubbed LLM round trip in seconds")
+    parser.add_argument("--rounds", type=int, default=3, help="times to replay the corpus")
+    parser.add_argument("--corpus", help="prompt corpus file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    lookups = len(corpus) * args.rounds
+
+    baseline = _LLMOnlyResolver(StubChatClient(args.latency))
+    baseline_time = replay(baseline, corpus, args.rounds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        resolver = InstructionResolver(StubChatClient(args.latency),
+                                       InstructionCache(os.path.join(tmp, "instructions.sqlite")))
+        fast_time = replay(resolver, corpus, args.rounds)
+        stats = resolver.stats()
+
+    print(f"prompts replayed:   {lookups}")
+    print(f"LLM only:           {baseline_time:8.3f}s  ({baseline.llm_calls} LLM calls)")
+    print(f"parser + cache:     {fast_time:8.3f}s  ({stats['llm_calls']} LLM calls)")
+    print(f"parsed locally:     {stats['parsed']}")
+    print(f"cache hits/misses:  {stats['hits']}/{stats['misses']}  (hit rate {stats['hit_rate']:.0%})")
+    print(f"speedup:            {baseline_time / fast_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure engine cold-start: import times and process-pool worker spawn times.
+
+    python -m benchmarks.startup [--runs 10]
+
+Each import is timed in a fresh interpreter, so nothing is already cached in
+sys.modules. The report also lists which heavy libraries an import dragged in;
+the engine should load none of them until a code path actually needs one.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+MODULES = ["engine", "engine.editing", "engine.edit_plan", "engine.transcription",
+           "engine.instructions", "engine.render_jobs"]
+HEAVY = ["numpy", "PIL", "groq", "speech_recognition", "pydub", "streamlit"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def time_import(module, runs):
+    """(median import seconds, heavy modules loaded) over runs fresh interpreters"""
+    samples, heavy = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+    return statistics.median(samples), heavy
+
+
+def _worker_ready():
+    import engine.editing  # noqa: F401
+    return True
+
+
+def time_worker_spawn(method, runs):
+    """Median seconds from creating a one-worker pool to its first engine task returning"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context(method)) as pool:
+            pool.submit(_worker_ready).result()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        seconds, heavy = time_import(module, args.runs)
+        print(f"import {module:<24} {seconds * 1000:8.1f} ms   heavy: {', '.join(heavy) or 'none'}")
+    for method in ("spawn", "fork"):
+        if method in get_all_start_methods():
+            label = f"worker spawn ({method})"
+            print(f"{label:<31} {time_worker_spawn(method, args.runs) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import json
+import time
+from types import SimpleNamespace
+
+# --- Offline Stand-ins for Network Services ---
+
+
+class StubChatClient:
+    """Mimics client.chat.completions.create() with a fixed latency and canned JSON replies"""
+
+    def __init__(self, latency=0.5, reply=None):
+        self.latency = latency
+        self.reply = reply or default_reply
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        content = json.dumps(self.reply(messages[0]["content"], messages[-1]["content"]))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def default_reply(system_prompt, prompt):
+    """Plausible structured reply for the trim and text overlay system prompts"""
+    if '"text"' in system_prompt:
+        return {"text": prompt[:32], "start_time": "0", "duration": "5", "font_size": "48",
+                "font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50"}
+    return {"start_time": "0", "duration": "5"}
+
+
+class StubRecognizer:
+    """Recognizer backend that sleeps for latency and reports the chunk length in words"""
+
+    name = "stub"
+
+    def __init__(self, latency=0.3):
+        self.latency = latency
+        self.calls = 0
+
+    def recognize(self, pcm, sample_rate):
+        self.calls += 1
+        time.sleep(self.latency)
+        seconds = len(pcm) / (2 * sample_rate)
+        return " ".join(f"word{i}" for i in range(max(1, int(seconds * 2))))
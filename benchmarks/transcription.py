@@ -0,0 +1,70 @@
+"""Compare whole-file vs chunked parallel transcription against a stub recognizer.
+
+    python -m benchmarks.transcription [--minutes 5] [--latency 0.3] [--workers 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from benchmarks.stubs import StubRecognizer
+from engine.transcription import TranscriptCache, Transcriber
+
+SAMPLE_RATE = 16000
+
+
+def synthesize_speechlike_wav(path, minutes, seed=0):
+    """Write 16 kHz mono PCM of noisy tone bursts (2-8s) separated by 0.5-1.5s of silence"""
+    rng = np.random.default_rng(seed)
+    pieces, total = [], 0.0
+    while total < minutes * 60:
+        burst = rng.uniform(2, 8)
+        t = np.arange(int(burst * SAMPLE_RATE)) / SAMPLE_RATE
+        pieces.append(0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) + 0.05 * rng.standard_normal(t.size))
+        gap = rng.uniform(0.5, 1.5)
+        pieces.append(0.001 * rng.standard_normal(int(gap * SAMPLE_RATE)))
+        total += burst + gap
+    samples = (np.clip(np.concatenate(pieces), -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub recognizer latency per request")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "speech.wav")
+        synthesize_speechlike_wav(wav_path, args.minutes)
+
+        sequential = Transcriber(StubRecognizer(args.latency), max_workers=1)
+        seq_time, cues = timed(lambda: sequential.transcribe(wav_path))
+
+        backend = StubRecognizer(args.latency)
+        parallel = Transcriber(backend, TranscriptCache(os.path.join(tmp, "cache")), max_workers=args.workers)
+        par_time, _ = timed(lambda: parallel.transcribe(wav_path))
+        cached_time, _ = timed(lambda: parallel.transcribe(wav_path))
+
+    print(f"audio:             {args.minutes:.1f} min, {len(cues)} chunks")
+    print(f"1 worker:          {seq_time:8.3f}s")
+    print(f"{args.workers} workers:         {par_time:8.3f}s  ({seq_time / par_time:.1f}x)")
+    print(f"re-run (cached):   {cached_time:8.3f}s  ({backend.calls} recognizer calls total)")
+
+
+if __name__ == "__main__":
+    main()
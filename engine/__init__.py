@@ -0,0 +1,50 @@
+"""Editz editing engine: trims, text overlays, subtitles and audio, without Streamlit.
+
+Importing the package is nearly free: the names below are loaded from their
+submodules on first access, and heavy libraries (numpy, PIL, groq,
+speech_recognition) are only imported by the code paths that use them.
+"""
+import importlib
+
+_EXPORTS = {
+    "AssetStore": "asset_store",
+    "ContentIndex": "content_analysis",
+    "EditHistory": "history",
+    "EditPlan": "edit_plan",
+    "FilmstripStore": "filmstrip",
+    "GoogleSpeechBackend": "transcription",
+    "InstructionCache": "instruction_cache",
+    "InstructionResolver": "instructions",
+    "MediaIndex": "media_index",
+    "RenderCache": "render_cache",
+    "RenderScheduler": "render_jobs",
+    "TranscriptCache": "transcription",
+    "Transcriber": "transcription",
+    "analyze_content": "content_analysis",
+    "extract_audio": "editing",
+    "generate_subtitles": "editing",
+    "get_llm_client": "clients",
+    "get_recognizer": "clients",
+    "index_media": "media_index",
+    "measure_loudness": "audio_edit",
+    "media_duration": "editing",
+    "mux_subtitles": "soft_subtitles",
+    "render_audio_edit": "audio_edit",
+    "render_key": "render_cache",
+    "render_subtitles": "editing",
+    "render_text_overlay": "editing",
+    "render_trim": "editing",
+    "run_ffmpeg": "ffmpeg_runner",
+    "scratch_path": "workspace",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from .disk_lru import DiskLRU
+from .instrumentation import span
+from .settings import ASSET_STORE_BUDGET, CACHE_DIR
+
+# --- Content-Addressed Asset Store ---
+#
+# Uploads are streamed to disk in fixed-size chunks and hashed on the way, then
+# renamed to <sha256><suffix>. Identical content lands on the same path no
+# matter which rerun or session uploaded it, so the digest doubles as a stable
+# cache key for everything derived from the source video.
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class AssetStore(DiskLRU):
+    """Deduplicating on-disk store for uploaded videos with LRU eviction"""
+
+    def __init__(self, root=None, max_bytes=ASSET_STORE_BUDGET):
+        super().__init__(root or os.path.join(CACHE_DIR, "assets"), max_bytes)
+
+    def put_stream(self, fileobj, suffix=""):
+        """Copy fileobj into the store chunk by chunk; returns (digest, path)"""
+        digest = hashlib.sha256()
+        tmp_path = self.temp_path()
+        try:
+            with open(tmp_path, "wb") as out:
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        digest = digest.hexdigest()
+        return digest, self.commit(tmp_path, digest + suffix)
+
+    def put_file(self, path, suffix=None):
+        """Add an existing file to the store; returns (digest, path)"""
+        if suffix is None:
+            suffix = os.path.splitext(path)[1]
+        with open(path, "rb") as f:
+            return self.put_stream(f, suffix)
+
+    def get(self, digest):
+        """Return the stored path for digest (marking it recently used), or None"""
+        return self.find(digest)
+
+
+def persist_upload(store, uploaded_file, memo):
+    """Store an upload once per file; memo (e.g. st.session_state) remembers its digest across reruns"""
+    key = f"asset_digest:{getattr(uploaded_file, 'file_id', uploaded_file.name)}"
+    digest = memo.get(key)
+    if digest:
+        path = store.get(digest)
+        if path:
+            return digest, path
+    uploaded_file.seek(0)
+    with span("upload_persist", bytes=getattr(uploaded_file, "size", None)):
+        digest, path = store.put_stream(uploaded_file, os.path.splitext(uploaded_file.name)[1] or ".mp4")
+    memo[key] = digest
+    return digest, path
@@ -0,0 +1,198 @@
+import contextlib
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import ffmpeg
+
+from .ffmpeg_runner import run_ffmpeg
+from .media_index import index_media, media_key
+from .settings import CACHE_DIR
+
+# --- Audio Edits ---
+#
+# Volume changes, muted ranges, noise reduction and loudness normalization only
+# touch the sound: the video packets are stream-copied and only the audio is
+# filtered and re-encoded, so fixing the audio of a 4K file costs an AAC encode
+# instead of an x264 one. Audio ops are resolved like text overlays (times on
+# the output timeline, rebased through later trims) and applied to the source
+# audio read from the plan's seek for its length.
+#
+# Normalization is two-pass EBU R128 loudnorm: a first pass only measures, the
+# second applies a linear gain from those numbers. Measurements are cached in
+# SQLite per asset, trim window and preceding audio filters, so re-rendering or
+# previewing the same normalized audio skips the measuring pass.
+
+LOUDNORM_TARGET = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+AUDIO_CODEC_ARGS = {"acodec": "aac", "audio_bitrate": "192k"}
+
+_LOUDNORM_JSON_RE = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}")
+
+
+def audio_filter(op):
+    """(name, args) of the ffmpeg filter for a volume, mute or denoise op, limited to its time range"""
+    action = op["action"]
+    if action == "volume":
+        name, args = "volume", {"volume": f"{op['gain_db']}dB"}
+    elif action == "mute":
+        name, args = "volume", {"volume": 0}
+    elif action == "denoise":
+        name, args = "afftdn", {}
+    else:
+        raise ValueError(f"Unknown audio action: {action!r}")
+    if op.get("start_time") is not None:
+        start = op["start_time"]
+        end = f",{start + op['duration']}" if op.get("duration") is not None else ""
+        args["enable"] = f"between(t,{start}{end})" if end else f"gte(t,{start})"
+    return name, args
+
+
+def audio_stream(input_path, ops, seek=0.0, length=None):
+    """input_path's audio from seek for length seconds, run through audio ops in order
+
+    normalize ignores any time range and covers the whole stream. Raises ValueError when
+    input_path has no audio, and ffmpeg.Error if a loudness measurement fails.
+    """
+    record = index_media(input_path)
+    if not record.has_audio:
+        raise ValueError(f"{os.path.basename(input_path)} has no audio track to edit")
+    input_args = {"ss": seek} if seek else {}
+    if length is not None:
+        input_args["t"] = length
+    stream = ffmpeg.input(input_path, **input_args).audio
+    for index, op in enumerate(ops):
+        if op["action"] != "normalize":
+            name, args = audio_filter(op)
+            stream = stream.filter(name, **args)
+            continue
+        measured = measure_loudness(input_path, ops[:index], seek, length)
+        if measured is None:
+            continue
+        # loudnorm works at 192 kHz internally; resample back to the source rate
+        stream = (
+            stream
+            .filter('loudnorm', **loudnorm_args(measured))
+            .filter('aresample', record.sample_rate or 48000)
+        )
+    return stream
+
+
+def loudnorm_args(measured, target=LOUDNORM_TARGET):
+    """Second-pass loudnorm arguments from first-pass measurements"""
+    return dict(
+        target,
+        measured_I=measured["input_i"],
+        measured_TP=measured["input_tp"],
+        measured_LRA=measured["input_lra"],
+        measured_thresh=measured["input_thresh"],
+        offset=measured["target_offset"],
+        linear="true",
+    )
+
+
+def parse_loudnorm(stderr):
+    """The measurement dict loudnorm prints with print_format=json; raises ValueError if absent"""
+    matches = _LOUDNORM_JSON_RE.findall(stderr.decode(errors="replace"))
+    if not matches:
+        raise ValueError("loudnorm printed no measurements")
+    return json.loads(matches[-1])
+
+
+def measure_loudness(input_path, ops=(), seek=0.0, length=None, target=LOUDNORM_TARGET):
+    """First-pass loudnorm measurements of input_path's audio after ops, cached per asset
+
+    Returns None for silent audio, which has no loudness to normalize.
+    """
+    key = hashlib.sha256(json.dumps(
+        [media_key(input_path), seek, length, list(ops), target], sort_keys=True
+    ).encode()).hexdigest()
+    cache = get_loudness_cache()
+    measured = cache.get(key)
+    if measured is None:
+        _, stderr = run_ffmpeg(
+            audio_stream(input_path, list(ops), seek, length)
+            .filter('loudnorm', print_format='json', **target)
+            .output('-', f='null')
+            .global_args('-hide_banner', '-loglevel', 'info'),
+            stage="loudness_scan",
+        )
+        measured = parse_loudnorm(stderr)
+        cache.put(key, measured)
+    if not math.isfinite(float(measured["input_i"])):
+        return None
+    return measured
+
+
+class LoudnessCache:
+    """SQLite-backed LRU of loudnorm first-pass measurements"""
+
+    def __init__(self, path=None, max_entries=5000):
+        self.path = path or os.path.join(CACHE_DIR, "loudness.sqlite")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS loudness ("
+                "key TEXT PRIMARY KEY, measured TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS loudness_last_used ON loudness (last_used)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT measured FROM loudness WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE loudness SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+
+    def put(self, key, measured):
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO loudness (key, measured, last_used) VALUES (?, ?, ?)",
+                         (key, json.dumps(measured), time.time()))
+            conn.execute("DELETE FROM loudness WHERE rowid IN ("
+                         "SELECT rowid FROM loudness ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                         (self.max_entries,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM loudness")
+
+
+@functools.lru_cache(maxsize=None)
+def get_loudness_cache():
+    """Process-wide LoudnessCache under CACHE_DIR"""
+    return LoudnessCache()
+
+
+def render_audio_edit(video_path, audio_path, output_path, ops, seek=0.0, length=None):
+    """Write video_path's video (stream-copied) with audio_path's audio run through ops; raises ffmpeg.Error
+
+    audio_path is read from seek for length seconds, so the audio of a plan rendered in
+    pieces can come from (and reuse the loudness measurements of) the original asset.
+    """
+    run_ffmpeg(
+        ffmpeg
+        .output(ffmpeg.input(video_path).video, audio_stream(audio_path, ops, seek, length), output_path,
+                vcodec='copy',
+                **AUDIO_CODEC_ARGS)
+        .global_args('-hide_banner', '-loglevel', 'error'),
+        stage="audio_edit",
+    )
+    return output_path
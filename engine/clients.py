@@ -0,0 +1,30 @@
+import functools
+import os
+
+from .settings import LLM_BASE_URL, LLM_TIMEOUT
+
+# --- Shared Clients ---
+#
+# Network clients are created on first use and then reused by every caller in
+# the process: one Groq client (with its HTTP connection pool) per API key and
+# one speech Recognizer. Their libraries are only imported when first needed.
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_client(api_key=None):
+    """Pooled Groq chat client for api_key (default: $GROQ_API_KEY)
+
+    Retries are left to instructions.ask_llm, which also retries unusable replies.
+    """
+    from groq import Groq
+
+    return Groq(api_key=api_key or os.getenv("GROQ_API_KEY", "use your api key"),
+                base_url=LLM_BASE_URL, timeout=LLM_TIMEOUT, max_retries=0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_recognizer():
+    """Shared speech_recognition Recognizer (it only holds settings, so threads can share it)"""
+    import speech_recognition as sr
+
+    return sr.Recognizer()
@@ -0,0 +1,206 @@
+import contextlib
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import ffmpeg
+
+from .ffmpeg_runner import run_ffmpeg
+from .media_index import index_media, media_key
+from .prompt_parser import expand_anchors, mentions_anchors
+from .settings import CACHE_DIR
+
+# --- Content Analysis ---
+#
+# Scene cuts and silences are found together in one decode: the video is
+# shrunk before scdet scores each frame against the previous one, and the audio
+# runs through silencedetect in the same ffmpeg process. Both filters log what
+# they find, which is parsed from stderr. Results are kept in SQLite per asset,
+# so prompts such as "trim the intro" or "add a title at first speech" are
+# resolved against named anchors (scene cuts, first and last speech) without
+# decoding the video again.
+
+ANALYSIS_WIDTH = 320
+SCENE_THRESHOLD = 10.0
+MIN_SCENE_SECONDS = 0.5
+SILENCE_DB = -40.0
+MIN_SILENCE_SECONDS = 0.5
+
+# Silences this close to either end of the clip count as reaching it
+EDGE_SECONDS = 0.05
+
+_SCENE_RE = re.compile(r"lavfi\.scd\.score:\s*([\d.]+),\s*lavfi\.scd\.time:\s*([\d.]+)")
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def scan_content(path):
+    """Scene cuts and silences of path in one ffmpeg run; raises ffmpeg.Error on failure"""
+    record = index_media(path)
+    if not record.duration:
+        raise ValueError(f"Can't analyze {os.path.basename(path)}: unknown duration")
+    source = ffmpeg.input(path)
+    streams = []
+    if record.width:
+        streams.append(
+            source.video
+            .filter('scale', ANALYSIS_WIDTH, -2, flags='fast_bilinear')
+            .filter('scdet', threshold=SCENE_THRESHOLD)
+        )
+    if record.has_audio:
+        streams.append(source.audio.filter('silencedetect', noise=f"{SILENCE_DB}dB", duration=MIN_SILENCE_SECONDS))
+    _, stderr = run_ffmpeg(
+        ffmpeg
+        .output(*streams, '-', f='null')
+        .global_args('-hide_banner', '-loglevel', 'info'),
+        stage="content_analysis",
+    )
+    return parse_analysis(stderr.decode(errors="replace"), record.duration, record.has_audio)
+
+
+def parse_analysis(log, duration, has_audio=True):
+    """Analysis dict from the scdet/silencedetect lines of an ffmpeg log"""
+    scenes = []
+    for score, seconds in _SCENE_RE.findall(log):
+        seconds = float(seconds)
+        if seconds - (scenes[-1][0] if scenes else 0.0) >= MIN_SCENE_SECONDS:
+            scenes.append([seconds, float(score)])
+
+    silences, start = [], None
+    for line in log.splitlines():
+        started, ended = _SILENCE_START_RE.search(line), _SILENCE_END_RE.search(line)
+        if started:
+            start = max(0.0, float(started.group(1)))
+        elif ended and start is not None:
+            silences.append([start, min(duration, float(ended.group(1)))])
+            start = None
+    if start is not None:
+        silences.append([start, duration])
+    return {"duration": duration, "scenes": scenes, "silences": silences, "has_audio": has_audio}
+
+
+class AnalysisPending(LookupError):
+    """A prompt names anchors of a video whose analysis isn't in the index yet"""
+
+
+class ContentAnalysis:
+    """Scene cuts and silences of one asset, with named time anchors for prompts"""
+
+    def __init__(self, data):
+        self.data = data
+        self.duration = data["duration"]
+        self.cuts = [seconds for seconds, _ in data["scenes"]]
+        self.silences = [tuple(silence) for silence in data["silences"]]
+
+    def speech_bounds(self):
+        """(first speech, last speech) in seconds, or None when there is no audio or only silence"""
+        if not self.data.get("has_audio"):
+            return None
+        first, last = 0.0, self.duration
+        for start, end in self.silences:
+            if start <= EDGE_SECONDS:
+                first = end
+            if end >= self.duration - EDGE_SECONDS:
+                last = min(last, start)
+        return (first, last) if first < last else None
+
+    def anchors(self):
+        """{name: seconds} of every anchor a prompt can refer to"""
+        anchors = {"end": self.duration, "scene 1": 0.0}
+        if self.cuts:
+            anchors.update({"first cut": self.cuts[0], "last cut": self.cuts[-1]})
+            for number, seconds in enumerate(self.cuts, 2):
+                anchors[f"scene {number}"] = seconds
+        speech = self.speech_bounds()
+        if speech:
+            anchors["first speech"], anchors["last speech"] = speech
+        return anchors
+
+
+class ContentIndex:
+    """SQLite-backed store of content analyses keyed by media_key()"""
+
+    def __init__(self, path=None, max_entries=2000):
+        self.path = path or os.path.join(CACHE_DIR, "content_analysis.sqlite")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scanning = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_last_used ON analyses (last_used)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, path):
+        """Cached ContentAnalysis of path, or None if it hasn't been analyzed"""
+        key = media_key(path)
+        with self._connect() as conn:
+            row = conn.execute("SELECT analysis FROM analyses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE analyses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return ContentAnalysis(json.loads(row[0])) if row else None
+
+    def lookup(self, path):
+        """ContentAnalysis of path, scanning it only the first time; raises ffmpeg.Error on failure"""
+        key = media_key(path)
+        with self._lock:
+            lock = self._scanning.setdefault(key, threading.Lock())
+        with lock:
+            analysis = self.get(path)
+            if analysis is not None:
+                return analysis
+            data = scan_content(path)
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO analyses (key, analysis, last_used) VALUES (?, ?, ?)",
+                             (key, json.dumps(data), time.time()))
+                conn.execute("DELETE FROM analyses WHERE rowid IN ("
+                             "SELECT rowid FROM analyses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+        return ContentAnalysis(data)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM analyses")
+
+
+@functools.lru_cache(maxsize=None)
+def get_content_index():
+    """Process-wide ContentIndex under CACHE_DIR"""
+    return ContentIndex()
+
+
+def analyze_content(path):
+    """ContentAnalysis of path from the shared index"""
+    return get_content_index().lookup(path)
+
+
+def resolve_prompt_anchors(prompt, path, offset=0.0, scan=True):
+    """prompt with its anchor phrases replaced by times in path, analyzing path only if it names one
+
+    offset is where the edited timeline starts in path (see expand_anchors). Raises ValueError
+    when the prompt names an anchor the video doesn't have. With scan=False only an analysis
+    already in the index is used, and AnalysisPending is raised when there is none, so an
+    interactive caller never waits on the decode.
+    """
+    if not mentions_anchors(prompt):
+        return prompt
+    analysis = analyze_content(path) if scan else get_content_index().get(path)
+    if analysis is None:
+        raise AnalysisPending(f"{os.path.basename(path)} hasn't been analyzed yet")
+    return expand_anchors(prompt, analysis.anchors(), offset)
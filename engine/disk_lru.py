@@ -0,0 +1,127 @@
+import contextlib
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# --- LRU File Directory ---
+#
+# Files handed out by a DiskLRU may still be in use after the lookup: a queued
+# or running job reading its source or proxy, or a media link a browser is
+# still streaming. Users pin such paths (a per-process refcount shared by
+# every store), and eviction skips pinned files even when they are the least
+# recently used.
+
+_pins = Counter()
+_pins_lock = threading.Lock()
+
+
+def pin(path):
+    """Protect path from eviction until a matching unpin()"""
+    with _pins_lock:
+        _pins[os.path.abspath(path)] += 1
+
+
+def unpin(path):
+    with _pins_lock:
+        path = os.path.abspath(path)
+        _pins[path] -= 1
+        if _pins[path] <= 0:
+            del _pins[path]
+
+
+def is_pinned(path):
+    with _pins_lock:
+        return os.path.abspath(path) in _pins
+
+
+@contextlib.contextmanager
+def pinned(*paths):
+    """Keep paths from being evicted while the block runs"""
+    for path in paths:
+        pin(path)
+    try:
+        yield
+    finally:
+        for path in paths:
+            unpin(path)
+
+
+class DiskLRU:
+    """Directory of cached files, evicted least recently used first once over a byte budget
+
+    A file's mtime is its last-used time. New files are written under a dot-prefixed
+    temp name and renamed into place, so readers never see a partial file and two
+    writers producing the same name simply race to an identical result.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def temp_path(self, suffix=""):
+        """Reserve a hidden scratch file inside the directory for an atomic write"""
+        fd, path = tempfile.mkstemp(dir=self.root, prefix=".partial-", suffix=suffix)
+        os.close(fd)
+        return path
+
+    def commit(self, tmp_path, name):
+        """Atomically move tmp_path into place as name and enforce the budget; returns the path"""
+        path = os.path.join(self.root, name)
+        with self._lock:
+            if os.path.exists(path):
+                os.unlink(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+            self._touch(path)
+            self._evict(keep=path)
+        return path
+
+    def find(self, prefix):
+        """Return the path of the entry whose name starts with prefix (marking it used), or None"""
+        for name in os.listdir(self.root):
+            if name.startswith(prefix) and not name.startswith("."):
+                path = os.path.join(self.root, name)
+                try:
+                    self._touch(path)
+                except FileNotFoundError:
+                    return None
+                return path
+        return None
+
+    def total_bytes(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _touch(self, path):
+        now = time.time()
+        os.utime(path, (now, now))
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep or is_pinned(path):
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
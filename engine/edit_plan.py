@@ -0,0 +1,180 @@
+import math
+import os
+
+import ffmpeg
+
+from .audio_edit import AUDIO_CODEC_ARGS, audio_stream, render_audio_edit
+from .ffmpeg_runner import run_ffmpeg
+from .filter_chain import SrtFiles, apply_filters
+from .parallel_render import render_parallel
+from .soft_subtitles import mux_subtitles
+from .subtitle_utils import shift_srt
+from .workspace import scratch_path
+
+# --- Edit Plan ---
+#
+# An EditPlan collects trim, text, subtitle and audio operations in the order the user
+# asked for them and renders them with a single ffmpeg run. Every operation is
+# expressed on the timeline produced by the operations before it, so a title
+# added after a trim uses trimmed timestamps and one added before it uses the
+# source timestamps. Trims become an input seek plus -t, everything else becomes
+# a node in one filter chain, and the whole plan pays for one libx264 encode.
+# Audio ops filter the audio stream only; a plan with no video filters copies
+# the video packets and pays for just an AAC encode.
+# Soft subtitles are the exception: they are muxed in as subtitle tracks after
+# the rest of the plan has rendered, so a plan of only those never re-encodes.
+
+
+class EditPlan:
+    """Ordered list of edit operations compiled into one ffmpeg filter graph"""
+
+    def __init__(self, ops=None):
+        self.ops = list(ops or [])
+
+    def trim(self, start_time, duration):
+        self.ops.append({"op": "trim", "start_time": float(start_time), "duration": float(duration)})
+        return self
+
+    def text(self, text_params):
+        self.ops.append(dict(text_params, op="text"))
+        return self
+
+    def subtitles(self, srt_content, soft=False):
+        op = {"op": "subtitles", "srt_content": srt_content}
+        if soft:
+            op["soft"] = True
+        self.ops.append(op)
+        return self
+
+    def audio(self, action, gain_db=None, start_time=None, duration=None):
+        op = {"op": "audio", "action": action}
+        for name, value in (("gain_db", gain_db), ("start_time", start_time), ("duration", duration)):
+            if value is not None:
+                op[name] = float(value)
+        self.ops.append(op)
+        return self
+
+    def resolve(self):
+        """Flatten the ops into (seek, duration, filters) on the output timeline"""
+        seek, length, filters = 0.0, None, []
+        for op in self.ops:
+            kind = op["op"]
+            if kind == "trim":
+                start, duration = op["start_time"], op["duration"]
+                if start < 0 or duration <= 0:
+                    raise ValueError(f"Invalid trim: start={start}, duration={duration}")
+                if length is not None:
+                    if start >= length:
+                        raise ValueError(f"Trim start {start}s is past the end of the {length}s clip")
+                    duration = min(duration, length - start)
+                filters = _rebase_filters(filters, start, duration)
+                seek, length = seek + start, duration
+            elif kind == "text":
+                filters.append(("drawtext", dict(op)))
+            elif kind == "subtitles":
+                filters.append(("soft_subtitles" if op.get("soft") else "subtitles", op["srt_content"]))
+            elif kind == "audio":
+                filters.append(("audio", dict(op)))
+            else:
+                raise ValueError(f"Unknown edit operation: {kind!r}")
+        return seek, length, filters
+
+    def compile(self, input_path, output_path, write_srt=None):
+        """Build the ffmpeg output node; write_srt(content) stores subtitle text and returns its path
+
+        Soft subtitle ops are not part of the graph; render() muxes them in afterwards.
+        """
+        seek, length, filters = self.resolve()
+        audio_ops = [params for kind, params in filters if kind == "audio"]
+        filters = [(kind, params) for kind, params in filters if kind not in ("soft_subtitles", "audio")]
+        input_args = {"ss": seek} if seek else {}
+        output_args = {"t": length} if length is not None else {}
+        source = ffmpeg.input(input_path, **input_args)
+
+        if not filters and not audio_ops:
+            return (
+                source
+                .output(output_path, c="copy", **output_args)
+                .global_args('-hide_banner', '-loglevel', 'error')
+            )
+
+        if filters:
+            streams = [apply_filters(source.video, filters, write_srt=write_srt)]
+            codec_args = {"vcodec": "libx264", "pix_fmt": "yuv420p"}
+        else:
+            streams = [source.video]
+            codec_args = {"vcodec": "copy"}
+        if audio_ops:
+            streams.append(audio_stream(input_path, audio_ops, seek, length))
+            codec_args.update(AUDIO_CODEC_ARGS)
+        else:
+            codec_args.update(map='0:a?', acodec='copy')
+        return (
+            ffmpeg
+            .output(*streams, output_path, **codec_args, **output_args)
+            .global_args('-hide_banner', '-loglevel', 'error')
+        )
+
+    def render(self, input_path, output_path, parallel=True):
+        """Render the plan with a single encode; raises ffmpeg.Error on failure
+
+        With parallel, long clips are encoded as keyframe-split chunks on all cores.
+        """
+        seek, length, filters = self.resolve()
+        soft = [srt_content for kind, srt_content in filters if kind == "soft_subtitles"]
+        if soft:
+            return self._render_with_tracks(input_path, output_path, soft, parallel)
+        audio_ops = [params for kind, params in filters if kind == "audio"]
+        filters = [(kind, params) for kind, params in filters if kind != "audio"]
+        if audio_ops and filters and parallel:
+            return self._render_with_audio(input_path, output_path, audio_ops, seek, length)
+        with SrtFiles() as write_srt:
+            if parallel and filters:
+                rendered = render_parallel(
+                    input_path, output_path,
+                    lambda stream, begin: apply_filters(stream, filters, begin - seek, write_srt),
+                    start=seek, duration=length)
+                if rendered:
+                    return rendered
+            run_ffmpeg(self.compile(input_path, output_path, write_srt), stage="encode" if filters else "audio_edit")
+        return output_path
+
+    def _render_with_tracks(self, input_path, output_path, srt_contents, parallel):
+        """Render everything but the soft subtitles, then mux those in (already on the output timeline)"""
+        base = EditPlan([op for op in self.ops if not (op["op"] == "subtitles" and op.get("soft"))])
+        if not base.ops:
+            return mux_subtitles(input_path, output_path, srt_contents)
+        base_path = scratch_path(os.path.splitext(output_path)[1])
+        try:
+            base.render(input_path, base_path, parallel)
+            return mux_subtitles(base_path, output_path, srt_contents)
+        finally:
+            os.unlink(base_path)
+
+    def _render_with_audio(self, input_path, output_path, audio_ops, seek, length):
+        """Render the video ops (in parallel chunks if long), then add the edited source audio"""
+        base_path = scratch_path(os.path.splitext(output_path)[1])
+        try:
+            EditPlan([op for op in self.ops if op["op"] != "audio"]).render(input_path, base_path)
+            return render_audio_edit(base_path, input_path, output_path, audio_ops, seek, length)
+        finally:
+            os.unlink(base_path)
+
+
+def _rebase_filters(filters, start, duration):
+    """Move earlier filters onto the timeline of a trim starting at start"""
+    rebased = []
+    for kind, params in filters:
+        if kind in ("drawtext", "audio") and params.get("start_time") is not None:
+            # An audio op with a start but no duration runs to the end of the clip
+            stop = params["start_time"] + params["duration"] if params.get("duration") is not None else math.inf
+            begin = max(params["start_time"] - start, 0.0)
+            end = min(stop - start, duration)
+            if end <= begin:
+                continue
+            rebased.append((kind, dict(params, start_time=begin, duration=end - begin)))
+        elif kind == "audio":
+            rebased.append((kind, params))
+        else:
+            rebased.append((kind, shift_srt(params, -start, duration)))
+    return rebased
@@ -0,0 +1,162 @@
+import os
+
+import ffmpeg
+
+from .ffmpeg_caps import default_font, overlay_strategies
+from .ffmpeg_runner import run_ffmpeg
+from .filter_chain import SrtFiles, apply_filters, draw_text
+from .media_index import index_media
+from .parallel_render import render_parallel
+from .proxy import scale_text_params
+from .smart_cut import smart_trim
+from .soft_subtitles import mux_subtitles
+from .subtitle_utils import format_srt
+from .transcription import split_cues
+from .windowed_render import render_subtitles_window, render_text_window
+from .workspace import scratch_path
+
+# --- Editing Operations ---
+#
+# The render functions behind every UI action, free of Streamlit: they write
+# output_path and raise (ffmpeg.Error, RuntimeError) on failure, so the app,
+# render jobs and the batch runner can each report errors their own way.
+
+
+def media_duration(path):
+    try:
+        return index_media(path).duration
+    except (ffmpeg.Error, OSError, KeyError, ValueError):
+        return None
+
+
+# --- Audio/Subtitle Functions ---
+
+
+def extract_audio(video_path):
+    """Extract audio from video as WAV file (a scratch file; the caller removes it)"""
+    audio_path = scratch_path('.wav', small=True)
+    try:
+        run_ffmpeg(
+            ffmpeg
+            .input(video_path)
+            .output(audio_path, acodec='pcm_s16le', ac=1, ar='16k'),
+            stage="audio_extract"
+        )
+    except BaseException:
+        os.unlink(audio_path)
+        raise
+    return audio_path
+
+
+def generate_subtitles(cues, chunk_size=5):
+    """Generate SRT subtitles from timed cues, at most chunk_size words per line"""
+    return format_srt(split_cues(cues, chunk_size))
+
+
+# --- Video Processing Functions ---
+
+
+def render_trim(input_path, output_path, start_time, duration, accurate=False):
+    """Trim by stream copy (snaps to keyframes) or, if accurate, by frame-exact smart cut"""
+    if accurate:
+        return smart_trim(input_path, output_path, start_time, duration)
+    run_ffmpeg(
+        ffmpeg
+        .input(input_path, ss=start_time)
+        .output(output_path, t=duration, c="copy")
+    )
+    return output_path
+
+
+def _overlay_drawtext(input_path, output_path, text_params):
+    """drawtext overlay: windowed if short, else parallel chunks, else one full encode"""
+    filters = [("drawtext", text_params)]
+    try:
+        if render_text_window(input_path, output_path, text_params):
+            return
+        if render_parallel(input_path, output_path,
+                           lambda stream, offset: apply_filters(stream, filters, offset, text_method="drawtext")):
+            return
+    except (ffmpeg.Error, OSError):
+        pass
+    _overlay_full(input_path, output_path, text_params, "drawtext")
+
+
+def _overlay_ass(input_path, output_path, text_params):
+    """libass overlay from a one-line ASS script"""
+    _overlay_full(input_path, output_path, text_params, "ass")
+
+
+def _overlay_image(input_path, output_path, text_params):
+    """Overlay a PIL-rendered (and cached) bitmap of the text"""
+    _overlay_full(input_path, output_path, text_params, "image")
+
+
+def _overlay_full(input_path, output_path, text_params, method):
+    with SrtFiles() as write_file:
+        run_ffmpeg(
+            ffmpeg
+            .output(draw_text(ffmpeg.input(input_path).video, text_params, text_params["start_time"], method,
+                              write_file),
+                    output_path,
+                    map='0:a?',
+                    vcodec='libx264',
+                    acodec='copy',
+                    pix_fmt='yuv420p')
+            .global_args('-hide_banner')
+            .global_args('-loglevel', 'error')
+        )
+
+
+OVERLAY_RENDERERS = {"drawtext": _overlay_drawtext, "ass": _overlay_ass, "image": _overlay_image}
+
+
+def render_text_overlay(input_path, output_path, text_params, scale=1.0):
+    """Text overlay using the best method this host's ffmpeg supports, falling back on failure
+
+    scale shrinks pixel sizes for a proxy preview (the ASS script is already resolution independent).
+    """
+    font_path = default_font()
+    if font_path:
+        text_params = dict(text_params, fontfile=font_path)
+
+    strategies = overlay_strategies()
+    if not strategies:
+        raise RuntimeError("This ffmpeg build has no filter that can draw text")
+
+    for strategy in strategies:
+        try:
+            params = text_params if strategy == "ass" else scale_text_params(text_params, scale)
+            OVERLAY_RENDERERS[strategy](input_path, output_path, params)
+            return output_path
+        except Exception as e:
+            last_error = e.stderr.decode() if getattr(e, "stderr", None) else str(e)
+
+    raise RuntimeError(f"All text overlay methods failed. Last error: {last_error}")
+
+
+def render_subtitles(input_path, output_path, srt_content, soft=False):
+    """Burn subtitles into video, re-encoding only the span the cues cover when that is shorter
+
+    With soft, mux them as a subtitle track instead and copy audio and video untouched.
+    """
+    if soft:
+        return mux_subtitles(input_path, output_path, srt_content)
+    filters = [("subtitles", srt_content)]
+    with SrtFiles() as write_srt:
+        try:
+            if render_subtitles_window(input_path, output_path, srt_content, write_srt):
+                return output_path
+            if render_parallel(input_path, output_path,
+                               lambda stream, offset: apply_filters(stream, filters, offset, write_srt)):
+                return output_path
+        except (ffmpeg.Error, OSError):
+            pass
+
+        run_ffmpeg(
+            ffmpeg
+            .input(input_path)
+            .filter_('subtitles', filename=write_srt(srt_content))
+            .output(output_path, map='0:a?', vcodec='libx264', acodec='copy', pix_fmt='yuv420p')
+        )
+    return output_path
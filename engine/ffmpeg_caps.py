@@ -0,0 +1,102 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+from .settings import CACHE_DIR
+
+# --- ffmpeg Capability Probe ---
+#
+# Which filters and encoders an ffmpeg build has, and which fonts the host
+# offers, decides how text can be drawn. Probing once per process (and caching
+# the answer on disk per ffmpeg binary) lets the overlay code go straight to a
+# strategy that works instead of discovering failures one full encode at a time.
+
+FONT_DIRS = ["/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+             "/Library/Fonts", "/System/Library/Fonts", "C:\\Windows\\Fonts"]
+PREFERRED_FONTS = ("dejavusans.ttf", "arial.ttf", "liberationsans-regular.ttf", "helvetica.ttc")
+
+# Text overlay strategies, best first, with the ffmpeg filter each one needs
+OVERLAY_STRATEGIES = (("drawtext", "drawtext"), ("ass", "ass"), ("image", "overlay"))
+
+
+def binary_fingerprint(path):
+    """Identify an ffmpeg build by its resolved path, size and mtime"""
+    stat = os.stat(path)
+    return hashlib.sha256(f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+
+def _list_names(binary, flag):
+    """Names from `ffmpeg -filters` / `-encoders` listings (lines like ' T.. drawtext  V->V  ...')"""
+    output = subprocess.run([binary, "-hide_banner", flag], capture_output=True, text=True).stdout
+    names = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and parts[0] != "=" and not set(parts[0]) - set("TSCVAFXBD.|"):
+            names.add(parts[1])
+    return names
+
+
+def find_fonts():
+    """Font files on this host, preferred sans-serif faces first"""
+    fonts = []
+    if shutil.which("fc-list"):
+        output = subprocess.run(["fc-list", "--format", "%{file}\n"], capture_output=True, text=True).stdout
+        fonts = [line.strip() for line in output.splitlines() if line.strip()]
+    if not fonts:
+        for font_dir in FONT_DIRS:
+            for pattern in ("**/*.ttf", "**/*.otf", "**/*.ttc"):
+                fonts.extend(glob.glob(os.path.join(font_dir, pattern), recursive=True))
+    fonts = sorted(set(fonts))
+    fonts.sort(key=lambda path: os.path.basename(path).lower() not in PREFERRED_FONTS)
+    return fonts
+
+
+def probe_capabilities(binary):
+    return {
+        "filters": sorted(_list_names(binary, "-filters")),
+        "encoders": sorted(_list_names(binary, "-encoders")),
+        "fonts": find_fonts(),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_capabilities(binary="ffmpeg", cache_dir=None):
+    """Filters, encoders and fonts for this ffmpeg build, probed once per process and per binary"""
+    resolved = shutil.which(binary)
+    if resolved is None:
+        return {"filters": [], "encoders": [], "fonts": find_fonts()}
+
+    cache_path = os.path.join(cache_dir or os.path.join(CACHE_DIR, "ffmpeg_caps"),
+                              binary_fingerprint(resolved) + ".json")
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    capabilities = probe_capabilities(resolved)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(capabilities, f)
+    os.replace(tmp_path, cache_path)
+    return capabilities
+
+
+def has_filter(name, capabilities=None):
+    return name in (capabilities or get_capabilities())["filters"]
+
+
+def default_font(capabilities=None):
+    fonts = (capabilities or get_capabilities())["fonts"]
+    return fonts[0] if fonts else None
+
+
+def overlay_strategies(capabilities=None):
+    """Text overlay strategies this host supports, best first"""
+    capabilities = capabilities or get_capabilities()
+    return [strategy for strategy, needed in OVERLAY_STRATEGIES if needed in capabilities["filters"]]
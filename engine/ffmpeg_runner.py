@@ -0,0 +1,113 @@
+import contextvars
+import functools
+import os
+import subprocess
+import threading
+
+import ffmpeg
+
+from .instrumentation import span
+from .media_probe import first_stream, probe_media
+
+# --- ffmpeg Process Runner ---
+#
+# Every render goes through run_ffmpeg() instead of ffmpeg-python's .run(). On
+# its own it behaves like .run(overwrite_output=True, quiet=True), reading
+# ffmpeg's -progress output so the encode span records fps and speed. Inside a
+# render job (see render_jobs.py) it also reports out_time/fps/speed to the job
+# and registers the child process so a cancelled job can kill it.
+
+current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class RenderCancelled(BaseException):
+    """Raised inside a render job once it has been cancelled
+
+    Like asyncio.CancelledError it is not an Exception, so fallback chains that catch
+    Exception to try another method let a cancellation through.
+    """
+
+
+def run_ffmpeg(stream_spec, stage="encode"):
+    """Run a compiled ffmpeg-python node; raises ffmpeg.Error on a non-zero exit
+
+    The run is recorded as a span of stage carrying the final fps/speed and the
+    duration and resolution of the first input.
+    """
+    args = ffmpeg.compile(stream_spec, overwrite_output=True)
+    job = current_job.get()
+    if job is not None and job.cancelled:
+        raise RenderCancelled(job.id)
+
+    with span(stage, **input_summary(args)) as attrs:
+        args = args[:1] + ["-progress", "pipe:1", "-nostats"] + args[1:]
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if job is not None:
+            job.attach(process)
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        try:
+            report = {}
+            for line in process.stdout:
+                key, _, value = line.decode(errors="replace").strip().partition("=")
+                report[key] = value
+                if key == "progress":
+                    progress = parse_progress(report)
+                    attrs.update(progress)
+                    if job is not None:
+                        job.report(process.pid, progress)
+                    report = {}
+            process.wait()
+            stderr_reader.join()
+        finally:
+            if job is not None:
+                job.detach(process)
+
+        if job is not None and job.cancelled:
+            raise RenderCancelled(job.id)
+        stderr = b"".join(stderr_chunks)
+        if process.returncode != 0:
+            raise ffmpeg.Error(args[0], b"", stderr)
+        return b"", stderr
+
+
+def input_summary(args):
+    """{'input_duration', 'resolution'} of the first file input of an ffmpeg command line, if probeable"""
+    try:
+        path = args[args.index("-i") + 1]
+        stat = os.stat(path)
+    except (ValueError, IndexError, OSError):
+        return {}
+    return dict(_probe_summary(path, stat.st_size, stat.st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_summary(path, size, mtime_ns):
+    try:
+        info = probe_media(path)
+    except (ffmpeg.Error, OSError, ValueError):
+        return ()
+    summary = {}
+    if info.get("format", {}).get("duration"):
+        summary["input_duration"] = float(info["format"]["duration"])
+    video = first_stream(info, "video")
+    if video and video.get("width"):
+        summary["resolution"] = f"{video['width']}x{video['height']}"
+    return tuple(summary.items())
+
+
+def parse_progress(report):
+    """Turn one ffmpeg -progress block into {'out_time', 'fps', 'speed'} numbers"""
+    def number(value):
+        try:
+            return float(str(value).rstrip("x"))
+        except ValueError:
+            return 0.0
+
+    out_time_us = report.get("out_time_us") or report.get("out_time_ms") or 0
+    return {
+        "out_time": number(out_time_us) / 1e6,
+        "fps": number(report.get("fps", 0)),
+        "speed": number(report.get("speed", 0)),
+    }
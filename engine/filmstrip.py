@@ -0,0 +1,121 @@
+import json
+import math
+import os
+import threading
+
+import ffmpeg
+
+from .disk_lru import DiskLRU
+from .ffmpeg_runner import run_ffmpeg
+from .media_index import index_media
+from .settings import CACHE_DIR
+
+# --- Timeline Filmstrips ---
+#
+# Hover previews on the timeline come from one JPEG sprite sheet per asset: a
+# grid of small thumbnails taken at a fixed interval, made in a single ffmpeg
+# pass (fps -> scale -> tile), plus a JSON index saying which tile shows which
+# time. When the source has a keyframe at least every interval, only keyframes
+# are decoded. Once made, hovering never touches the video again.
+
+THUMB_WIDTH = 160
+COLUMNS = 10
+MAX_THUMBS = 100
+MIN_INTERVAL = 1.0
+
+
+def plan_filmstrip(duration, max_thumbs=MAX_THUMBS, min_interval=MIN_INTERVAL):
+    """(interval, count) of thumbnails covering duration seconds"""
+    interval = max(min_interval, duration / max_thumbs)
+    return interval, max(1, math.ceil(duration / interval))
+
+
+def keyframes_suffice(keyframes, duration, interval):
+    """True when no gap between keyframes, or at either end of the clip, is longer than interval"""
+    if not keyframes or keyframes[0] > interval or duration - keyframes[-1] > interval:
+        return False
+    return all(b - a <= interval for a, b in zip(keyframes, keyframes[1:]))
+
+
+def make_filmstrip(input_path, output_path, width=THUMB_WIDTH, columns=COLUMNS):
+    """Write a sprite sheet of input_path to output_path and return its time index; raises ffmpeg.Error"""
+    record = index_media(input_path)
+    if not record.duration or not record.width:
+        raise ValueError(f"Can't make a filmstrip of {input_path}: no video duration or size")
+    interval, count = plan_filmstrip(record.duration)
+    columns = min(columns, count)
+    rows = math.ceil(count / columns)
+    height = 2 * round(width * record.height / record.width / 2)
+    keyframes_only = keyframes_suffice(record.keyframes, record.duration, interval)
+
+    source = ffmpeg.input(input_path, skip_frame='nokey') if keyframes_only else ffmpeg.input(input_path)
+    video = source.video
+    if keyframes_only:
+        # fps stops at the last decoded frame; hold the last keyframe until the end of the clip
+        video = video.filter('tpad', stop_mode='clone', stop_duration=record.duration - record.keyframes[-1])
+    run_ffmpeg(
+        video
+        .filter('fps', fps=1 / interval)
+        .filter('scale', width, height)
+        .filter('tile', f"{columns}x{rows}")
+        .output(output_path, vframes=1, **{'q:v': 4})
+        .global_args('-hide_banner', '-loglevel', 'error'),
+        stage="filmstrip",
+    )
+    return {"interval": interval, "count": count, "columns": columns, "rows": rows,
+            "tile_width": width, "tile_height": height, "duration": record.duration,
+            "keyframes_only": keyframes_only}
+
+
+def tile_at(index, seconds):
+    """(x, y, width, height) of the sprite tile closest to seconds"""
+    tile = min(index["count"] - 1, max(0, int(seconds / index["interval"] + 0.5)))
+    row, column = divmod(tile, index["columns"])
+    return column * index["tile_width"], row * index["tile_height"], index["tile_width"], index["tile_height"]
+
+
+class FilmstripStore(DiskLRU):
+    """Sprite sheets and their time indexes, keyed by asset digest"""
+
+    def __init__(self, root=None, max_bytes=512 * 1024 ** 2, width=THUMB_WIDTH):
+        super().__init__(root or os.path.join(CACHE_DIR, "filmstrips"), max_bytes)
+        self.width = width
+        self._building = {}
+        self._building_lock = threading.Lock()
+
+    def get(self, digest):
+        """(sprite_path, index) if the asset's sprite is already made, else None"""
+        return self._load(f"{digest}-{self.width}w")
+
+    def ensure(self, digest, source_path):
+        """Return (sprite_path, index) for the asset, making the sprite on first use"""
+        name = f"{digest}-{self.width}w"
+        cached = self._load(name)
+        if cached:
+            return cached
+        with self._building_lock:
+            lock = self._building.setdefault(name, threading.Lock())
+        with lock:
+            cached = self._load(name)
+            if cached:
+                return cached
+            sprite_tmp, index_tmp = self.temp_path(".jpg"), self.temp_path(".json")
+            try:
+                index = make_filmstrip(source_path, sprite_tmp, self.width)
+                with open(index_tmp, "w") as f:
+                    json.dump(index, f)
+            except BaseException:
+                os.unlink(sprite_tmp)
+                os.unlink(index_tmp)
+                raise
+            # The index goes in last: a sprite is only used once its index exists
+            sprite_path = self.commit(sprite_tmp, name + ".jpg")
+            self.commit(index_tmp, name + ".json")
+            return sprite_path, index
+
+    def _load(self, name):
+        index_path, sprite_path = self.find(name + ".json"), self.find(name + ".jpg")
+        if not (index_path and sprite_path):
+            return None
+        with open(index_path) as f:
+            return sprite_path, json.load(f)
@@ -0,0 +1,120 @@
+import os
+import re
+
+import ffmpeg
+
+from .ffmpeg_caps import overlay_strategies
+from .subtitle_utils import shift_srt
+from .text_bitmap import get_text_bitmaps
+from .workspace import scratch_path
+
+# --- Filter Chain Helpers ---
+#
+# Resolved filters are plain (kind, params) tuples: ("drawtext", text_params) or
+# ("subtitles", srt_content). Keeping them as data lets the same overlay be
+# applied to a whole clip, to one window of it, or to each of several chunks
+# with its times shifted onto that piece's own timeline. Text is drawn with the
+# best method the ffmpeg build has: drawtext, else a libass script, else an
+# overlaid bitmap of the text.
+
+
+def apply_filters(stream, filters, offset=0.0, write_srt=None, text_method=None):
+    """Chain (kind, params) filters onto stream, shifting their times back by offset
+
+    write_srt(content, suffix) must store subtitle (or ASS) text in a file and return its
+    path. text_method is 'drawtext', 'ass' or 'image'; by default the first of
+    overlay_strategies().
+    """
+    for kind, params in filters:
+        if kind == "drawtext":
+            stream = draw_text(stream, params, params["start_time"] - offset, text_method or best_text_method(),
+                               write_srt)
+        else:
+            stream = stream.filter('subtitles', filename=write_srt(shift_srt(params, -offset) if offset else params))
+    return stream
+
+
+def best_text_method():
+    """The best text overlay method of this ffmpeg build; raises RuntimeError if it has none"""
+    strategies = overlay_strategies()
+    if not strategies:
+        raise RuntimeError("This ffmpeg build has no filter that can draw text")
+    return strategies[0]
+
+
+def draw_text(stream, text_params, start, method, write_file=None):
+    """Draw text_params on stream from start (on the stream's timeline) with one overlay method"""
+    end = start + text_params["duration"]
+    if method == "drawtext":
+        font_args = {"fontfile": text_params["fontfile"]} if text_params.get("fontfile") else {}
+        return stream.filter('drawtext',
+                             text=text_params["text"],
+                             enable=f'between(t,{start},{end})',
+                             x=text_params["x_position"],
+                             y=text_params["y_position"],
+                             fontsize=text_params["font_size"],
+                             fontcolor=text_params["font_color"],
+                             **font_args)
+    if method == "ass":
+        return stream.filter('ass', filename=write_file(ass_script(text_params, start), '.ass'))
+    img_path = get_text_bitmaps().render(text_params["text"], text_params.get("fontfile"),
+                                         text_params["font_size"], text_params["font_color"])
+    return stream.overlay(ffmpeg.input(img_path, loop=1),
+                          enable=f'between(t,{start},{end})',
+                          x=overlay_position(text_params["x_position"]),
+                          y=overlay_position(text_params["y_position"]),
+                          shortest=1)
+
+
+def ass_script(text_params, start):
+    """One-line ASS script showing the text centered from start for its duration"""
+    return f"""
+[Script Info]
+ScriptType: v4.00+
+PlayResX: 384
+PlayResY: 288
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,{text_params["font_size"]},&H00FFFFFF,&H000000FF,&H00000000,0,0,0,0,100,100,0,0,1,1,0,5,10,10,10,0
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,{_ass_time(start)},{_ass_time(start + text_params["duration"])},Default,,0,0,0,,{text_params["text"]}
+"""
+
+
+def _ass_time(seconds):
+    """H:MM:SS.cc as ASS event times are written"""
+    centis = max(0, int(round(seconds * 100)))
+    minutes, centis = divmod(centis, 6000)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{centis / 100:05.2f}"
+
+
+def overlay_position(expr):
+    """Translate a drawtext x/y expression (w, text_w) into overlay terms (W, w)"""
+    names = {"text_w": "w", "text_h": "h", "w": "W", "h": "H"}
+    return re.sub(r"\b(text_w|text_h|w|h)\b", lambda m: names[m.group(1)], str(expr))
+
+
+class SrtFiles:
+    """Hands out temporary SRT files (call with the text, and a suffix for ASS) and removes them all on exit"""
+
+    def __init__(self):
+        self.paths = []
+
+    def __call__(self, srt_content, suffix='.srt'):
+        path = scratch_path(suffix, small=True)
+        self.paths.append(path)
+        with open(path, 'w') as srt_file:
+            srt_file.write(srt_content)
+        return path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        for path in self.paths:
+            if os.path.exists(path):
+                os.unlink(path)
@@ -0,0 +1,89 @@
+from .edit_plan import EditPlan
+from .editing import render_text_overlay
+from .proxy import scale_edit_ops
+from .render_cache import render_key
+
+# --- Edit History ---
+#
+# Edits made one after another form a chain of versions: version k is step k
+# applied to version k-1, and version 0 is the source. A version is named by a
+# key hashed from its parent's key and its own step, so its render can be kept
+# in the RenderCache (evicted by recency under the byte budget) and found again
+# by anyone who reaches the same chain. Undo and redo only move the cursor; if
+# the version under it is cached it shows at once. Changing step k keeps the
+# keys of versions before k, so rendering restarts from the newest cached
+# version below k and only steps k..n run again.
+
+
+def render_step(op, input_path, output_path, scale=1.0):
+    """Apply one EditPlan op to input_path; scale shrinks pixel sizes for proxy renders"""
+    if op["op"] == "text":
+        return render_text_overlay(input_path, output_path, op, scale)
+    return EditPlan(scale_edit_ops([op], scale)).render(input_path, output_path)
+
+
+class EditHistory:
+    """Ordered edit steps over one source, with an undo/redo cursor"""
+
+    def __init__(self):
+        self.steps = []
+        self.position = 0
+
+    def push(self, ops, prompt=""):
+        """Apply ops as new steps after the cursor, dropping any undone steps"""
+        del self.steps[self.position:]
+        self.steps.extend({"op": op, "prompt": prompt} for op in ops)
+        self.position = len(self.steps)
+
+    def replace(self, index, ops, prompt=""):
+        """Swap step index for ops (one or more steps); later steps are kept and re-applied"""
+        self.steps[index:index + 1] = [{"op": op, "prompt": prompt} for op in ops]
+        if self.position > index:
+            self.position += len(ops) - 1
+
+    def undo(self):
+        if self.position == 0:
+            return False
+        self.position -= 1
+        return True
+
+    def redo(self):
+        if self.position == len(self.steps):
+            return False
+        self.position += 1
+        return True
+
+    def ops(self, upto=None):
+        """EditPlan ops of the steps up to upto (default: the cursor)"""
+        return [step["op"] for step in self.steps[:self.position if upto is None else upto]]
+
+    def keys(self, base_key, upto=None):
+        """Cache key of every version up to upto; version k's key chains version k-1's"""
+        keys, parent = [], base_key
+        for op in self.ops(upto):
+            parent = render_key(parent, "step", op)
+            keys.append(parent)
+        return keys
+
+    def cached_output(self, cache, base_key, upto=None):
+        """Path of the cached render of version upto (default: the cursor), or None"""
+        keys = self.keys(base_key, upto)
+        return cache.get(keys[-1]) if keys else None
+
+    def render(self, cache, base_key, source_path, upto=None, scale=1.0):
+        """Render version upto from the newest cached version below it; returns (path, steps rendered)
+
+        Version 0 is source_path itself. Raises whatever the failing step raises.
+        """
+        keys, ops = self.keys(base_key, upto), self.ops(upto)
+        start, path = 0, source_path
+        for index in range(len(keys), 0, -1):
+            cached = cache.get(keys[index - 1])
+            if cached:
+                start, path = index, cached
+                break
+        for index in range(start, len(keys)):
+            path = cache.render(
+                keys[index], ".mp4",
+                lambda out, op=ops[index], parent=path: render_step(op, parent, out, scale) or True)
+        return path, len(keys) - start
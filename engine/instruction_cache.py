@@ -0,0 +1,94 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .settings import CACHE_DIR
+
+# --- Instruction Cache ---
+#
+# Entries are keyed by the model that produced them and a version of the system
+# prompt and reply schema as well as by prompt, so switching EDITZ_LLM_MODEL or
+# editing a system prompt never serves replies made under the old one.
+
+TABLE_VERSION = 2  # PRAGMA user_version of the table layout; older tables are dropped
+
+
+class InstructionCache:
+    """SQLite-backed LRU cache of resolved edit instructions keyed by model, version and normalized prompt"""
+
+    def __init__(self, path=None, max_entries=5000):
+        self.path = path or os.path.join(CACHE_DIR, "instructions.sqlite")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < TABLE_VERSION:
+                conn.execute("DROP TABLE IF EXISTS instructions")
+                conn.execute(f"PRAGMA user_version = {TABLE_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS instructions ("
+                "kind TEXT NOT NULL, model TEXT NOT NULL, version TEXT NOT NULL, prompt TEXT NOT NULL, "
+                "params TEXT NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (kind, model, version, prompt))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS instructions_last_used ON instructions (last_used)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, kind, prompt, model="", version=""):
+        """Return the params cached for prompt by model under version, or None"""
+        key = (kind, model, version, prompt)
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT params FROM instructions WHERE kind = ? AND model = ? AND version = ? AND prompt = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE instructions SET last_used = ? WHERE kind = ? AND model = ? AND version = ? AND prompt = ?",
+                (time.time(), *key),
+            )
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, kind, prompt, params, model="", version=""):
+        """Store params for prompt and evict the least recently used entries over the cap"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO instructions (kind, model, version, prompt, params, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, model, version, prompt, json.dumps(params), time.time()),
+            )
+            conn.execute(
+                "DELETE FROM instructions WHERE rowid IN ("
+                "SELECT rowid FROM instructions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM instructions")
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM instructions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
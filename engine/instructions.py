@@ -0,0 +1,273 @@
+import ast
+import functools
+import hashlib
+import json
+import time
+
+from .instrumentation import span
+from .prompt_parser import normalize_prompt, parse_edit_prompt, parse_text_overlay_prompt, parse_trim_prompt
+from .settings import LLM_BACKOFF, LLM_MODEL, LLM_RETRIES, LLM_TIMEOUT
+
+# --- Prompt -> Edit Parameters ---
+
+TRIM_SYSTEM_PROMPT = """You are a video editing assistant. Respond ONLY in valid JSON with these EXACT fields:
+{"start_time": "number", "duration": "number"}
+Rules:
+1. Both values must be positive numbers
+Example: 'trim first 5 seconds' -> {'start_time': '0', 'duration': '5'}
+NO EXPLANATIONS, just the JSON."""
+
+TEXT_OVERLAY_SYSTEM_PROMPT = """You are a video editing assistant. Respond ONLY in valid JSON with these EXACT fields:
+{"text": "text", "start_time": "number", "duration": "number",
+"font_size": "number", "font_color": "color", "x_position": "string", "y_position": "string"}
+Rules:
+1. Use basic colors (white, black, red, etc.)
+2. Font size 20-72
+Example: 'Add title at top center from 5-10s' ->
+{"text": "My Title", "start_time": "5", "duration": "5",
+"font_size": "48", "font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50"}
+NO EXPLANATIONS, just the JSON."""
+
+
+EDIT_PLAN_SYSTEM_PROMPT = """You are a video editing assistant. Turn the request into an ordered list of edit operations.
+Respond ONLY with a JSON object of this shape:
+{"operations": [
+{"op": "trim", "start_time": number, "duration": number},
+{"op": "text", "text": "text", "start_time": number, "duration": number,
+"font_size": number, "font_color": "color", "x_position": "string", "y_position": "string"},
+{"op": "subtitles"},
+{"op": "audio", "action": "volume" | "mute" | "denoise" | "normalize", "gain_db": number,
+"start_time": number, "duration": number}
+]}
+Rules:
+1. Keep the operations in the order they were asked for
+2. Times are seconds on the video as it is after the operations before it
+3. Use basic colors (white, black, red, etc.) and font size 20-72
+4. gain_db (required) is only for volume; start_time and duration are optional for audio and limit
+it to that range; normalize always covers the whole track
+Example: 'trim to 0:30-1:00 and add title Intro for the first 3 seconds' ->
+{"operations": [{"op": "trim", "start_time": 30, "duration": 30},
+{"op": "text", "text": "Intro", "start_time": 0, "duration": 3, "font_size": 48,
+"font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50"}]}
+NO EXPLANATIONS, just the JSON."""
+
+# Fields of each operation type: required ones, then optional ones
+OPERATION_FIELDS = {
+    "trim": ({"start_time": float, "duration": float}, {}),
+    "text": ({"text": str, "start_time": float, "duration": float, "font_size": int,
+              "font_color": str, "x_position": str, "y_position": str}, {}),
+    "subtitles": ({}, {}),
+    "audio": ({"action": str}, {"gain_db": float, "start_time": float, "duration": float}),
+}
+AUDIO_ACTIONS = ("volume", "mute", "denoise", "normalize")
+
+# Bump when a validator changes what a reply is turned into; with the system prompt's
+# hash it versions the instruction cache, so stale replies are never served
+SCHEMA_VERSION = 1
+SYSTEM_PROMPTS = {"trim": TRIM_SYSTEM_PROMPT, "text": TEXT_OVERLAY_SYSTEM_PROMPT,
+                  "operations": EDIT_PLAN_SYSTEM_PROMPT}
+
+# HTTP statuses worth retrying (timeouts, rate limits, server errors)
+RETRY_STATUSES = (408, 409, 429)
+
+
+def extract_json(raw_response):
+    """Decode the first JSON object or array in a reply, ignoring code fences and chatter around it
+
+    Falls back to Python literal syntax for replies written with single quotes.
+    """
+    text = raw_response.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+
+    decoder = json.JSONDecoder()
+    for index, char in enumerate(text):
+        if char not in "{[":
+            continue
+        try:
+            return decoder.raw_decode(text, index)[0]
+        except json.JSONDecodeError:
+            pass
+        closing = text.rfind("}" if char == "{" else "]")
+        if closing > index:
+            try:
+                value = ast.literal_eval(text[index:closing + 1])
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                continue
+            if isinstance(value, (dict, list)):
+                return value
+    raise ValueError(f"No JSON found in reply: {error}")
+
+
+def ask_llm(client, system_prompt, prompt, validate=None, retries=LLM_RETRIES, timeout=LLM_TIMEOUT,
+            backoff=LLM_BACKOFF, **request_args):
+    """Send one prompt to the chat model and return the decoded JSON reply, passed through validate
+
+    Timeouts, transient API errors and replies that do not decode or validate are retried
+    up to retries times with exponential backoff; an invalid reply is shown back to the
+    model with the error. Raises ValueError (unusable reply) or the client's error.
+    """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt},
+    ]
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            with span("llm", model=LLM_MODEL, attempt=attempt):
+                chat_completion = client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    temperature=0.3,
+                    timeout=timeout,
+                    **request_args
+                )
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            if attempt == retries or (status is not None and status < 500 and status not in RETRY_STATUSES):
+                raise
+            continue
+
+        raw_response = (chat_completion.choices[0].message.content or "").strip()
+        try:
+            data = extract_json(raw_response)
+            return validate(data) if validate else data
+        except (ValueError, KeyError, TypeError) as e:
+            if attempt == retries:
+                raise ValueError(f"{e}\nResponse: {raw_response}") from e
+            messages = messages[:2] + [
+                {"role": "assistant", "content": raw_response},
+                {"role": "user", "content": f"That reply was invalid ({e}). Respond again with only the corrected JSON."},
+            ]
+
+
+def trim_params(data):
+    return {
+        "start_time": float(data["start_time"]),
+        "duration": float(data["duration"])
+    }
+
+
+def text_overlay_params(data):
+    return {
+        "text": data["text"],
+        "start_time": float(data["start_time"]),
+        "duration": float(data["duration"]),
+        "font_size": int(data["font_size"]),
+        "font_color": data["font_color"],
+        "x_position": data["x_position"],
+        "y_position": data["y_position"]
+    }
+
+
+def validate_operations(data):
+    """Check and normalize an {'operations': [...]} reply into EditPlan-style ops
+
+    Raises ValueError listing every problem, so a retry can show the model all of them.
+    """
+    operations = data.get("operations") if isinstance(data, dict) else data
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("expected a non-empty 'operations' list")
+
+    ops, problems = [], []
+    for index, item in enumerate(operations):
+        kind = item.get("op") if isinstance(item, dict) else None
+        if kind not in OPERATION_FIELDS:
+            problems.append(f"operation {index}: unknown op {kind!r}")
+            continue
+        op = {"op": kind}
+        required, optional = OPERATION_FIELDS[kind]
+        for fields, needed in ((required, True), (optional, False)):
+            for name, cast in fields.items():
+                value = item.get(name)
+                if value is None or value == "":
+                    if needed:
+                        problems.append(f"operation {index} ({kind}): missing {name}")
+                    continue
+                try:
+                    op[name] = int(float(value)) if cast is int else cast(value)
+                except (TypeError, ValueError):
+                    problems.append(f"operation {index} ({kind}): {name}={value!r} is not a {cast.__name__}")
+        if op.get("start_time", 0) < 0 or op.get("duration", 1) <= 0:
+            problems.append(f"operation {index} ({kind}): times must be a start >= 0 and a duration > 0")
+        if kind == "audio" and op.get("action") not in AUDIO_ACTIONS:
+            problems.append(f"operation {index} (audio): action must be one of {', '.join(AUDIO_ACTIONS)}")
+        if kind == "audio" and op.get("action") == "volume" and "gain_db" not in op:
+            problems.append(f"operation {index} (audio): volume needs gain_db")
+        ops.append(op)
+
+    if problems:
+        raise ValueError("; ".join(problems))
+    return ops
+
+
+def request_trim_instructions(client, prompt):
+    return ask_llm(client, TRIM_SYSTEM_PROMPT, prompt, validate=trim_params)
+
+
+def request_text_overlay_instructions(client, prompt):
+    return ask_llm(client, TEXT_OVERLAY_SYSTEM_PROMPT, prompt, validate=text_overlay_params)
+
+
+def request_edit_operations(client, prompt):
+    """All operations of a compound request ('trim to 0:30-1:00 and add title X') in one round trip"""
+    return ask_llm(client, EDIT_PLAN_SYSTEM_PROMPT, prompt, validate=validate_operations,
+                   response_format={"type": "json_object"})
+
+
+@functools.lru_cache(maxsize=None)
+def instruction_version(kind):
+    """Cache version of kind's replies: the schema version and a hash of its system prompt"""
+    schema = json.dumps({op: [sorted(fields) for fields in spec] for op, spec in OPERATION_FIELDS.items()})
+    digest = hashlib.sha256((SYSTEM_PROMPTS[kind] + schema).encode("utf-8")).hexdigest()
+    return f"{SCHEMA_VERSION}:{digest[:16]}"
+
+
+class InstructionResolver:
+    """Resolve prompts via the local parser, then the cache, then the LLM"""
+
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = cache
+        self.parsed = 0
+        self.llm_calls = 0
+
+    def _resolve(self, kind, prompt, parse, request):
+        params = parse(prompt)
+        if params is not None:
+            self.parsed += 1
+            return params
+
+        key = normalize_prompt(prompt)
+        if kind == "trim":
+            key = key.lower()
+        version = instruction_version(kind)
+        if self.cache is not None:
+            params = self.cache.get(kind, key, LLM_MODEL, version)
+            if params is not None:
+                return params
+
+        self.llm_calls += 1
+        params = request(self.client, prompt)
+        if self.cache is not None:
+            self.cache.put(kind, key, params, LLM_MODEL, version)
+        return params
+
+    def trim(self, prompt):
+        return self._resolve("trim", prompt, parse_trim_prompt, request_trim_instructions)
+
+    def text_overlay(self, prompt):
+        return self._resolve("text", prompt, parse_text_overlay_prompt, request_text_overlay_instructions)
+
+    def operations(self, prompt):
+        """Ordered ops for a compound request; see request_edit_operations"""
+        return self._resolve("operations", prompt, parse_edit_prompt, request_edit_operations)
+
+    def stats(self):
+        stats = {"parsed": self.parsed, "llm_calls": self.llm_calls}
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        return stats
@@ -0,0 +1,174 @@
+import atexit
+import contextlib
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from .settings import METRICS_DIR, METRICS_EXPORT_INTERVAL, METRICS_LOG_BYTES
+
+# --- Stage Instrumentation ---
+#
+# Each pipeline stage (llm, upload_persist, probe, audio_extract, transcription,
+# encode) is recorded as a timed span. Spans that run while a request() is
+# active share its trace id, so one click can be followed end to end. Every
+# span is appended to spans.jsonl, which is rotated by size. A Prometheus
+# text-format file with per-stage p50/p95 summaries is rewritten next to it
+# for a textfile collector, from a timer thread rather than on every span.
+
+QUANTILES = (0.5, 0.95)
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def quantile(sorted_values, q):
+    """Nearest-rank quantile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class Tracer:
+    """Records stage spans and exports them as JSON lines and Prometheus summaries"""
+
+    def __init__(self, metrics_dir=METRICS_DIR, window=1000, enabled=True, max_log_bytes=METRICS_LOG_BYTES,
+                 log_backups=3, export_interval=METRICS_EXPORT_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.enabled = enabled
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+        self.export_interval = export_interval
+        self._durations = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(lambda: [0, 0.0])
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._exporter = None
+
+    @contextlib.contextmanager
+    def span(self, stage, **attrs):
+        """Time the enclosed block as one span of stage; yields attrs so callers can add to them"""
+        started_at, started = time.time(), time.perf_counter()
+        status = "ok"
+        try:
+            yield attrs
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - started, started_at, status, attrs)
+
+    def record(self, stage, seconds, started_at=None, status="ok", attrs=None):
+        if not self.enabled:
+            return
+        entry = {
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "start": started_at or time.time() - seconds,
+            "status": status,
+            "trace_id": _current_trace.get(),
+            "attrs": attrs or {},
+        }
+        with self._lock:
+            self._durations[stage].append(seconds)
+            self._totals[stage][0] += 1
+            self._totals[stage][1] += seconds
+            self._dirty = True
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            log_path = os.path.join(self.metrics_dir, "spans.jsonl")
+            with open(log_path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+                size = f.tell()
+            if size >= self.max_log_bytes:
+                self._rotate(log_path)
+            if self._exporter is None:
+                self._exporter = threading.Thread(target=self._export_forever, name="metrics-exporter", daemon=True)
+                self._exporter.start()
+                atexit.register(self._export_if_dirty)
+
+    def _rotate(self, log_path):
+        """spans.jsonl -> spans.jsonl.1 -> ... -> spans.jsonl.<log_backups>, dropping the oldest"""
+        for index in range(self.log_backups - 1, 0, -1):
+            if os.path.exists(f"{log_path}.{index}"):
+                os.replace(f"{log_path}.{index}", f"{log_path}.{index + 1}")
+        if self.log_backups:
+            os.replace(log_path, f"{log_path}.1")
+        else:
+            os.unlink(log_path)
+
+    def summary(self):
+        """{stage: {'count', 'sum', 'p50', 'p95'}} over the recent window of each stage"""
+        with self._lock:
+            result = {}
+            for stage, durations in self._durations.items():
+                values = sorted(durations)
+                count, total = self._totals[stage]
+                result[stage] = {"count": count, "sum": total,
+                                 **{f"p{int(q * 100)}": quantile(values, q) for q in QUANTILES}}
+            return result
+
+    def write_prometheus(self):
+        """Rewrite editz.prom from the current summaries (the exporter thread does this on a timer)"""
+        lines = [
+            "# HELP editz_stage_seconds Wall time per edit pipeline stage.",
+            "# TYPE editz_stage_seconds summary",
+        ]
+        with self._lock:
+            self._dirty = False
+        for stage, stats in sorted(self.summary().items()):
+            for q in QUANTILES:
+                lines.append(f'editz_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'editz_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'editz_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = os.path.join(self.metrics_dir, "editz.prom")
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def _export_forever(self):
+        while True:
+            time.sleep(self.export_interval)
+            self._export_if_dirty()
+
+    def _export_if_dirty(self):
+        if self._dirty:
+            try:
+                self.write_prometheus()
+            except OSError:
+                pass
+
+
+@contextlib.contextmanager
+def request(name, profile=False):
+    """Group the spans of one user request under a trace id, optionally dumping a cProfile of it
+
+    The profile covers the calling thread; it is written to <METRICS_DIR>/profiles/<trace_id>.prof.
+    """
+    trace_id = f"{name}-{uuid.uuid4().hex[:12]}"
+    token = _current_trace.set(trace_id)
+    profiler = cProfile.Profile() if profile else None
+    try:
+        with tracer.span("request", name=name):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield trace_id
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        _current_trace.reset(token)
+        if profiler is not None:
+            profile_dir = os.path.join(tracer.metrics_dir, "profiles")
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(profile_dir, f"{trace_id}.prof"))
+
+
+tracer = Tracer(enabled=os.getenv("EDITZ_METRICS", "1") != "0")
+span = tracer.span
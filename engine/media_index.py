@@ -0,0 +1,215 @@
+import contextlib
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from .media_probe import first_stream, run_ffprobe
+from .settings import CACHE_DIR
+
+# --- Media Index ---
+#
+# Everything the engine needs to know about a video before touching its frames:
+# container/stream metadata, the keyframe table of the first video stream and the
+# audio format. It is collected with a single ffprobe pass the first time a file
+# is seen and kept in SQLite (keyframes as packed float64 blobs), with the most
+# recent records also held in memory, so checking edit parameters against the
+# media costs a dict lookup instead of a probe.
+#
+# Files named by their content hash (uploads, renders, proxies) are keyed by that
+# hash, so LRU touches and copies of the same content share one record. Any other
+# file is keyed by its path, size and mtime.
+#
+# Keyframe times are stored on the timeline ffmpeg's -ss seeks on, i.e. with the
+# container's start_time (non-zero in most MPEG-TS and many camera files)
+# subtracted from the packets' pts_time.
+
+RECORD_VERSION = 2  # bump when probe_record's output changes; older rows are dropped
+
+_CONTENT_NAME_RE = re.compile(r"^[0-9a-f]{64}")
+
+
+def media_key(path):
+    """Stable index key for path: its content hash if the name carries one, else path/size/mtime"""
+    name = os.path.basename(path)
+    if _CONTENT_NAME_RE.match(name):
+        return os.path.splitext(name)[0]
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def probe_record(path):
+    """Metadata and keyframe table of path in one ffprobe run; raises ffmpeg.Error on failure"""
+    data = run_ffprobe(["-show_entries", "format:stream:packet=stream_index,pts_time,flags", path])
+    info = {"format": data.get("format", {}), "streams": data.get("streams", [])}
+    video = first_stream(info, "video")
+    offset = _number(info["format"].get("start_time"))
+    if offset is None and video is not None:
+        offset = _number(video.get("start_time"))
+    times = {
+        round(float(packet["pts_time"]) - (offset or 0.0), 6)
+        for packet in data.get("packets", [])
+        if video is not None and packet.get("stream_index") == video.get("index")
+        and "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+    }
+    return MediaRecord(info, array("d", sorted(t for t in times if t >= 0.0)))
+
+
+class MediaRecord:
+    """Probed facts about one media file, with checks for edit parameters against them"""
+
+    def __init__(self, info, keyframes):
+        self.info = info
+        self.keyframes = keyframes
+        video, audio = first_stream(info, "video"), first_stream(info, "audio")
+        self.duration = _number(info["format"].get("duration"))
+        self.width = int(video["width"]) if video and video.get("width") else None
+        self.height = int(video["height"]) if video and video.get("height") else None
+        self.video_codec = video.get("codec_name") if video else None
+        self.frame_rate = _rate(video.get("avg_frame_rate")) if video else None
+        self.audio_codec = audio.get("codec_name") if audio else None
+        self.sample_rate = int(audio["sample_rate"]) if audio and audio.get("sample_rate") else None
+        self.channels = audio.get("channels") if audio else None
+        self.channel_layout = audio.get("channel_layout") if audio else None
+
+    @property
+    def has_audio(self):
+        return self.audio_codec is not None
+
+    def keyframe_before(self, seconds):
+        """Latest keyframe at or before seconds (0.0 when there is none)"""
+        index = bisect_right(self.keyframes, seconds)
+        return self.keyframes[index - 1] if index else 0.0
+
+    def check_ops(self, ops):
+        """Raise ValueError listing every EditPlan op that falls outside this media
+
+        Ops are checked on the timeline the ops before them produce, as EditPlan renders them.
+        """
+        problems, length = [], self.duration
+        for index, op in enumerate(ops):
+            label = f"operation {index} ({op['op']})"
+            start = float(op.get("start_time") or 0.0)
+            if length is not None and start >= length:
+                problems.append(f"{label}: starts at {start:g}s, past the end of the {length:g}s clip")
+            elif op["op"] == "trim":
+                length = min(float(op["duration"]), length - start) if length is not None else float(op["duration"])
+            elif op["op"] == "text":
+                for axis, size in (("x_position", self.width), ("y_position", self.height)):
+                    position = _number(op.get(axis))
+                    if size is not None and position is not None and position >= size:
+                        problems.append(f"{label}: {axis} {position:g} is outside the {self.width}x{self.height} frame")
+            elif op["op"] == "audio" and not self.has_audio:
+                problems.append(f"{label}: the video has no audio track")
+        if problems:
+            raise ValueError("; ".join(problems))
+
+    def to_row(self):
+        return json.dumps(self.info, separators=(",", ":")), self.keyframes.tobytes()
+
+    @classmethod
+    def from_row(cls, info, keyframes):
+        packed = array("d")
+        packed.frombytes(keyframes)
+        return cls(json.loads(info), packed)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value):
+    numerator, _, denominator = str(value).partition("/")
+    try:
+        return float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+class MediaIndex:
+    """SQLite-backed index of MediaRecords keyed by media_key(), fronted by an in-memory LRU"""
+
+    def __init__(self, path=None, max_entries=2000, memory_entries=256):
+        self.path = path or os.path.join(CACHE_DIR, "media_index.sqlite")
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                "key TEXT PRIMARY KEY, info TEXT NOT NULL, keyframes BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS media_last_used ON media (last_used)")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < RECORD_VERSION:
+                conn.execute("DELETE FROM media")
+                conn.execute(f"PRAGMA user_version = {RECORD_VERSION}")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits (or rolls back) and is closed when the block exits"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, path):
+        """MediaRecord for path, probing it only the first time; raises ffmpeg.Error if unprobeable"""
+        key = media_key(path)
+        with self._lock:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                return record
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT info, keyframes FROM media WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE media SET last_used = ? WHERE key = ?", (time.time(), key))
+        if row is not None:
+            record = MediaRecord.from_row(*row)
+        else:
+            record = probe_record(path)
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO media (key, info, keyframes, last_used) VALUES (?, ?, ?, ?)",
+                             (key, *record.to_row(), time.time()))
+                conn.execute("DELETE FROM media WHERE rowid IN ("
+                             "SELECT rowid FROM media ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                             (self.max_entries,))
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key, record):
+        with self._lock:
+            self._memory[key] = record
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            self._memory.clear()
+            conn.execute("DELETE FROM media")
+
+
+@functools.lru_cache(maxsize=None)
+def get_media_index():
+    """Process-wide MediaIndex under CACHE_DIR"""
+    return MediaIndex()
+
+
+def index_media(path):
+    """MediaRecord for path from the shared index"""
+    return get_media_index().lookup(path)
@@ -0,0 +1,38 @@
+import json
+import subprocess
+
+import ffmpeg
+
+from .instrumentation import span
+
+# --- ffprobe Helpers ---
+
+
+def run_ffprobe(args):
+    """Run ffprobe with JSON output; raises ffmpeg.Error on failure"""
+    cmd = ["ffprobe", "-v", "error", "-of", "json"] + list(args)
+    with span("probe", args=" ".join(args[:-1]) if args else ""):
+        process = subprocess.run(cmd, capture_output=True)
+    if process.returncode != 0:
+        raise ffmpeg.Error("ffprobe", process.stdout, process.stderr)
+    return json.loads(process.stdout or b"{}")
+
+
+def probe_media(path):
+    """Container and stream metadata as returned by ffprobe -show_format -show_streams"""
+    return run_ffprobe(["-show_format", "-show_streams", path])
+
+
+def first_stream(info, codec_type):
+    return next((s for s in info.get("streams", []) if s.get("codec_type") == codec_type), None)
+
+
+def probe_keyframes(path, stream="v:0"):
+    """Sorted presentation times (seconds) of the keyframes of one stream, read from packet flags"""
+    data = run_ffprobe(["-select_streams", stream, "-show_entries", "packet=pts_time,flags", path])
+    keyframes = {
+        float(packet["pts_time"])
+        for packet in data.get("packets", [])
+        if "K" in packet.get("flags", "") and packet.get("pts_time") not in (None, "N/A")
+    }
+    return sorted(keyframes)
@@ -0,0 +1,227 @@
+import errno
+import ipaddress
+import mimetypes
+import os
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from .disk_lru import pin, unpin
+from .settings import MEDIA_HOST, MEDIA_LINK_TTL, MEDIA_PORT, MEDIA_PUBLIC_URL
+
+# --- Streaming Media Server ---
+#
+# st.video() and st.download_button() load the whole file into the Streamlit
+# process for every session, which multi-GB renders cannot afford. Instead,
+# files are published under unguessable, expiring links on a small side
+# server that answers Range requests (so players can seek) and streams with
+# sendfile, keeping memory per download constant whatever the file size.
+# Published files are only ever deleted (when asked to) once their link has
+# expired and no response is still streaming them, and are pinned against
+# cache eviction while their link lives. Unless MEDIA_PUBLIC_URL
+# says otherwise, links point at the host the browser reached the app on (on
+# the port this server actually bound), so nothing assumes localhost:8502.
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def _is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+class _Link:
+    def __init__(self, path, filename, expires, delete):
+        self.path = path
+        self.filename = filename
+        self.expires = expires
+        self.delete = delete
+        self.readers = 0
+
+
+class MediaServer:
+    """Serve published files over HTTP with Range support, link TTLs and reader refcounts"""
+
+    def __init__(self, host=MEDIA_HOST, port=MEDIA_PORT, public_url=MEDIA_PUBLIC_URL, sweep_interval=60):
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip("/")
+        self.sweep_interval = sweep_interval
+        self._links = {}
+        self._by_path = {}
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def start(self):
+        """Start serving (and sweeping expired links) on daemon threads; returns self"""
+        server = self
+
+        class Handler(MediaRequestHandler):
+            media_server = server
+
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+            raise RuntimeError(f"Media server port {self.port} on {self.host} is already in use; "
+                               f"set EDITZ_MEDIA_PORT to a free port, or 0 to pick one") from e
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        threading.Thread(target=self._sweep_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def base_url(self, request_host=None):
+        """Where browsers reach this server: public_url, else request_host's name on our port
+
+        Without either, only a loopback-bound server can be assumed reachable (as localhost).
+        """
+        if self.public_url:
+            return self.public_url
+        hostname = urlsplit(f"//{request_host}").hostname if request_host else None
+        if hostname is None:
+            if not _is_loopback(self.host):
+                raise RuntimeError(f"The media server listens on {self.host}; set EDITZ_MEDIA_PUBLIC_URL "
+                                   f"to the URL browsers reach it at")
+            hostname = "localhost"
+        if ":" in hostname:
+            hostname = f"[{hostname}]"
+        return f"http://{hostname}:{self.port}"
+
+    def publish(self, path, filename=None, ttl=MEDIA_LINK_TTL, download=False, delete=False, request_host=None):
+        """URL serving path for ttl seconds; republishing a path reuses and extends its link
+
+        download adds Content-Disposition: attachment. delete removes the file once the
+        link has expired and nobody is reading it. request_host is the Host the browser
+        used for the app, which the link reuses when no public_url is configured.
+        """
+        base_url = self.base_url(request_host)
+        path = os.path.abspath(path)
+        filename = filename or os.path.basename(path)
+        with self._lock:
+            token = self._by_path.get(path)
+            link = self._links.get(token)
+            if link is None:
+                token = secrets.token_urlsafe(16)
+                link = self._links[token] = _Link(path, filename, 0, delete)
+                self._by_path[path] = token
+                pin(path)
+            link.expires = max(link.expires, time.time() + ttl)
+            link.delete = link.delete or delete
+        url = f"{base_url}/media/{token}/{quote(filename)}"
+        return url + "?download=1" if download else url
+
+    def acquire(self, token):
+        """The live link for token with its reader count raised, or None"""
+        with self._lock:
+            link = self._links.get(token)
+            if link is None or link.expires < time.time():
+                return None
+            link.readers += 1
+            return link
+
+    def release(self, link):
+        with self._lock:
+            link.readers -= 1
+
+    def sweep(self):
+        """Forget expired links and delete their files when asked to and no longer being read"""
+        now = time.time()
+        with self._lock:
+            expired = [(token, link) for token, link in self._links.items()
+                       if link.expires < now and link.readers == 0]
+            for token, link in expired:
+                del self._links[token]
+                if self._by_path.get(link.path) == token:
+                    del self._by_path[link.path]
+        for _, link in expired:
+            unpin(link.path)
+            if link.delete:
+                try:
+                    os.unlink(link.path)
+                except FileNotFoundError:
+                    pass
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD /media/<token>/<filename>[?download=1], with single byte-range support"""
+
+    media_server = None
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        url = urlsplit(self.path)
+        parts = url.path.split("/")
+        if len(parts) != 4 or parts[1] != "media":
+            return self.send_error(404)
+        link = self.media_server.acquire(parts[2])
+        if link is None:
+            return self.send_error(404)
+        try:
+            try:
+                f = open(link.path, "rb")
+            except OSError:
+                return self.send_error(404)
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                start, end = 0, size - 1
+                status = 200
+                match = RANGE_PATTERN.match(self.headers.get("Range", "").strip())
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+                    else:
+                        start = max(0, size - int(match.group(2)))
+                    if start > end or start >= size:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    status = 206
+
+                self.send_response(status)
+                self.send_header("Content-Type", mimetypes.guess_type(link.filename)[0] or "application/octet-stream")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                if "download=1" in url.query:
+                    self.send_header("Content-Disposition",
+                                     f"attachment; filename*=UTF-8''{quote(unquote(parts[3]))}")
+                self.end_headers()
+                if send_body and end >= start:
+                    try:
+                        # sendfile streams straight from the page cache in bounded pieces
+                        self.connection.sendfile(f, start, end - start + 1)
+                    except (BrokenPipeError, ConnectionResetError):
+                        self.close_connection = True
+        finally:
+            self.media_server.release(link)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,63 @@
+import os
+
+import ffmpeg
+
+from .media_index import index_media
+from .smart_cut import EPSILON, join_segments
+
+# --- Parallel Segment Encoding ---
+#
+# libx264's own threading stops scaling well before a many-core box runs out of
+# cores, especially on long high-resolution clips. For full re-encodes the clip
+# is split at keyframes into one chunk per available core, every chunk runs the
+# same filter chain (with its times rebased onto the chunk) as its own ffmpeg
+# process, and the chunks are stitched back together with the concat demuxer.
+
+# Chunks shorter than this cost more in process start-up and seeking than they save
+MIN_CHUNK_SECONDS = 15.0
+MAX_CHUNKS = 32
+
+
+def choose_chunk_count(duration, cpu_count=None, min_chunk=MIN_CHUNK_SECONDS):
+    """How many chunks to encode in parallel for a clip of duration seconds"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, min(cpu_count, MAX_CHUNKS, int(duration // min_chunk)))
+
+
+def chunk_bounds(keyframes, start, end, count):
+    """Split start..end into count chunks, moving each cut to the nearest keyframe"""
+    candidates = [k for k in keyframes if start + EPSILON < k < end - EPSILON]
+    step = (end - start) / count
+    cuts = []
+    for i in range(1, count):
+        target = start + i * step
+        cut = min(candidates, key=lambda k: abs(k - target)) if candidates else target
+        if cut - (cuts[-1] if cuts else start) > EPSILON:
+            cuts.append(cut)
+    bounds = [start] + cuts + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def render_parallel(input_path, output_path, apply_filter, start=0.0, duration=None, workers=None):
+    """Re-encode start..start+duration through apply_filter(stream, chunk_start) in parallel chunks
+
+    Returns output_path, or None when the clip is too short to be worth splitting so the
+    caller can render it in one process. Raises ffmpeg.Error if an ffmpeg step fails.
+    """
+    record = index_media(input_path)
+    end = record.duration
+    if duration is not None:
+        end = min(end, start + duration)
+
+    workers = workers or os.cpu_count() or 1
+    count = choose_chunk_count(end - start, workers)
+    if count < 2:
+        return None
+
+    segments = [(a, b, "encode") for a, b in chunk_bounds(record.keyframes, start, end, count)]
+    encode_args = {"vcodec": "libx264", "pix_fmt": "yuv420p", "threads": max(1, workers // len(segments))}
+    audio = None
+    if record.has_audio:
+        audio = ffmpeg.input(input_path, ss=start, t=end - start).audio
+    return join_segments(input_path, output_path, segments, encode_args, apply_filter=apply_filter,
+                         audio=audio, workers=len(segments), acodec="copy")
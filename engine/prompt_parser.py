@@ -0,0 +1,320 @@
+import re
+
+# --- Local Prompt Parser ---
+#
+# Handles the common, unambiguous trim and title phrasings without a network
+# round trip. Every function returns the same dict shape as the LLM path, or
+# None when the prompt is not understood so the caller can fall back to the
+# model. The grammar is deliberately conservative: a wrong local answer is
+# worse than a slow correct one.
+
+_NUMBER = r"\d+(?:\.\d+)?"
+_UNIT = r"(?:h|hrs?|hours?|m|mins?|minutes?|s|secs?|seconds?)"
+_TIME = rf"(?:\d+:\d{{1,2}}(?::\d{{1,2}})?(?:\.\d+)?|{_NUMBER}\s*{_UNIT}?(?:\s*{_NUMBER}\s*{_UNIT})?)"
+
+_UNIT_SECONDS = {"h": 3600, "m": 60, "s": 1}
+
+_COLORS = (
+    "white", "black", "red", "green", "blue", "yellow", "orange", "purple",
+    "pink", "gray", "grey", "cyan", "magenta", "brown", "gold", "silver",
+)
+
+_SIZES = {"tiny": 20, "small": 28, "medium": 40, "normal": 40, "large": 56, "big": 56, "huge": 72}
+
+_FIRST_RE = re.compile(rf"^(?:trim|keep|take|cut to|use)\s+(?:the\s+)?first\s+({_TIME})$")
+_RANGE_RE = re.compile(rf"^(?:trim|keep|take|use|extract|clip)?\s*(?:the\s+)?(?:video\s+|clip\s+)?"
+                       rf"(?:from\s+|between\s+)?({_TIME})\s*(?:to|-|–|until|and)\s*({_TIME})$")
+_START_FOR_RE = re.compile(rf"^(?:trim|keep|take|use)?\s*(?:starting\s+|start\s+)?(?:at|from)\s+({_TIME})\s+"
+                           rf"for\s+({_TIME})$")
+
+_QUOTED_RE = re.compile(r"[\"“”'‘’](.+?)[\"“”'‘’](?=\s|$|[,.])")
+_TITLE_RE = re.compile(r"\b(?:title|text|caption)\s+(.+?)\s+(?=from\b|at\b|between\b|in\b|for\b|$)", re.I)
+_TEXT_RANGE_RE = re.compile(rf"\b(?:from|between)\s+({_TIME})\s*(?:to|-|–|until|and)\s*({_TIME})")
+_TEXT_BARE_RANGE_RE = re.compile(rf"\b({_TIME})\s*(?:-|–)\s*({_TIME})")
+_TEXT_START_FOR_RE = re.compile(rf"\b(?:at|from)\s+({_TIME})\s+for\s+({_TIME})")
+_FONT_SIZE_RE = re.compile(r"\b(?:size|font size|fontsize)\s*(\d+)|\b(\d+)\s*(?:px|pt)\b")
+
+# Unquoted title text may not contain words the parser reads as styling or timing
+# ('title at top center from 5-10s'); styles it can't express go to the model
+_PLACEMENT_WORDS = {"top", "bottom", "left", "right", "center", "centre", "middle", "corner"}
+_TIMING_WORDS = {"from", "between", "to", "until", "at", "for", "in", "on", "starting", "start",
+                 "second", "seconds", "sec", "secs", "s", "minute", "minutes", "min", "mins"}
+_RESERVED_TITLE_WORDS = _PLACEMENT_WORDS | _TIMING_WORDS | set(_COLORS) | set(_SIZES) | {"size", "font", "px", "pt"}
+_UNSUPPORTED_STYLE_RE = re.compile(r"\b(?:bold|italics?|underlined?|shadow|outlined?|border|stroke|background|box|"
+                                   r"highlight(?:ed)?|fade[sd]?|fading|animated?|scroll(?:s|ing)?|transparent|"
+                                   r"opacity|font(?!\s*size))\b")
+
+# Compound requests split on ';', 'then', and on 'and' only when a new edit verb follows
+# (so 'between 0:30 and 1:00' stays one clause)
+_CLAUSE_SPLIT_RE = re.compile(r"\s*(?:;|,?\s+(?:and\s+)?then\s+|,?\s+and\s+(?=(?:trim|keep|take|cut|use|extract|"
+                              r"clip|add|put|place|show|burn|generate|include|mute|silence|remove|denoise|normalize|normalise|"
+                              r"increase|raise|boost|lower|reduce|decrease|skip|drop)\b))\s*", re.I)
+_SUBTITLES_RE = re.compile(r"^(?:add|burn in|generate|include)\s+(?:automatic\s+|auto\s+)?(?:subtitles|captions)$")
+
+_AUDIO_RANGE = rf"(?:\s+(?:from|between)\s+({_TIME})\s*(?:to|-|–|until|and)\s*({_TIME}))?"
+_MUTE_RE = re.compile(rf"^(?:mute|silence)(?:\s+the)?(?:\s+(?:audio|sound|video))?{_AUDIO_RANGE}$")
+_DENOISE_RE = re.compile(r"^(?:remove|reduce|clean up|denoise)(?:\s+the)?(?:\s+(?:background|audio|hiss))?"
+                         r"(?:\s+(?:noise|audio|sound|hiss))?$")
+_NORMALIZE_RE = re.compile(r"^(?:normalize|normalise|level)(?:\s+the)?\s*(?:audio|sound|loudness|volume)?$")
+_VOLUME_RE = re.compile(rf"^(?P<verb>increase|raise|boost|turn up|lower|reduce|decrease|turn down)(?:\s+the)?"
+                        rf"\s+(?:volume|audio|sound)\s+by\s+({_NUMBER})\s*db{_AUDIO_RANGE}$")
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and trailing punctuation so equivalent prompts compare equal"""
+    return re.sub(r"\s+", " ", prompt).strip().rstrip(".!")
+
+
+def parse_time(value):
+    """Parse '90', '90s', '1:30', '1m30s' or '1.5 minutes' into seconds"""
+    value = value.strip().lower()
+    if ":" in value:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    total, matched = 0.0, False
+    for number, unit in re.findall(rf"({_NUMBER})\s*({_UNIT})?", value):
+        total += float(number) * _UNIT_SECONDS[unit[0]] if unit else float(number)
+        matched = True
+    if not matched:
+        raise ValueError(f"Invalid time: {value!r}")
+    return total
+
+
+def parse_trim_prompt(prompt):
+    """Parse common trim phrasings into {'start_time', 'duration'} or return None"""
+    text = normalize_prompt(prompt).lower()
+
+    match = _FIRST_RE.match(text)
+    if match:
+        start, duration = 0.0, parse_time(match.group(1))
+    else:
+        match = _START_FOR_RE.match(text)
+        if match:
+            start, duration = parse_time(match.group(1)), parse_time(match.group(2))
+        else:
+            match = _RANGE_RE.match(text)
+            if not match:
+                return None
+            start, duration = _parse_range(match.group(1), match.group(2))
+
+    if start < 0 or duration <= 0:
+        return None
+    return {"start_time": start, "duration": duration}
+
+
+def parse_text_overlay_prompt(prompt):
+    """Parse common title phrasings into the text overlay dict or return None"""
+    text = normalize_prompt(prompt)
+    lowered = text.lower()
+
+    quoted = _QUOTED_RE.search(text)
+    if quoted:
+        overlay_text = quoted.group(1)
+        rest = (text[:quoted.start()] + " " + text[quoted.end():]).lower()
+    else:
+        titled = _TITLE_RE.search(text)
+        if not titled:
+            return None
+        overlay_text = titled.group(1)
+        if set(re.findall(r"[a-z]+", overlay_text.lower())) & _RESERVED_TITLE_WORDS:
+            return None
+        rest = (text[:titled.start()] + " " + text[titled.end():]).lower()
+    if _UNSUPPORTED_STYLE_RE.search(rest):
+        return None
+
+    timing = _TEXT_RANGE_RE.search(rest) or _TEXT_BARE_RANGE_RE.search(rest)
+    if timing:
+        start, duration = _parse_range(timing.group(1), timing.group(2))
+    else:
+        timing = _TEXT_START_FOR_RE.search(rest)
+        if not timing:
+            return None
+        start, duration = parse_time(timing.group(1)), parse_time(timing.group(2))
+    if start < 0 or duration <= 0:
+        return None
+
+    ordered_words = re.findall(r"[a-z]+", rest)
+    words = set(ordered_words)
+    font_color = next((word for word in ordered_words if word in _COLORS), "white")
+    size_match = _FONT_SIZE_RE.search(lowered)
+    if size_match:
+        font_size = int(size_match.group(1) or size_match.group(2))
+    else:
+        font_size = next((size for word, size in _SIZES.items() if word in words), 48)
+
+    x_position, y_position = _position(words)
+    return {
+        "text": overlay_text,
+        "start_time": start,
+        "duration": duration,
+        "font_size": min(max(font_size, 10), 100),
+        "font_color": font_color,
+        "x_position": x_position,
+        "y_position": y_position,
+    }
+
+
+def parse_audio_prompt(prompt):
+    """Parse volume, mute, denoise and normalize phrasings into an audio op dict or return None"""
+    text = normalize_prompt(prompt).lower()
+    if _DENOISE_RE.match(text) and ("noise" in text or "hiss" in text or text.startswith("denoise")):
+        return {"action": "denoise"}
+    if _NORMALIZE_RE.match(text):
+        return {"action": "normalize"}
+    match = _MUTE_RE.match(text)
+    if match:
+        op, bounds = {"action": "mute"}, match.groups()
+    else:
+        match = _VOLUME_RE.match(text)
+        if not match:
+            return None
+        gain = float(match.group(2))
+        if match.group("verb") in ("lower", "reduce", "decrease", "turn down"):
+            gain = -gain
+        op, bounds = {"action": "volume", "gain_db": gain}, match.groups()[2:]
+    if bounds[0] is not None:
+        start, duration = _parse_range(bounds[0], bounds[1])
+        if start < 0 or duration <= 0:
+            return None
+        op.update(start_time=start, duration=duration)
+    return op
+
+
+def parse_edit_prompt(prompt):
+    """Parse a compound request into EditPlan-style ops, or None unless every clause is understood"""
+    ops = []
+    for clause in _CLAUSE_SPLIT_RE.split(normalize_prompt(prompt)):
+        if _SUBTITLES_RE.match(clause.lower()):
+            ops.append({"op": "subtitles"})
+            continue
+        params = parse_trim_prompt(clause)
+        if params is not None:
+            ops.append(dict(params, op="trim"))
+            continue
+        params = parse_audio_prompt(clause)
+        if params is not None:
+            ops.append(dict(params, op="audio"))
+            continue
+        params = parse_text_overlay_prompt(clause)
+        if params is None:
+            return None
+        ops.append(dict(params, op="text"))
+    return ops or None
+
+
+# --- Content Anchors ---
+#
+# Times found by content analysis (content_analysis.py) have names a prompt can
+# use in place of a number: "first speech", "last speech", "first cut", "last
+# cut" and "scene N" (where scene N starts). A few idioms ("trim the intro",
+# "cut the silent part at the start", "keep scene 2") are rewritten as plain
+# "keep from A to B" trims. Expansion happens before parsing, so the result goes
+# through the local parser or the LLM like any prompt with explicit times.
+# Quoted text (a title's wording) is never read as an anchor.
+
+_ANCHOR_RE = re.compile(r"\b(?:the\s+)?(first speech|last speech|first cut|last cut|scene \d+)\b", re.I)
+_INTRO_RE = re.compile(r"\b(?:trim|cut|remove|skip|drop)\s+(?:off\s+)?(?:the\s+)?intro\b", re.I)
+_OUTRO_RE = re.compile(r"\b(?:trim|cut|remove|skip|drop)\s+(?:off\s+)?(?:the\s+)?outro\b", re.I)
+_SILENCE_TRIM_RE = re.compile(r"\b(?:trim|cut|remove|skip|drop)\s+(?:off\s+)?(?:the\s+)?(?:(leading|trailing)\s+)?"
+                              r"(?:silent\s+(?:part|bit|section)s?|silences?|dead\s+air)"
+                              r"(?:\s+(?:at|from)\s+(?:the\s+)?(start|beginning|end)|\s+at\s+both\s+ends)?\b", re.I)
+_KEEP_SCENE_RE = re.compile(r"\b(?:keep|use|take)\s+(?:only\s+)?(?:the\s+)?scene\s+(\d+)\b", re.I)
+_ANCHOR_IDIOMS = (_INTRO_RE, _OUTRO_RE, _SILENCE_TRIM_RE, _KEEP_SCENE_RE)
+_QUOTED_SPAN_RE = re.compile(r"(?<!\S)[\"“”'‘’].+?[\"“”'‘’](?=\s|$|[,.;])")
+_PLACEHOLDER_RE = re.compile(r"\x00(\d+)\x00")
+
+
+def mentions_anchors(prompt):
+    """True if prompt names a content anchor or uses an anchor idiom outside quoted text"""
+    masked, _ = _mask_quotes(prompt)
+    return any(pattern.search(masked) for pattern in (_ANCHOR_RE,) + _ANCHOR_IDIOMS)
+
+
+def expand_anchors(prompt, anchors, offset=0.0):
+    """Rewrite anchor idioms and names in prompt as explicit times from anchors ({name: seconds})
+
+    Anchors are source times; offset is where the timeline the prompt edits starts in the
+    source, and clauses after a trim move onto the trimmed timeline, as the ops they become
+    expect. Raises ValueError for an anchor that isn't in anchors.
+    """
+    masked, quoted = _mask_quotes(prompt)
+    # The capturing group keeps the separators, at the odd indices
+    parts = re.split(f"({_CLAUSE_SPLIT_RE.pattern})", masked, flags=re.I)
+    for index in range(0, len(parts), 2):
+        parts[index] = _expand_clause(parts[index], anchors, offset)
+        params = parse_trim_prompt(parts[index])
+        if params is not None:
+            offset += params["start_time"]
+    expanded = "".join(part for part in parts if part)
+    return _PLACEHOLDER_RE.sub(lambda match: quoted[int(match.group(1))], expanded)
+
+
+def _mask_quotes(prompt):
+    """(prompt with each quoted span swapped for a placeholder, the quoted spans)"""
+    quoted = []
+
+    def hide(match):
+        quoted.append(match.group(0))
+        return f"\x00{len(quoted) - 1}\x00"
+
+    return _QUOTED_SPAN_RE.sub(hide, prompt), quoted
+
+
+def _expand_clause(clause, anchors, offset):
+    def time_of(name):
+        name = name.lower()
+        if name not in anchors:
+            raise ValueError(f"No {name} was found in this video")
+        return _format_seconds(max(0.0, anchors[name] - offset))
+
+    def silence_trim(match):
+        where = (match.group(1) or match.group(2) or "").lower()
+        start = "0s" if where in ("trailing", "end") else time_of("first speech")
+        stop = time_of("end") if where in ("leading", "start", "beginning") else time_of("last speech")
+        return f"keep from {start} to {stop}"
+
+    def keep_scene(match):
+        number = int(match.group(1))
+        following = f"scene {number + 1}"
+        return f"keep from {time_of(f'scene {number}')} to {time_of(following if following in anchors else 'end')}"
+
+    clause = _INTRO_RE.sub(lambda match: f"keep from {time_of('first cut')} to {time_of('end')}", clause)
+    clause = _OUTRO_RE.sub(lambda match: f"keep from 0s to {time_of('last cut')}", clause)
+    clause = _SILENCE_TRIM_RE.sub(silence_trim, clause)
+    clause = _KEEP_SCENE_RE.sub(keep_scene, clause)
+    return _ANCHOR_RE.sub(lambda match: time_of(match.group(1)), clause)
+
+
+def _format_seconds(seconds):
+    return f"{seconds:.3f}".rstrip("0").rstrip(".") + "s"
+
+
+def _parse_range(start, end):
+    """Parse 'A to B' into (start, duration), letting '1-2 minutes' share the trailing unit"""
+    unit = re.search(rf"{_NUMBER}\s*({_UNIT})$", end.strip())
+    if unit and re.fullmatch(_NUMBER, start.strip()):
+        start = f"{start.strip()} {unit.group(1)}"
+    start_seconds = parse_time(start)
+    return start_seconds, parse_time(end) - start_seconds
+
+
+def _position(words):
+    """Map placement words to drawtext x/y expressions"""
+    if "left" in words:
+        x_position = "50"
+    elif "right" in words:
+        x_position = "w-text_w-50"
+    else:
+        x_position = "(w-text_w)/2"
+
+    if "top" in words:
+        y_position = "50"
+    elif "bottom" in words:
+        y_position = "h-text_h-50"
+    elif "center" in words or "middle" in words or "centre" in words:
+        y_position = "(h-text_h)/2"
+    else:
+        y_position = "50"
+    return x_position, y_position
@@ -0,0 +1,113 @@
+import os
+import re
+import threading
+
+import ffmpeg
+
+from .disk_lru import DiskLRU
+from .ffmpeg_runner import run_ffmpeg
+from .media_index import index_media
+from .settings import CACHE_DIR, PROXY_CACHE_BUDGET, PROXY_HEIGHT
+
+# --- Proxy Previews ---
+#
+# Previews are rendered from a small, fast-to-decode copy of the source instead
+# of the upload itself. The proxy is made once per asset; an edit then runs
+# with exactly the same parameters on it, except that pixel sizes (font size,
+# numeric positions) are scaled by proxy height / source height so the preview
+# is a faithful miniature of the full render, which only runs on export.
+
+# Names drawtext/overlay position expressions use for frame and text dimensions
+SIZE_NAMES = r"\b(main_w|main_h|text_w|text_h|line_h|W|H|w|h|tw|th|lh)\b"
+
+
+class ProxyStore(DiskLRU):
+    """Low-resolution ultrafast H.264 copies of source assets, keyed by asset digest"""
+
+    def __init__(self, root=None, max_bytes=PROXY_CACHE_BUDGET, height=PROXY_HEIGHT):
+        super().__init__(root or os.path.join(CACHE_DIR, "proxies"), max_bytes)
+        self.height = height
+        self._building = {}
+        self._building_lock = threading.Lock()
+
+    def ensure(self, digest, source_path):
+        """Return (proxy_path, scale) for the asset, making the proxy on first use
+
+        scale is proxy height / source height. Sources no taller than the proxy are
+        their own proxy (scale 1.0). Raises ffmpeg.Error if the proxy encode fails.
+        """
+        source_height = index_media(source_path).height
+        if not source_height or source_height <= self.height:
+            return source_path, 1.0
+        scale = self.height / source_height
+
+        name = f"{digest}-{self.height}p.mp4"
+        path = self.find(name)
+        if path:
+            return path, scale
+        # One encode per asset even when several previews ask for it at once
+        with self._building_lock:
+            lock = self._building.setdefault(name, threading.Lock())
+        with lock:
+            path = self.find(name)
+            if path:
+                return path, scale
+            tmp_path = self.temp_path(".mp4")
+            try:
+                make_proxy(source_path, tmp_path, self.height)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return self.commit(tmp_path, name), scale
+
+
+def make_proxy(input_path, output_path, height=PROXY_HEIGHT):
+    """Downscale to height with ultrafast x264 and a keyframe every second (cheap cuts and windows)"""
+    source = ffmpeg.input(input_path)
+    run_ffmpeg(
+        ffmpeg
+        .output(source.video.filter('scale', -2, height), output_path,
+                map='0:a?',
+                vcodec='libx264',
+                preset='ultrafast',
+                crf=28,
+                pix_fmt='yuv420p',
+                force_key_frames='expr:gte(t,n_forced*1)',
+                acodec='aac',
+                audio_bitrate='96k',
+                movflags='+faststart')
+        .global_args('-hide_banner', '-loglevel', 'error'),
+        stage="proxy"
+    )
+    return output_path
+
+
+def scale_expression(expr, scale):
+    """Rewrite a pixel x/y expression so it lands on the same relative spot in a frame scaled by scale
+
+    Every frame or text dimension is divided back to source size and the result is
+    scaled down again, so '(w-text_w)/2' and '50' are both positioned exactly.
+    """
+    if scale == 1.0:
+        return expr
+    try:
+        return str(round(float(expr) * scale, 2))
+    except (TypeError, ValueError):
+        pass
+    unscaled = re.sub(SIZE_NAMES, lambda m: f"({m.group(1)}/{scale:.6f})", str(expr))
+    return f"{scale:.6f}*({unscaled})"
+
+
+def scale_text_params(text_params, scale):
+    """Text overlay params for a frame scaled by scale (font size and position in pixels)"""
+    if scale == 1.0:
+        return text_params
+    return dict(text_params,
+                font_size=max(1, round(int(text_params["font_size"]) * scale)),
+                x_position=scale_expression(text_params["x_position"], scale),
+                y_position=scale_expression(text_params["y_position"], scale))
+
+
+def scale_edit_ops(ops, scale):
+    """EditPlan ops with their text overlays scaled by scale"""
+    return [scale_text_params(op, scale) if op["op"] == "text" else op for op in ops]
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+
+from .disk_lru import DiskLRU
+from .settings import CACHE_DIR, RENDER_CACHE_BUDGET
+
+# --- Render Result Cache ---
+
+
+def canonical_params(value):
+    """Normalize params so equal edits serialize identically (5 and 5.0, key order)"""
+    if isinstance(value, dict):
+        return {str(k): canonical_params(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [canonical_params(v) for v in value]
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 6)
+    return value
+
+
+def render_key(source_digest, operation, params):
+    """Cache key for rendering operation with params on the source identified by its digest"""
+    payload = json.dumps(
+        {"source": source_digest, "operation": operation, "params": canonical_params(params)},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache(DiskLRU):
+    """Finished renders keyed by render_key(), with LRU eviction under a disk budget"""
+
+    def __init__(self, root=None, max_bytes=RENDER_CACHE_BUDGET):
+        super().__init__(root or os.path.join(CACHE_DIR, "renders"), max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        path = self.find(key)
+        with self._stats_lock:
+            if path:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path
+
+    def render(self, key, suffix, render_fn):
+        """Return the cached output for key, or call render_fn(tmp_path) -> bool and cache its result"""
+        path = self.get(key)
+        if path:
+            return path
+        tmp_path = self.temp_path(suffix)
+        try:
+            ok = render_fn(tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        if not ok:
+            os.unlink(tmp_path)
+            return None
+        return self.commit(tmp_path, key + suffix)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self.total_bytes(),
+        }
@@ -0,0 +1,161 @@
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+
+from .disk_lru import pin, unpin
+from .ffmpeg_runner import RenderCancelled, current_job
+from .instrumentation import request
+from .settings import RENDER_WORKERS
+from .workspace import workspace
+
+# --- Background Render Jobs ---
+#
+# Renders run on a bounded pool shared by every session of the app, so a burst
+# of clicks queues up instead of starting unbounded ffmpeg processes. Jobs are
+# deduplicated by key (e.g. the render cache key): clicking again, or a
+# Streamlit rerun, finds the job already queued or running instead of starting
+# the same render twice. The UI polls job state rather than blocking on it.
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class RenderJob:
+    """One render: its state, live ffmpeg progress, result or error"""
+
+    def __init__(self, job_id, key, label):
+        self.id = job_id
+        self.key = key
+        self.label = label
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.total_seconds = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancelled = False
+        self._progress = {}
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def attach(self, process):
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            process.kill()
+
+    def detach(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def report(self, pid, progress):
+        with self._lock:
+            self._progress[pid] = progress
+
+    @property
+    def progress(self):
+        """Progress summed over this job's ffmpeg processes (parallel chunks cover disjoint spans)"""
+        with self._lock:
+            reports = list(self._progress.values())
+        summary = {name: sum(report[name] for report in reports) for name in ("out_time", "fps", "speed")}
+        if self.total_seconds:
+            summary["fraction"] = min(1.0, summary["out_time"] / self.total_seconds)
+        return summary
+
+    def cancel(self):
+        self.cancelled = True
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            process.kill()
+
+
+class RenderScheduler:
+    """Bounded worker pool plus a job table shared across sessions"""
+
+    def __init__(self, max_workers=RENDER_WORKERS, keep_finished=200):
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs = {}
+        self._by_key = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, label="", profile=False, pins=()):
+        """Queue fn(job) unless a job with key is already queued or running; returns the job
+
+        With profile, a cProfile dump of the job is written (see instrumentation.request).
+        pins are cached files the job reads, kept from eviction until it finishes.
+        """
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.status in (QUEUED, RUNNING):
+                return job
+            job = RenderJob(next(self._ids), key, label)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._prune()
+        for path in pins:
+            pin(path)
+        self._pool.submit(self._run, job, fn, profile, pins)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id)
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.cancel()
+            if job.status == QUEUED:
+                job.status = CANCELLED
+
+    def _run(self, job, fn, profile=False, pins=()):
+        try:
+            self._run_job(job, fn, profile)
+        finally:
+            for path in pins:
+                unpin(path)
+
+    def _run_job(self, job, fn, profile):
+        if job.cancelled:
+            job.status = CANCELLED
+            return
+        job.status, job.started = RUNNING, time.time()
+        context = contextvars.copy_context()
+        context.run(current_job.set, job)
+        try:
+            job.result = context.run(self._traced, job, fn, profile)
+            job.status = DONE
+        except RenderCancelled:
+            job.status = CANCELLED
+        except ffmpeg.Error as e:
+            job.error = e.stderr.decode(errors="replace") if e.stderr else str(e)
+            job.status = CANCELLED if job.cancelled else FAILED
+        except Exception as e:
+            job.error = str(e)
+            job.status = CANCELLED if job.cancelled else FAILED
+        finally:
+            job.finished = time.time()
+
+    @staticmethod
+    def _traced(job, fn, profile):
+        # Scratch files of the job are removed when it ends, however it ends
+        with request(job.label or "job", profile=profile), workspace("job"):
+            return fn(job)
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.status in FINISHED]
+        for job in sorted(finished, key=lambda job: job.id)[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
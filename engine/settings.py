@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# Shared on-disk location for everything Editz caches between runs
+CACHE_DIR = os.getenv("EDITZ_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "editz"))
+
+# Groq model used to turn prompts into edit parameters
+LLM_MODEL = os.getenv("EDITZ_LLM_MODEL", "llama3-70b-8192")
+
+# Byte budget for uploaded source videos kept in the content-addressed store
+ASSET_STORE_BUDGET = int(os.getenv("EDITZ_ASSET_STORE_BUDGET", 20 * 1024 ** 3))
+
+# Byte budget for finished renders kept for instant replay of repeated edits
+RENDER_CACHE_BUDGET = int(os.getenv("EDITZ_RENDER_CACHE_BUDGET", 20 * 1024 ** 3))
+
+# Renders allowed to run at once per app process (each one may use several cores)
+RENDER_WORKERS = int(os.getenv("EDITZ_RENDER_WORKERS", max(1, min(4, (os.cpu_count() or 1) // 4))))
+
+# Where stage timings (spans.jsonl, editz.prom) and optional profiles are written
+METRICS_DIR = os.getenv("EDITZ_METRICS_DIR", os.path.join(CACHE_DIR, "metrics"))
+# spans.jsonl is rotated (keeping a few old files) once it passes METRICS_LOG_BYTES, and
+# editz.prom is rewritten at most every METRICS_EXPORT_INTERVAL seconds
+METRICS_LOG_BYTES = int(os.getenv("EDITZ_METRICS_LOG_BYTES", 64 * 1024 ** 2))
+METRICS_EXPORT_INTERVAL = float(os.getenv("EDITZ_METRICS_EXPORT_INTERVAL", 15))
+
+# Height of the downscaled proxies previews are rendered from, and their byte budget
+PROXY_HEIGHT = int(os.getenv("EDITZ_PROXY_HEIGHT", 360))
+PROXY_CACHE_BUDGET = int(os.getenv("EDITZ_PROXY_CACHE_BUDGET", 5 * 1024 ** 3))
+
+# Side HTTP server that streams previews and downloads (with Range support) instead of
+# loading them into Streamlit's memory. MEDIA_PORT 0 picks a free port. MEDIA_PUBLIC_URL is
+# how browsers reach it (e.g. behind a proxy); unset, links use the host the browser asked
+# the app for, with the server's port
+MEDIA_HOST = os.getenv("EDITZ_MEDIA_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.getenv("EDITZ_MEDIA_PORT", 0))
+MEDIA_PUBLIC_URL = os.getenv("EDITZ_MEDIA_PUBLIC_URL", "")
+MEDIA_LINK_TTL = int(os.getenv("EDITZ_MEDIA_LINK_TTL", 3600))
+
+# Per-request LLM timeout (seconds), retries after the first attempt, and the base backoff
+# delay doubled on each retry; EDITZ_LLM_BASE_URL points the client at any
+# OpenAI-compatible endpoint (e.g. a local fake server for benchmarks)
+LLM_TIMEOUT = float(os.getenv("EDITZ_LLM_TIMEOUT", 20))
+LLM_RETRIES = int(os.getenv("EDITZ_LLM_RETRIES", 2))
+LLM_BACKOFF = float(os.getenv("EDITZ_LLM_BACKOFF", 0.5))
+LLM_BASE_URL = os.getenv("EDITZ_LLM_BASE_URL") or None
+
+# Per-job scratch directories for intermediates: on disk under SCRATCH_DIR, and for small
+# hot files in SCRATCH_RAM_DIR (tmpfs; empty disables) while it holds under SCRATCH_RAM_QUOTA.
+# A job fails once it, or the scratch disk as a whole, is over quota; files untouched for
+# SCRATCH_ORPHAN_AGE seconds are swept
+SCRATCH_DIR = os.getenv("EDITZ_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "editz-scratch"))
+SCRATCH_RAM_DIR = os.getenv("EDITZ_SCRATCH_RAM_DIR", "/dev/shm/editz-scratch" if os.path.isdir("/dev/shm") else "")
+SCRATCH_RAM_QUOTA = int(os.getenv("EDITZ_SCRATCH_RAM_QUOTA", 512 * 1024 ** 2))
+SCRATCH_JOB_QUOTA = int(os.getenv("EDITZ_SCRATCH_JOB_QUOTA", 20 * 1024 ** 3))
+SCRATCH_DISK_QUOTA = int(os.getenv("EDITZ_SCRATCH_DISK_QUOTA", 100 * 1024 ** 3))
+SCRATCH_ORPHAN_AGE = int(os.getenv("EDITZ_SCRATCH_ORPHAN_AGE", 6 * 3600))
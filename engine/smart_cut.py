@@ -0,0 +1,142 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg
+
+from .ffmpeg_runner import run_ffmpeg
+from .media_index import index_media
+from .media_probe import first_stream
+from .workspace import scratch_dir
+
+# --- Frame-Accurate Smart Cut ---
+#
+# A stream-copy trim can only start on a keyframe; a full re-encode is accurate
+# but pays for every frame. Smart cut re-encodes just the partial GOP before the
+# first keyframe inside the range and the partial GOP after the last one, stream
+# copies everything in between, and joins the pieces with the concat demuxer.
+# Pieces are written as MPEG-TS so the re-encoded parts carry their own
+# parameter sets in-band and can sit next to the copied ones. Audio is cut
+# separately (audio encoding is cheap) and muxed back over the joined video.
+
+# Encoders able to produce a bitstream compatible with the copied middle
+ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+# Profiles as reported by ffprobe -> libx264 -profile:v names
+X264_PROFILES = {"baseline": "baseline", "constrained baseline": "baseline", "main": "main",
+                 "high": "high", "high 10": "high10", "high 4:2:2": "high422", "high 4:4:4 predictive": "high444"}
+
+# Two timestamps closer than this are treated as the same frame position
+EPSILON = 0.001
+
+
+def plan_segments(keyframes, start_time, duration):
+    """Split start..start+duration into [(start, end, 'encode'|'copy')] around the keyframes"""
+    end_time = start_time + duration
+    inside = [k for k in keyframes if start_time - EPSILON <= k <= end_time + EPSILON]
+    if not inside or inside[0] >= end_time - EPSILON:
+        return [(start_time, end_time, "encode")]
+
+    first_key, last_key = inside[0], min(inside[-1], end_time)
+    segments = []
+    if first_key - start_time > EPSILON:
+        segments.append((start_time, first_key, "encode"))
+    if last_key - first_key > EPSILON:
+        segments.append((first_key, last_key, "copy"))
+    if end_time - last_key > EPSILON:
+        segments.append((last_key, end_time, "encode"))
+    return segments
+
+
+def encoder_args(video_stream):
+    """libx264/libx265 settings that match the source stream closely enough to concat with it"""
+    codec = video_stream["codec_name"]
+    args = {"vcodec": ENCODERS[codec]}
+    if video_stream.get("pix_fmt"):
+        args["pix_fmt"] = video_stream["pix_fmt"]
+    profile = X264_PROFILES.get(str(video_stream.get("profile", "")).lower())
+    if codec == "h264" and profile:
+        args["profile:v"] = profile
+    return args
+
+
+def smart_trim(input_path, output_path, start_time, duration):
+    """Frame-accurate trim that re-encodes only the boundary GOPs; raises ffmpeg.Error on failure"""
+    record = index_media(input_path)
+    info = record.info
+    video_stream = first_stream(info, "video")
+    has_audio = first_stream(info, "audio") is not None
+
+    if video_stream is None or video_stream.get("codec_name") not in ENCODERS:
+        return accurate_trim(input_path, output_path, start_time, duration, has_audio)
+
+    segments = plan_segments(record.keyframes, start_time, duration)
+    if all(mode == "encode" for _, _, mode in segments):
+        return accurate_trim(input_path, output_path, start_time, duration, has_audio)
+
+    audio = ffmpeg.input(input_path, ss=start_time, t=duration).audio if has_audio else None
+    join_segments(input_path, output_path, segments, encoder_args(video_stream),
+                  audio=audio, acodec="aac", t=duration)
+    return output_path
+
+
+def join_segments(input_path, output_path, segments, encode_args, apply_filter=None, audio=None,
+                  workers=1, **output_args):
+    """Render [(start, end, 'encode'|'copy')] video pieces of input_path and join them losslessly
+
+    Copy pieces are cut by stream copy and must start on a keyframe. Encode pieces are
+    re-encoded with encode_args, after apply_filter(stream, start) if given; the filter
+    sees timestamps relative to the piece start. Up to workers pieces render at once.
+    audio, if given, is muxed over the joined video with the remaining output_args.
+    """
+    with scratch_dir("segments-") as workdir:
+        def render_piece(index):
+            begin, end, mode = segments[index]
+            segment_path = os.path.join(workdir, f"{index:03d}.ts")
+            video = ffmpeg.input(input_path, ss=begin).video
+            if mode == "copy":
+                codec_args = {"vcodec": "copy"}
+            else:
+                codec_args = encode_args
+                if apply_filter is not None:
+                    video = apply_filter(video, begin)
+            run_ffmpeg(
+                video
+                .output(segment_path, t=end - begin, f="mpegts", **codec_args)
+                .global_args('-hide_banner', '-loglevel', 'error')
+            )
+            return segment_path
+
+        # Each piece is its own ffmpeg process, so threads are enough to keep them all busy
+        # (each in a copy of the caller's context so a render job still sees its progress)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, render_piece, index)
+                       for index in range(len(segments))]
+            segment_paths = [future.result() for future in futures]
+
+        list_path = os.path.join(workdir, "segments.txt")
+        with open(list_path, "w") as listing:
+            for segment_path in segment_paths:
+                listing.write(f"file '{segment_path}'\n")
+
+        streams = [ffmpeg.input(list_path, f="concat", safe=0).video]
+        if audio is not None:
+            streams.append(audio)
+        run_ffmpeg(
+            ffmpeg
+            .output(*streams, output_path, vcodec="copy", movflags="+faststart", **output_args)
+            .global_args('-hide_banner', '-loglevel', 'error')
+        )
+    return output_path
+
+
+def accurate_trim(input_path, output_path, start_time, duration, has_audio=True):
+    """Frame-accurate trim by full re-encode, used when smart cut cannot apply"""
+    source = ffmpeg.input(input_path, ss=start_time)
+    streams = [source.video, source.audio] if has_audio else [source.video]
+    run_ffmpeg(
+        ffmpeg
+        .output(*streams, output_path, t=duration, vcodec="libx264", pix_fmt="yuv420p", acodec="aac")
+        .global_args('-hide_banner', '-loglevel', 'error')
+    )
+    return output_path
@@ -0,0 +1,59 @@
+import os
+
+import ffmpeg
+
+from .ffmpeg_runner import run_ffmpeg
+from .filter_chain import SrtFiles
+
+# --- Soft Subtitles ---
+#
+# Burning subtitles in costs a full video encode. Muxing them as a subtitle
+# stream instead copies the audio and video packets untouched and only writes
+# the cues, so captioning a long video takes about as long as copying the file.
+# Players show the track on demand (it is off by default in some of them).
+
+# Output extension -> subtitle codec the container can carry
+SUBTITLE_CODECS = {
+    ".mp4": "mov_text",
+    ".m4v": "mov_text",
+    ".mov": "mov_text",
+    ".mkv": "srt",
+    ".webm": "webvtt",
+}
+
+
+def subtitle_codec(output_path, ass=False):
+    """Subtitle codec for output_path's container; raises ValueError if it can't hold soft subtitles
+
+    ass picks styled ASS instead of SRT for Matroska output.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    codec = SUBTITLE_CODECS.get(extension)
+    if codec is None:
+        raise ValueError(f"Soft subtitles need one of {', '.join(SUBTITLE_CODECS)}, not {extension or 'no extension'}")
+    return "ass" if ass and codec == "srt" else codec
+
+
+def mux_subtitles(input_path, output_path, srt_contents, language="eng", ass=False):
+    """Add each SRT text in srt_contents as a subtitle track, copying audio and video; raises ffmpeg.Error"""
+    if isinstance(srt_contents, str):
+        srt_contents = [srt_contents]
+    codec = subtitle_codec(output_path, ass)
+    source = ffmpeg.input(input_path)
+    with SrtFiles() as write_srt:
+        tracks = [ffmpeg.input(write_srt(content), f="srt") for content in srt_contents]
+        extra = {f"metadata:s:s:{index}": f"language={language}" for index in range(len(tracks))}
+        if codec == "mov_text":
+            extra["movflags"] = "+faststart"
+        run_ffmpeg(
+            ffmpeg
+            .output(source.video, *tracks, output_path,
+                    map='0:a?',
+                    vcodec='copy',
+                    acodec='copy',
+                    scodec=codec,
+                    **extra)
+            .global_args('-hide_banner', '-loglevel', 'error'),
+            stage="subtitle_mux",
+        )
+    return output_path
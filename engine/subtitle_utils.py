@@ -0,0 +1,59 @@
+import re
+
+# --- SRT Helpers ---
+
+_TIMESTAMP_RE = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{1,3})")
+
+
+def parse_timestamp(value):
+    """Parse an SRT timestamp (HH:MM:SS,mmm) into seconds"""
+    match = _TIMESTAMP_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid SRT timestamp: {value!r}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000
+
+
+def format_timestamp(seconds):
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)"""
+    millis = max(0, int(round(seconds * 1000)))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def parse_srt(srt_content):
+    """Parse SRT text into a list of (start, end, text) cues"""
+    cues = []
+    for block in re.split(r"\n\s*\n", srt_content.strip()):
+        lines = block.strip().splitlines()
+        timing_index = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing_index is None:
+            continue
+        start, end = lines[timing_index].split("-->")
+        text = "\n".join(lines[timing_index + 1:]).strip()
+        cues.append((parse_timestamp(start), parse_timestamp(end), text))
+    return cues
+
+
+def format_srt(cues):
+    """Format (start, end, text) cues as SRT text"""
+    blocks = []
+    for index, (start, end, text) in enumerate(cues, 1):
+        blocks.append(f"{index}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def shift_srt(srt_content, offset, duration=None):
+    """Shift all cues by offset seconds, dropping or clipping those outside 0..duration"""
+    shifted = []
+    for start, end, text in parse_srt(srt_content):
+        start, end = start + offset, end + offset
+        if duration is not None:
+            end = min(end, duration)
+        start = max(start, 0.0)
+        if end <= start:
+            continue
+        shifted.append((start, end, text))
+    return format_srt(shifted)
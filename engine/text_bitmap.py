@@ -0,0 +1,43 @@
+import functools
+import hashlib
+import json
+import os
+
+from .disk_lru import DiskLRU
+from .settings import CACHE_DIR
+
+# --- Rendered Text Bitmaps ---
+
+
+class TextBitmapCache(DiskLRU):
+    """Transparent PNGs of rendered text, keyed by text, font, size and color"""
+
+    def __init__(self, root=None, max_bytes=64 * 1024 ** 2):
+        super().__init__(root or os.path.join(CACHE_DIR, "text_bitmaps"), max_bytes)
+
+    def render(self, text, font_path, font_size, font_color, padding=10):
+        """Return the path of a PNG with text drawn on a transparent background"""
+        key = hashlib.sha256(json.dumps([text, font_path, font_size, font_color]).encode("utf-8")).hexdigest()
+        path = self.find(key)
+        if path:
+            return path
+
+        from PIL import Image, ImageDraw, ImageFont
+
+        try:
+            font = ImageFont.truetype(font_path or "arial.ttf", font_size)
+        except OSError:
+            font = ImageFont.load_default()
+        left, top, right, bottom = ImageDraw.Draw(Image.new("RGBA", (1, 1))).textbbox((0, 0), text, font=font)
+        img = Image.new("RGBA", (right - left + 2 * padding, bottom - top + 2 * padding), (0, 0, 0, 0))
+        ImageDraw.Draw(img).text((padding - left, padding - top), text, fill=font_color, font=font)
+
+        tmp_path = self.temp_path(".png")
+        img.save(tmp_path)
+        return self.commit(tmp_path, key + ".png")
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_bitmaps():
+    """Cache of PIL-rendered text images for the image overlay fallback"""
+    return TextBitmapCache()
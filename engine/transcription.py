@@ -0,0 +1,166 @@
+import hashlib
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from .clients import get_recognizer
+from .disk_lru import DiskLRU
+from .instrumentation import span
+from .settings import CACHE_DIR
+
+# --- Chunked Transcription ---
+#
+# The extracted 16 kHz mono PCM is split on silence with a vectorized RMS
+# energy scan, each speech chunk is recognized on a bounded thread pool, and
+# every chunk keeps its real start/end offsets so cues line up with the audio.
+# Recognized text is cached per chunk content hash, so re-running on the same
+# (or a partly changed) file only sends the chunks that are new.
+
+WINDOW_SECONDS = 0.03
+
+
+class GoogleSpeechBackend:
+    """Recognizer backend using speech_recognition's free Google Web Speech API"""
+
+    name = "google"
+
+    def __init__(self, recognizer=None, language="en-US"):
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = recognizer or get_recognizer()
+        self.language = language
+
+    def recognize(self, pcm, sample_rate):
+        """Return the text spoken in 16-bit mono PCM bytes ('' when nothing is recognized)"""
+        audio = self._sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return ""
+
+
+class TranscriptCache(DiskLRU):
+    """Recognized text per (backend, chunk digest), one small file each"""
+
+    def __init__(self, root=None, max_bytes=64 * 1024 ** 2):
+        super().__init__(root or os.path.join(CACHE_DIR, "transcripts"), max_bytes)
+
+    def get(self, key):
+        path = self.find(key)
+        if path is None:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, key, text):
+        tmp_path = self.temp_path()
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.commit(tmp_path, key + ".txt")
+
+
+def read_pcm(wav_path):
+    """Load a 16-bit mono WAV as (int16 samples, sample_rate)"""
+    import numpy as np
+
+    with wave.open(wav_path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError("Expected 16-bit mono PCM audio")
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16), wav.getframerate()
+
+
+def find_speech_segments(samples, sample_rate, silence_db=-40.0, min_silence=0.4,
+                         max_chunk=30.0, padding=0.2):
+    """Return [(start, end)] seconds of speech, split on silences and capped at max_chunk"""
+    import numpy as np
+
+    window = max(1, int(sample_rate * WINDOW_SECONDS))
+    count = len(samples) // window
+    if count == 0:
+        return []
+
+    frames = samples[:count * window].astype(np.float32).reshape(count, window) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    loud = 20 * np.log10(np.maximum(rms, 1e-10)) > silence_db
+
+    # Boundaries of runs of loud windows
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], loud.astype(np.int8), [0]))))
+    runs = list(zip(edges[::2], edges[1::2]))
+
+    # Merge runs separated by less than min_silence
+    gap = int(min_silence / WINDOW_SECONDS)
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    # Split overlong runs at their quietest window so each request stays small
+    limit = max(1, int(max_chunk / WINDOW_SECONDS))
+    chunks = []
+    for start, end in merged:
+        while end - start > limit:
+            search_from = start + limit // 2
+            cut = search_from + int(np.argmin(rms[search_from:start + limit]))
+            chunks.append((start, cut))
+            start = cut
+        chunks.append((start, end))
+
+    duration = len(samples) / sample_rate
+    return [
+        (max(0.0, start * WINDOW_SECONDS - padding), min(duration, end * WINDOW_SECONDS + padding))
+        for start, end in chunks
+    ]
+
+
+class Transcriber:
+    """Silence-chunked, parallel, cached transcription into timed cues"""
+
+    def __init__(self, backend, cache=None, max_workers=4, **segment_options):
+        self.backend = backend
+        self.cache = cache
+        self.max_workers = max_workers
+        self.segment_options = segment_options
+
+    def transcribe(self, wav_path):
+        """Return [(start, end, text)] cues, one per speech chunk that produced text"""
+        samples, sample_rate = read_pcm(wav_path)
+        with span("transcription", backend=self.backend.name,
+                  audio_seconds=len(samples) / sample_rate) as attrs:
+            segments = find_speech_segments(samples, sample_rate, **self.segment_options)
+            pcm_chunks = [samples[int(start * sample_rate):int(end * sample_rate)].tobytes()
+                          for start, end in segments]
+            attrs["chunks"] = len(pcm_chunks)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                texts = list(pool.map(lambda pcm: self._recognize(pcm, sample_rate), pcm_chunks))
+
+        return [(start, end, text.strip()) for (start, end), text in zip(segments, texts) if text.strip()]
+
+    def _recognize(self, pcm, sample_rate):
+        key = hashlib.sha256(f"{self.backend.name}:{sample_rate}:".encode() + pcm).hexdigest()
+        if self.cache is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                return text
+        text = self.backend.recognize(pcm, sample_rate)
+        if self.cache is not None:
+            self.cache.put(key, text)
+        return text
+
+
+def split_cues(cues, words_per_cue=5):
+    """Break long cues into cues of at most words_per_cue words, spreading time by text length"""
+    result = []
+    for start, end, text in cues:
+        words = text.split()
+        groups = [words[i:i + words_per_cue] for i in range(0, len(words), words_per_cue)]
+        total = sum(len(" ".join(group)) for group in groups) or 1
+        cursor = start
+        for group in groups:
+            line = " ".join(group)
+            span = (end - start) * len(line) / total
+            result.append((cursor, cursor + span, line))
+            cursor += span
+    return result
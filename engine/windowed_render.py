@@ -0,0 +1,69 @@
+import ffmpeg
+
+from .filter_chain import apply_filters
+from .media_index import index_media
+from .media_probe import first_stream
+from .smart_cut import ENCODERS, EPSILON, encoder_args, join_segments
+from .subtitle_utils import parse_srt
+
+# --- Windowed Rendering ---
+#
+# An overlay that is only visible between two timestamps only changes the
+# frames in that window. Instead of re-encoding the whole clip, re-encode the
+# keyframe-aligned span that covers the window, stream-copy the parts before
+# and after it, and keep the original audio untouched.
+
+# Only window when the re-encoded span is at most this share of the clip
+MAX_WINDOW_SHARE = 0.6
+
+
+def keyframe_window(keyframes, duration, start, end):
+    """Smallest keyframe-aligned (begin, end) span covering start..end"""
+    begin = max((k for k in keyframes if k <= start + EPSILON), default=0.0)
+    finish = min((k for k in keyframes if k >= end - EPSILON), default=duration)
+    return begin, min(finish, duration)
+
+
+def render_window(input_path, output_path, start, end, apply_filter):
+    """Re-encode only the keyframe span covering start..end through apply_filter(stream, offset)
+
+    Returns output_path, or None when windowing would not pay off (unsupported codec,
+    window covering most of the clip) so the caller can do a full render instead.
+    Raises ffmpeg.Error if an ffmpeg step fails.
+    """
+    record = index_media(input_path)
+    if record.video_codec not in ENCODERS:
+        return None
+    duration = record.duration
+
+    begin, finish = keyframe_window(record.keyframes, duration, max(start, 0.0), min(end, duration))
+    if finish - begin > duration * MAX_WINDOW_SHARE:
+        return None
+
+    segments = [(a, b, mode) for a, b, mode in
+                ((0.0, begin, "copy"), (begin, finish, "encode"), (finish, duration, "copy"))
+                if b - a > EPSILON]
+    audio = ffmpeg.input(input_path).audio if record.has_audio else None
+    return join_segments(input_path, output_path, segments, encoder_args(first_stream(record.info, "video")),
+                         apply_filter=apply_filter, audio=audio, acodec="copy")
+
+
+def render_text_window(input_path, output_path, text_params):
+    """Windowed drawtext overlay; see render_window for the return value"""
+    start = text_params["start_time"]
+    filters = [("drawtext", text_params)]
+    return render_window(input_path, output_path, start, start + text_params["duration"],
+                         lambda stream, offset: apply_filters(stream, filters, offset, text_method="drawtext"))
+
+
+def render_subtitles_window(input_path, output_path, srt_content, write_srt):
+    """Windowed subtitle burn-in over the span the cues cover; see render_window for the return value
+
+    write_srt(content) must store the rebased SRT text in a file and return its path.
+    """
+    cues = parse_srt(srt_content)
+    if not cues:
+        return None
+    filters = [("subtitles", srt_content)]
+    return render_window(input_path, output_path, min(cue[0] for cue in cues), max(cue[1] for cue in cues),
+                         lambda stream, offset: apply_filters(stream, filters, offset, write_srt))
@@ -0,0 +1,301 @@
+import contextlib
+import contextvars
+import functools
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+
+from .settings import (
+    SCRATCH_DIR,
+    SCRATCH_DISK_QUOTA,
+    SCRATCH_JOB_QUOTA,
+    SCRATCH_ORPHAN_AGE,
+    SCRATCH_RAM_DIR,
+    SCRATCH_RAM_QUOTA,
+)
+
+# --- Scratch Workspaces ---
+#
+# Every intermediate file (extracted audio, SRT/ASS scripts, segment pieces,
+# half-finished outputs) lives in a per-job scratch directory instead of loose
+# in /tmp. A job opens a workspace with `with workspace():`; the engine helpers
+# below then put their files in it, and leaving the block deletes the whole
+# directory whether the job succeeded or raised. Small, hot files go to a
+# RAM-backed directory (/dev/shm) while it is under its byte budget, everything
+# else to disk. Files made outside any workspace land in a per-process "loose"
+# directory. A sweeper removes workspaces of dead processes and any file left
+# untouched for SCRATCH_ORPHAN_AGE. Quota checks only size the files this
+# process's workspaces handed out; everything else under the scratch roots is
+# measured by the sweeper's walk.
+
+current_workspace = contextvars.ContextVar("current_workspace", default=None)
+
+
+class QuotaExceeded(RuntimeError):
+    """A job or the whole scratch area is over its byte quota"""
+
+
+def directory_bytes(path):
+    """Total size of the files under path (0 if it doesn't exist)"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+def _path_bytes(path):
+    """Size of a file, or of everything under a directory (None once it is gone)"""
+    try:
+        if os.path.isdir(path):
+            return directory_bytes(path)
+        return os.lstat(path).st_size
+    except FileNotFoundError:
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Workspace:
+    """One job's scratch directories (disk and, if available, RAM), removed on exit"""
+
+    def __init__(self, manager, name, quota):
+        self.manager = manager
+        self.name = name
+        self.quota = quota
+        self.disk_dir = os.path.join(manager.disk_root, name)
+        self.ram_dir = os.path.join(manager.ram_root, name) if manager.ram_root else None
+        self._paths = set()  # files and directories handed out, sized on each quota check
+        self._token = None
+
+    def path(self, suffix="", small=False):
+        """Reserve a new empty file; in RAM when small and the RAM budget allows, else on disk
+
+        Raises QuotaExceeded when this job or the scratch disk is already over quota.
+        """
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self._directory(small))
+        os.close(fd)
+        self._paths.add(path)
+        return path
+
+    @contextlib.contextmanager
+    def directory(self, prefix="", small=False):
+        """A fresh subdirectory, removed (with its contents) when the block exits"""
+        path = tempfile.mkdtemp(prefix=prefix, dir=self._directory(small))
+        self._paths.add(path)
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+            self._paths.discard(path)
+
+    def used_bytes(self, root=None):
+        """Bytes held by the files this workspace handed out (only those under root, if given)"""
+        total = 0
+        for path in list(self._paths):
+            if root and not path.startswith(root + os.sep):
+                continue
+            size = _path_bytes(path)
+            if size is None:
+                self._paths.discard(path)
+            else:
+                total += size
+        return total
+
+    def _directory(self, small):
+        self.manager.check(self)
+        if small and self.ram_dir and self.manager.ram_has_room():
+            os.makedirs(self.ram_dir, exist_ok=True)
+            return self.ram_dir
+        os.makedirs(self.disk_dir, exist_ok=True)
+        return self.disk_dir
+
+    def cleanup(self):
+        for directory in (self.disk_dir, self.ram_dir):
+            if directory:
+                shutil.rmtree(directory, ignore_errors=True)
+        self.manager._release(self)
+
+    def __enter__(self):
+        self._token = current_workspace.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        current_workspace.reset(self._token)
+        self.cleanup()
+
+
+class WorkspaceManager:
+    """Hands out job workspaces under the scratch roots and enforces their quotas"""
+
+    def __init__(self, disk_root=SCRATCH_DIR, ram_root=SCRATCH_RAM_DIR, job_quota=SCRATCH_JOB_QUOTA,
+                 disk_quota=SCRATCH_DISK_QUOTA, ram_quota=SCRATCH_RAM_QUOTA, orphan_age=SCRATCH_ORPHAN_AGE):
+        self.disk_root = disk_root
+        self.ram_root = ram_root if ram_root and self._usable(ram_root) else None
+        self.job_quota = job_quota
+        self.disk_quota = disk_quota
+        self.ram_quota = ram_quota
+        self.orphan_age = orphan_age
+        self._active = {}
+        self._loose = None
+        self._outside = None  # {root: bytes not in this process's live workspaces}, from the last walk
+        self._lock = threading.Lock()
+        self._sweeper = None
+        os.makedirs(self.disk_root, exist_ok=True)
+
+    @staticmethod
+    def _usable(root):
+        try:
+            os.makedirs(root, exist_ok=True)
+        except OSError:
+            return False
+        return os.access(root, os.W_OK)
+
+    def workspace(self, label="job", quota=None):
+        """New workspace for one job; use it as a context manager"""
+        label = re.sub(r"[^A-Za-z0-9_]+", "_", label) or "job"
+        workspace = Workspace(self, f"{label}-{os.getpid()}-{secrets.token_hex(4)}", quota or self.job_quota)
+        with self._lock:
+            self._active[workspace.name] = workspace
+        return workspace
+
+    def loose(self):
+        """This process's workspace for files made outside any job (swept once old)"""
+        with self._lock:
+            if self._loose is None:
+                self._loose = Workspace(self, f"loose-{os.getpid()}-0", self.job_quota)
+                self._active[self._loose.name] = self._loose
+            return self._loose
+
+    def check(self, workspace):
+        """Raise QuotaExceeded if workspace or the scratch disk as a whole is over quota"""
+        used = workspace.used_bytes()
+        if used > workspace.quota:
+            raise QuotaExceeded(f"Scratch space for {workspace.name} is over its quota "
+                                f"({used / 1024 ** 2:.0f} of {workspace.quota / 1024 ** 2:.0f} MiB)")
+        total = self.root_bytes(self.disk_root)
+        if total > self.disk_quota:
+            raise QuotaExceeded(f"Scratch disk is full ({total / 1024 ** 3:.1f} of "
+                                f"{self.disk_quota / 1024 ** 3:.1f} GiB in use)")
+
+    def ram_has_room(self):
+        return self.ram_root is not None and self.root_bytes(self.ram_root) < self.ram_quota
+
+    def root_bytes(self, root):
+        """Bytes in use under a scratch root: our live workspaces' files plus the last walk's rest"""
+        if self._outside is None:
+            self.measure()
+        with self._lock:
+            live = list(self._active.values())
+        return self._outside.get(root, 0) + sum(workspace.used_bytes(root) for workspace in live)
+
+    def measure(self):
+        """Walk the scratch roots for the bytes outside this process's live workspaces"""
+        with self._lock:
+            live = set(self._active)
+        outside = {}
+        for root in filter(None, (self.disk_root, self.ram_root)):
+            outside[root] = sum(_path_bytes(entry.path) or 0 for entry in os.scandir(root)
+                                if entry.name not in live)
+        self._outside = outside
+
+    def usage(self):
+        """{'disk_bytes', 'ram_bytes', 'active'} for the scratch area (other processes' files as of the last sweep)"""
+        with self._lock:
+            active = len(self._active)
+        return {"disk_bytes": self.root_bytes(self.disk_root),
+                "ram_bytes": self.root_bytes(self.ram_root) if self.ram_root else 0,
+                "active": active}
+
+    def _release(self, workspace):
+        with self._lock:
+            if self._active.get(workspace.name) is workspace and workspace is not self._loose:
+                del self._active[workspace.name]
+
+    def sweep(self, now=None):
+        """Remove workspaces of dead processes, and files untouched for orphan_age; returns bytes freed"""
+        now = now or time.time()
+        freed = 0
+        for root in filter(None, (self.disk_root, self.ram_root)):
+            for entry in os.scandir(root):
+                parts = entry.name.rsplit("-", 2)
+                if not entry.is_dir() or len(parts) != 3 or not parts[1].isdigit():
+                    continue
+                pid = int(parts[1])
+                if pid == os.getpid() or _pid_alive(pid):
+                    # A live process may still be using it: only drop long-forgotten files
+                    freed += self._remove_old_files(entry.path, now - self.orphan_age)
+                else:
+                    freed += directory_bytes(entry.path)
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        self.measure()
+        return freed
+
+    @staticmethod
+    def _remove_old_files(path, cutoff):
+        freed = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.lstat(file_path)
+                    if stat.st_mtime < cutoff:
+                        os.unlink(file_path)
+                        freed += stat.st_size
+                except FileNotFoundError:
+                    pass
+        return freed
+
+    def start_sweeper(self, interval=600):
+        """Sweep in a daemon thread every interval seconds (once per manager)"""
+        with self._lock:
+            if self._sweeper is not None:
+                return self
+            self._sweeper = threading.Thread(target=self._sweep_forever, args=(interval,),
+                                             name="scratch-sweeper", daemon=True)
+        self._sweeper.start()
+        return self
+
+    def _sweep_forever(self, interval):
+        while True:
+            try:
+                self.sweep()
+            except OSError:
+                pass
+            time.sleep(interval)
+
+
+@functools.lru_cache(maxsize=None)
+def get_workspace_manager():
+    """Process-wide WorkspaceManager using the EDITZ_SCRATCH_* settings"""
+    return WorkspaceManager()
+
+
+def workspace(label="job", quota=None):
+    """Context manager: a scratch workspace that engine helpers inside the block write to"""
+    return get_workspace_manager().workspace(label, quota)
+
+
+def scratch_path(suffix="", small=False):
+    """New scratch file in the current job's workspace (or the process's loose one)"""
+    return (current_workspace.get() or get_workspace_manager().loose()).path(suffix, small)
+
+
+def scratch_dir(prefix="", small=False):
+    """Context manager: a scratch subdirectory of the current workspace, removed on exit"""
+    return (current_workspace.get() or get_workspace_manager().loose()).directory(prefix, small)
@@ -0,0 +1,61 @@
+import hashlib
+import io
+import os
+
+from engine.asset_store import AssetStore, persist_upload
+from engine.disk_lru import pinned
+
+
+class Upload(io.BytesIO):
+    def __init__(self, data, name="clip.mp4", file_id="upload-1"):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    store = AssetStore(str(tmp_path))
+    first = store.put_stream(io.BytesIO(b"video"), ".mp4")
+    second = store.put_stream(io.BytesIO(b"video"), ".mp4")
+
+    assert first == second == (hashlib.sha256(b"video").hexdigest(), first[1])
+    assert os.path.basename(first[1]) == first[0] + ".mp4"
+    assert sorted(os.listdir(tmp_path)) == [first[0] + ".mp4"]
+    assert store.get(first[0]) == first[1]
+
+
+def test_least_recently_used_assets_are_evicted(tmp_path):
+    store = AssetStore(str(tmp_path), max_bytes=10)
+    old, _ = store.put_stream(io.BytesIO(b"a" * 6))
+    os.utime(store.get(old), (0, 0))
+    new, new_path = store.put_stream(io.BytesIO(b"b" * 6))
+
+    assert store.get(old) is None
+    assert store.get(new) == new_path
+
+
+def test_pinned_assets_outlive_eviction(tmp_path):
+    store = AssetStore(str(tmp_path), max_bytes=10)
+    old, old_path = store.put_stream(io.BytesIO(b"a" * 6))
+    os.utime(old_path, (0, 0))
+    with pinned(old_path):
+        store.put_stream(io.BytesIO(b"b" * 6))
+        assert store.get(old) == old_path
+    store.put_stream(io.BytesIO(b"c" * 6))
+    assert store.get(old) is None
+
+
+def test_persist_upload_reads_each_upload_once(tmp_path):
+    store, memo = AssetStore(str(tmp_path)), {}
+    upload = Upload(b"video")
+    digest, path = persist_upload(store, upload, memo)
+    reads = upload.reads
+
+    assert persist_upload(store, upload, memo) == (digest, path)
+    assert upload.reads == reads
+    assert path.endswith(".mp4")
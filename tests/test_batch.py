@@ -0,0 +1,23 @@
+import json
+
+from batch import load_entries, task_id
+
+
+def test_manifest_paths_are_relative_to_the_manifest(tmp_path, monkeypatch):
+    (tmp_path / "clips").mkdir()
+    (tmp_path / "clips" / "a.mp4").write_bytes(b"video")
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(json.dumps({"input": "clips/a.mp4", "output": "out/a.mp4"}) + "\n"
+                        + json.dumps({"input": "clips/a.mp4"}) + "\n")
+
+    first, second = load_entries(str(manifest))
+    assert first["input"] == str(tmp_path / "clips" / "a.mp4")
+    assert first["output"] == str(tmp_path / "out" / "a.mp4")
+    assert "output" not in second
+
+    ids = set()
+    for cwd in (tmp_path, tmp_path / "clips"):
+        monkeypatch.chdir(cwd)
+        entry = load_entries(str(manifest))[0]
+        ids.add(task_id(entry["input"], entry["output"], []))
+    assert len(ids) == 1
@@ -0,0 +1,74 @@
+import sqlite3
+from array import array
+
+import pytest
+
+from engine import content_analysis, media_index
+from engine.audio_edit import LoudnessCache
+from engine.content_analysis import ContentIndex
+from engine.instruction_cache import InstructionCache
+from engine.media_index import MediaIndex, MediaRecord
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Every sqlite3 connection opened during the test"""
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    return opened
+
+
+def assert_closed(connections):
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_instruction_cache_closes_its_connections(tmp_path, connections):
+    cache = InstructionCache(str(tmp_path / "instructions.sqlite"))
+    cache.put("trim", "keep 1 to 2", {"start_time": 1.0, "duration": 1.0})
+
+    assert cache.get("trim", "keep 1 to 2") == {"start_time": 1.0, "duration": 1.0}
+    assert cache.stats()["entries"] == 1
+    assert connections
+    assert_closed(connections)
+
+
+def test_media_index_closes_its_connections(tmp_path, connections, monkeypatch):
+    info = {"format": {"duration": "4.0"}, "streams": [{"index": 0, "codec_type": "video", "width": 320,
+                                                         "height": 240, "avg_frame_rate": "25/1"}]}
+    monkeypatch.setattr(media_index, "probe_record", lambda path: MediaRecord(info, array("d", [0.0, 2.0])))
+    video = tmp_path / "in.mp4"
+    video.write_bytes(b"video")
+
+    MediaIndex(str(tmp_path / "media_index.sqlite")).lookup(str(video))
+    record = MediaIndex(str(tmp_path / "media_index.sqlite")).lookup(str(video))
+    assert list(record.keyframes) == [0.0, 2.0]
+    assert_closed(connections)
+
+
+def test_loudness_cache_closes_its_connections(tmp_path, connections):
+    cache = LoudnessCache(str(tmp_path / "loudness.sqlite"))
+    cache.put("key", {"input_i": "-23.0"})
+
+    assert cache.get("key") == {"input_i": "-23.0"}
+    assert cache.get("missing") is None
+    assert_closed(connections)
+
+
+def test_content_index_closes_its_connections(tmp_path, connections, monkeypatch):
+    monkeypatch.setattr(content_analysis, "scan_content",
+                        lambda path: {"duration": 6.0, "scenes": [[3.0, 20.0]], "silences": [], "has_audio": True})
+    video = tmp_path / "in.mp4"
+    video.write_bytes(b"video")
+    index = ContentIndex(str(tmp_path / "content_analysis.sqlite"))
+
+    index.lookup(str(video))
+    assert index.get(str(video)).anchors()["first cut"] == 3.0
+    assert_closed(connections)
@@ -0,0 +1,38 @@
+import pytest
+
+from engine import content_analysis
+from engine.content_analysis import AnalysisPending, ContentIndex, resolve_prompt_anchors
+
+DATA = {"duration": 20.0, "scenes": [[5.0, 30.0]], "silences": [[0.0, 1.5]], "has_audio": True}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    scans = []
+    monkeypatch.setattr(content_analysis, "scan_content", lambda path: scans.append(path) or DATA)
+    index = ContentIndex(str(tmp_path / "content_analysis.sqlite"))
+    monkeypatch.setattr(content_analysis, "get_content_index", lambda: index)
+    video = tmp_path / "in.mp4"
+    video.write_bytes(b"video")
+    return index, str(video), scans
+
+
+def test_prompts_without_anchors_skip_the_analysis(index):
+    _, video, scans = index
+    assert resolve_prompt_anchors('add "Scene 2" from 0 to 2', video) == 'add "Scene 2" from 0 to 2'
+    assert scans == []
+
+
+def test_unscanned_anchors_are_pending_without_scanning(index):
+    _, video, scans = index
+    with pytest.raises(AnalysisPending):
+        resolve_prompt_anchors("trim the intro", video, scan=False)
+    assert scans == []
+
+
+def test_anchors_resolve_from_the_indexed_analysis(index):
+    content, video, scans = index
+    content.lookup(video)
+    assert resolve_prompt_anchors("keep from first speech to 10s", video, scan=False) == "keep from 1.5s to 10s"
+    assert resolve_prompt_anchors("trim the intro", video) == "keep from 5s to 20s"
+    assert scans == [video]
@@ -0,0 +1,70 @@
+import pytest
+
+from engine import filter_chain
+from engine.edit_plan import EditPlan, _rebase_filters
+from engine.filter_chain import SrtFiles
+from engine.subtitle_utils import parse_srt
+
+TITLE = {"text": "Hi", "start_time": 2.0, "duration": 4.0, "font_size": 48, "font_color": "white",
+         "x_position": "(w-text_w)/2", "y_position": "50"}
+SRT = "1\n00:00:01,000 --> 00:00:03,000\nOne\n\n2\n00:00:12,000 --> 00:00:14,000\nTwo\n"
+
+
+def test_text_after_trim_keeps_its_times():
+    seek, length, filters = EditPlan().trim(10, 5).text(TITLE).resolve()
+    assert (seek, length) == (10.0, 5.0)
+    assert filters == [("drawtext", dict(TITLE, op="text"))]
+
+
+def test_text_before_trim_is_rebased_and_clipped():
+    _, _, filters = EditPlan().text(TITLE).trim(3, 2).resolve()
+    assert [(params["start_time"], params["duration"]) for _, params in filters] == [(0.0, 2.0)]
+
+
+def test_text_outside_trim_is_dropped():
+    assert EditPlan().text(TITLE).trim(10, 5).resolve()[2] == []
+
+
+def test_nested_trims_add_their_seeks_and_clamp_to_the_clip():
+    assert EditPlan().trim(10, 20).trim(15, 30).resolve()[:2] == (25.0, 5.0)
+
+
+@pytest.mark.parametrize("start, duration", [(-1, 5), (0, 0), (25, 5)])
+def test_invalid_trims_raise(start, duration):
+    with pytest.raises(ValueError):
+        EditPlan().trim(0, 20).trim(start, duration).resolve()
+
+
+def test_subtitles_are_shifted_onto_the_trimmed_timeline():
+    (kind, srt), = _rebase_filters([("subtitles", SRT)], 11.0, 2.5)
+    assert kind == "subtitles"
+    assert parse_srt(srt) == [(1.0, 2.5, "Two")]
+
+
+def test_plan_without_filters_stream_copies():
+    args = EditPlan().trim(1, 2).compile("in.mp4", "out.mp4").get_args()
+    assert args[args.index("-c") + 1] == "copy"
+    assert args[:4] == ["-ss", "1.0", "-i", "in.mp4"]
+
+
+@pytest.mark.parametrize("strategies, graph_filter", [
+    (["drawtext", "ass", "image"], "drawtext="),
+    (["ass", "image"], "ass=filename="),
+    (["image"], "overlay=enable="),
+])
+def test_text_uses_the_best_method_this_ffmpeg_has(monkeypatch, strategies, graph_filter):
+    monkeypatch.setattr(filter_chain, "overlay_strategies", lambda: strategies)
+    monkeypatch.setattr(filter_chain, "get_text_bitmaps", lambda: type("Bitmaps", (), {
+        "render": staticmethod(lambda *args: "text.png")}))
+    with SrtFiles() as write_srt:
+        args = EditPlan().trim(1, 5).text(TITLE).compile("in.mp4", "out.mp4", write_srt).get_args()
+    graph = args[args.index("-filter_complex") + 1]
+    assert graph_filter in graph
+    assert ("drawtext" in graph) == (strategies[0] == "drawtext")
+    assert args[args.index("-i") + 1] == "in.mp4" and args[args.index("0:a?") - 1] == "-map"
+
+
+def test_text_without_any_overlay_filter_fails_before_encoding(monkeypatch):
+    monkeypatch.setattr(filter_chain, "overlay_strategies", lambda: [])
+    with pytest.raises(RuntimeError, match="no filter that can draw text"):
+        EditPlan().text(TITLE).compile("in.mp4", "out.mp4")
@@ -0,0 +1,15 @@
+from engine import editing
+
+SRT = "1\n00:00:01,000 --> 00:00:02,000\nHello\n"
+
+
+def test_burned_subtitles_fallback_keeps_audio(monkeypatch):
+    commands = []
+    monkeypatch.setattr(editing, "render_subtitles_window", lambda *args: False)
+    monkeypatch.setattr(editing, "render_parallel", lambda *args: False)
+    monkeypatch.setattr(editing, "run_ffmpeg", lambda graph, **kwargs: commands.append(graph.get_args()))
+
+    assert editing.render_subtitles("in.mp4", "out.mp4", SRT) == "out.mp4"
+    args = commands[0]
+    assert args[args.index("-acodec") + 1] == "copy"
+    assert ["-map", "0:a?"] == args[args.index("0:a?") - 1:args.index("0:a?") + 1]
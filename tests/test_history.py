@@ -0,0 +1,66 @@
+from engine import history
+from engine.history import EditHistory
+from engine.render_cache import RenderCache
+
+TRIM = {"op": "trim", "start_time": 1.0, "duration": 5.0}
+TITLE = {"op": "text", "text": "Hi", "start_time": 0.0, "duration": 2.0, "font_size": 48,
+         "font_color": "white", "x_position": "50", "y_position": "50"}
+SHORTER = {"op": "trim", "start_time": 0.0, "duration": 3.0}
+
+
+def test_undo_redo_and_push_after_undo():
+    edits = EditHistory()
+    edits.push([TRIM, TITLE], "trim and title")
+    assert edits.undo() and edits.ops() == [TRIM]
+    assert edits.redo() and edits.ops() == [TRIM, TITLE]
+    assert not edits.redo()
+
+    edits.undo()
+    edits.push([SHORTER])
+    assert edits.ops() == [TRIM, SHORTER]
+    assert not edits.redo()
+    assert edits.undo() and edits.undo() and not edits.undo()
+
+
+def test_keys_chain_so_replacing_a_step_keeps_earlier_versions():
+    edits = EditHistory()
+    edits.push([TRIM, TITLE, SHORTER])
+    before = edits.keys("source")
+    edits.replace(1, [dict(TITLE, text="Bye")])
+    after = edits.keys("source")
+
+    assert after[0] == before[0]
+    assert after[1] != before[1] and after[2] != before[2]
+    assert EditHistory().keys("source") == []
+
+
+def test_replace_keeps_the_cursor_on_the_same_step():
+    edits = EditHistory()
+    edits.push([TRIM, TITLE, SHORTER])
+    edits.replace(0, [TRIM, TRIM])
+    assert edits.position == 4 and edits.ops()[-1] == SHORTER
+
+
+def test_render_restarts_from_the_newest_cached_version(tmp_path, monkeypatch):
+    rendered = []
+
+    def render_step(op, input_path, output_path, scale=1.0):
+        rendered.append((op["op"], input_path))
+        with open(output_path, "w") as f:
+            f.write(op["op"])
+        return output_path
+
+    monkeypatch.setattr(history, "render_step", render_step)
+    cache = RenderCache(str(tmp_path / "renders"))
+    edits = EditHistory()
+    edits.push([TRIM, TITLE, SHORTER])
+
+    path, steps = edits.render(cache, "source", "source.mp4")
+    assert steps == 3 and rendered[0] == ("trim", "source.mp4")
+    assert edits.cached_output(cache, "source") == path
+
+    rendered.clear()
+    edits.replace(2, [TRIM])
+    path, steps = edits.render(cache, "source", "source.mp4")
+    assert steps == 1
+    assert rendered == [("trim", edits.cached_output(cache, "source", upto=2))]
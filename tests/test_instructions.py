@@ -0,0 +1,74 @@
+import pytest
+
+from engine import instructions
+from engine.instruction_cache import InstructionCache
+from engine.instructions import InstructionResolver, extract_json, validate_operations
+
+
+@pytest.mark.parametrize("reply", [
+    '{"start_time": 1, "duration": 2}',
+    'Sure! ```json\n{"start_time": 1, "duration": 2}\n``` Enjoy.',
+    "Here you go: {'start_time': 1, 'duration': 2}",
+])
+def test_extract_json_ignores_fences_and_chatter(reply):
+    assert extract_json(reply) == {"start_time": 1, "duration": 2}
+
+
+def test_extract_json_rejects_replies_without_json():
+    with pytest.raises(ValueError):
+        extract_json("I can't help with that.")
+
+
+def test_validate_operations_normalizes_types():
+    ops = validate_operations({"operations": [
+        {"op": "trim", "start_time": "30", "duration": 30},
+        {"op": "text", "text": "Intro", "start_time": 0, "duration": "3", "font_size": "48.0",
+         "font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50", "extra": True},
+        {"op": "subtitles"},
+    ]})
+    assert ops == [
+        {"op": "trim", "start_time": 30.0, "duration": 30.0},
+        {"op": "text", "text": "Intro", "start_time": 0.0, "duration": 3.0, "font_size": 48,
+         "font_color": "white", "x_position": "(w-text_w)/2", "y_position": "50"},
+        {"op": "subtitles"},
+    ]
+
+
+def test_validate_operations_reports_every_problem():
+    with pytest.raises(ValueError) as error:
+        validate_operations({"operations": [
+            {"op": "blur"},
+            {"op": "trim", "start_time": "soon"},
+            {"op": "audio", "action": "echo"},
+        ]})
+    message = str(error.value)
+    for problem in ("operation 0: unknown op 'blur'", "operation 1 (trim): start_time='soon' is not a float",
+                    "operation 1 (trim): missing duration", "operation 2 (audio): action must be one of"):
+        assert problem in message
+
+
+@pytest.mark.parametrize("data", [{}, {"operations": []}, "trim"])
+def test_validate_operations_needs_a_list(data):
+    with pytest.raises(ValueError):
+        validate_operations(data)
+
+
+def test_cached_replies_are_keyed_by_model_and_prompt_version(tmp_path, monkeypatch):
+    cache = InstructionCache(str(tmp_path / "instructions.sqlite"))
+    replies = iter([{"start_time": 1.0, "duration": 2.0}, {"start_time": 3.0, "duration": 4.0},
+                    {"start_time": 5.0, "duration": 6.0}])
+    resolver = InstructionResolver(None, cache)
+    monkeypatch.setattr(instructions, "request_trim_instructions", lambda client, prompt: next(replies))
+    resolve = lambda: resolver._resolve("trim", "the interesting bit", lambda prompt: None,
+                                        instructions.request_trim_instructions)
+
+    assert resolve() == resolve() == {"start_time": 1.0, "duration": 2.0}
+    monkeypatch.setattr(instructions, "LLM_MODEL", "another-model")
+    assert resolve() == {"start_time": 3.0, "duration": 4.0}
+    monkeypatch.setitem(instructions.SYSTEM_PROMPTS, "trim", "A reworded system prompt")
+    instructions.instruction_version.cache_clear()
+    try:
+        assert resolve() == {"start_time": 5.0, "duration": 6.0}
+    finally:
+        instructions.instruction_version.cache_clear()
+    assert resolver.llm_calls == 3
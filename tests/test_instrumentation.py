@@ -0,0 +1,29 @@
+import json
+import os
+
+from engine.instrumentation import Tracer
+
+
+def test_span_log_is_rotated_by_size(tmp_path):
+    tracer = Tracer(str(tmp_path), max_log_bytes=300, log_backups=2, export_interval=3600)
+    for index in range(20):
+        tracer.record("encode", 0.5, attrs={"index": index})
+
+    assert sorted(os.listdir(tmp_path)) == ["spans.jsonl", "spans.jsonl.1", "spans.jsonl.2"]
+    assert all(os.path.getsize(tmp_path / name) < 400 for name in os.listdir(tmp_path))
+    with open(tmp_path / "spans.jsonl.1") as f:
+        older = [json.loads(line)["attrs"]["index"] for line in f]
+    assert older and max(older) < 19
+
+
+def test_prometheus_file_is_written_on_request_not_per_span(tmp_path):
+    tracer = Tracer(str(tmp_path), export_interval=3600)
+    tracer.record("encode", 1.0)
+    tracer.record("encode", 3.0)
+    assert not os.path.exists(tmp_path / "editz.prom")
+
+    tracer.write_prometheus()
+    with open(tmp_path / "editz.prom") as f:
+        prom = f.read()
+    assert 'editz_stage_seconds_count{stage="encode"} 2' in prom
+    assert 'editz_stage_seconds_sum{stage="encode"} 4.000000' in prom
@@ -0,0 +1,41 @@
+import sqlite3
+
+from engine import media_index
+from engine.media_index import MediaIndex, probe_record
+
+VIDEO = {"index": 0, "codec_type": "video", "width": 320, "height": 240, "start_time": "1.400000"}
+
+
+def _probe(format_info, packets):
+    return lambda args: {"format": format_info, "streams": [VIDEO], "packets": packets}
+
+
+def _keyframe(pts_time, stream_index=0):
+    return {"stream_index": stream_index, "pts_time": pts_time, "flags": "K_"}
+
+
+def test_keyframes_are_relative_to_the_container_start(monkeypatch):
+    packets = [_keyframe("1.400000"), _keyframe("3.400000"), _keyframe("4.400000", stream_index=1),
+               {"stream_index": 0, "pts_time": "3.800000", "flags": "__"}]
+    monkeypatch.setattr(media_index, "run_ffprobe", _probe({"duration": "4.0", "start_time": "1.400000"}, packets))
+    assert list(probe_record("in.ts").keyframes) == [0.0, 2.0]
+
+
+def test_stream_start_is_used_without_a_container_start(monkeypatch):
+    packets = [_keyframe("1.300000"), _keyframe("1.400000"), _keyframe("2.400000")]
+    monkeypatch.setattr(media_index, "run_ffprobe", _probe({"duration": "4.0"}, packets))
+    assert list(probe_record("in.mp4").keyframes) == [0.0, 1.0]
+
+
+def test_records_from_an_older_probe_are_dropped(tmp_path):
+    path = str(tmp_path / "media_index.sqlite")
+    MediaIndex(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO media VALUES ('key', '{}', x'', 0)")
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    MediaIndex(path)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM media").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,96 @@
+import http.client
+from urllib.parse import urlsplit
+
+import pytest
+
+from engine.disk_lru import is_pinned
+from engine.media_server import MediaServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = MediaServer(host="127.0.0.1", port=0, public_url="", sweep_interval=3600).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def published(server, tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+    return server, str(path)
+
+
+def fetch(url, range_header=None, method="GET"):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+    conn.request(method, f"{parts.path}?{parts.query}" if parts.query else parts.path,
+                 headers={"Range": range_header} if range_header else {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_full_download(published):
+    server, path = published
+    response, body = fetch(server.publish(path, "out.mp4", download=True))
+    assert (response.status, body) == (200, b"0123456789")
+    assert response.getheader("Content-Type") == "video/mp4"
+    assert response.getheader("Content-Disposition") == "attachment; filename*=UTF-8''out.mp4"
+
+
+@pytest.mark.parametrize("range_header, content_range, body", [
+    ("bytes=2-5", "bytes 2-5/10", b"2345"),
+    ("bytes=7-", "bytes 7-9/10", b"789"),
+    ("bytes=-3", "bytes 7-9/10", b"789"),
+    ("bytes=8-100", "bytes 8-9/10", b"89"),
+])
+def test_byte_ranges(published, range_header, content_range, body):
+    server, path = published
+    response, received = fetch(server.publish(path), range_header)
+    assert (response.status, response.getheader("Content-Range"), received) == (206, content_range, body)
+
+
+@pytest.mark.parametrize("range_header", ["bytes=10-", "bytes=5-2"])
+def test_unsatisfiable_range(published, range_header):
+    server, path = published
+    response, body = fetch(server.publish(path), range_header)
+    assert (response.status, response.getheader("Content-Range"), body) == (416, "bytes */10", b"")
+
+
+def test_unknown_and_expired_links_are_not_found(published):
+    server, path = published
+    url = server.publish(path, ttl=-1)
+    assert fetch(url)[0].status == 404
+    assert fetch(url.rsplit("/", 2)[0] + "/unknown/clip.mp4")[0].status == 404
+
+
+def test_published_files_are_pinned_until_their_link_expires(published):
+    server, path = published
+    server.publish(path, ttl=-1)
+    assert is_pinned(path)
+    server.sweep()
+    assert not is_pinned(path)
+
+
+def test_head_sends_no_body(published):
+    server, path = published
+    response, body = fetch(server.publish(path), method="HEAD")
+    assert (response.status, response.getheader("Content-Length"), body) == (200, "10", b"")
+
+
+def test_links_use_the_host_the_browser_asked_for(server):
+    assert server.base_url("editor.example.com:8501") == f"http://editor.example.com:{server.port}"
+    assert server.base_url() == f"http://localhost:{server.port}"
+    assert MediaServer(public_url="https://media.example.com/").base_url("editor:8501") == "https://media.example.com"
+
+
+def test_non_loopback_server_needs_a_public_url():
+    with pytest.raises(RuntimeError, match="EDITZ_MEDIA_PUBLIC_URL"):
+        MediaServer(host="0.0.0.0", public_url="").publish("clip.mp4")
+
+
+def test_taken_port_is_reported(server):
+    with pytest.raises(RuntimeError, match="already in use"):
+        MediaServer(host="127.0.0.1", port=server.port).start()
@@ -0,0 +1,26 @@
+import pytest
+
+from engine.parallel_render import MAX_CHUNKS, chunk_bounds, choose_chunk_count
+
+
+@pytest.mark.parametrize("duration, cpus, count", [
+    (10.0, 8, 1),
+    (60.0, 8, 4),
+    (600.0, 8, 8),
+    (6000.0, 64, MAX_CHUNKS),
+])
+def test_choose_chunk_count_keeps_chunks_long_enough(duration, cpus, count):
+    assert choose_chunk_count(duration, cpus) == count
+
+
+def test_chunk_bounds_cut_on_the_nearest_keyframes():
+    keyframes = [0.0, 9.0, 21.0, 29.0, 41.0]
+    assert chunk_bounds(keyframes, 0.0, 40.0, 4) == [(0.0, 9.0), (9.0, 21.0), (21.0, 29.0), (29.0, 40.0)]
+
+
+def test_chunk_bounds_merge_chunks_that_share_a_keyframe():
+    assert chunk_bounds([0.0, 15.0], 0.0, 30.0, 3) == [(0.0, 15.0), (15.0, 30.0)]
+
+
+def test_chunk_bounds_without_keyframes_split_evenly():
+    assert chunk_bounds([], 10.0, 40.0, 3) == [(10.0, 20.0), (20.0, 30.0), (30.0, 40.0)]
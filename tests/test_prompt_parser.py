@@ -0,0 +1,50 @@
+import pytest
+
+from engine.prompt_parser import expand_anchors, mentions_anchors, parse_text_overlay_prompt, parse_trim_prompt
+
+ANCHORS = {"scene 1": 0.0, "scene 2": 5.0, "first cut": 5.0, "last cut": 5.0, "end": 20.0}
+
+
+@pytest.mark.parametrize("prompt", [
+    "Add title at top center from 5-10s",
+    "Add text in red at the top from 1 to 4 seconds",
+    "Add caption big from 0 to 3s",
+    'Add "Hello" in bold at the top from 1 to 4s',
+    'Add "Hello" with a black background from 1 to 4s',
+])
+def test_ambiguous_titles_fall_back_to_the_model(prompt):
+    assert parse_text_overlay_prompt(prompt) is None
+
+
+def test_unquoted_title_with_trailing_style():
+    assert parse_text_overlay_prompt("Add title Welcome in large yellow at bottom from 2 to 6s") == {
+        "text": "Welcome", "start_time": 2.0, "duration": 4.0, "font_size": 56, "font_color": "yellow",
+        "x_position": "(w-text_w)/2", "y_position": "h-text_h-50",
+    }
+
+
+def test_quoted_title_keeps_color_and_placement():
+    overlay = parse_text_overlay_prompt('Add "Hello" in red at the top from 1 to 4 seconds')
+    assert (overlay["text"], overlay["font_color"], overlay["y_position"]) == ("Hello", "red", "50")
+
+
+def test_cut_range_is_not_read_as_keep():
+    assert parse_trim_prompt("cut 10 to 20") is None
+    assert parse_trim_prompt("keep 10 to 20") == {"start_time": 10.0, "duration": 10.0}
+
+
+@pytest.mark.parametrize("prompt", [
+    'add "Scene 2" at the top from 1-3s',
+    'add "The First Cut" from 0 to 2',
+    'add "Scene 7" from 0 to 2',
+    "add 'Trim the intro' from 0 to 2",
+])
+def test_quoted_titles_are_not_anchors(prompt):
+    assert not mentions_anchors(prompt)
+    assert expand_anchors(prompt, ANCHORS) == prompt
+
+
+def test_anchors_outside_quotes_still_expand():
+    prompt = 'keep scene 2 and then add "Scene 2" from the first cut to 10s'
+    assert mentions_anchors(prompt)
+    assert expand_anchors(prompt, ANCHORS) == 'keep from 5s to 20s and then add "Scene 2" from 0s to 10s'
@@ -0,0 +1,21 @@
+import pytest
+
+from engine.smart_cut import encoder_args, plan_segments
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+@pytest.mark.parametrize("start, duration, segments", [
+    (1.0, 6.5, [(1.0, 2.0, "encode"), (2.0, 6.0, "copy"), (6.0, 7.5, "encode")]),
+    (2.0, 4.0, [(2.0, 6.0, "copy")]),
+    (2.5, 1.0, [(2.5, 3.5, "encode")]),
+    (3.0, 1.0, [(3.0, 4.0, "encode")]),
+])
+def test_plan_segments_copies_between_keyframes(start, duration, segments):
+    assert plan_segments(KEYFRAMES, start, duration) == segments
+
+
+def test_encoder_args_match_the_source_profile():
+    stream = {"codec_name": "h264", "pix_fmt": "yuv420p", "profile": "Constrained Baseline"}
+    assert encoder_args(stream) == {"vcodec": "libx264", "pix_fmt": "yuv420p", "profile:v": "baseline"}
+    assert encoder_args({"codec_name": "hevc", "profile": "Main"}) == {"vcodec": "libx265"}
@@ -0,0 +1,63 @@
+from array import array
+
+from engine import editing, windowed_render
+from engine.media_index import MediaRecord
+from engine.windowed_render import keyframe_window, render_window
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+SRT = "1\n00:00:01,000 --> 00:00:02,000\nHello\n"
+
+
+def _record(duration=10.0, keyframes=KEYFRAMES, codec="h264"):
+    info = {"format": {"duration": str(duration)},
+            "streams": [{"index": 0, "codec_type": "video", "codec_name": codec, "width": 320, "height": 240,
+                         "pix_fmt": "yuv420p", "profile": "High", "avg_frame_rate": "25/1"},
+                        {"index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000",
+                         "channels": 1}]}
+    return MediaRecord(info, array("d", keyframes))
+
+
+def test_keyframe_window_covers_the_overlay():
+    assert keyframe_window(KEYFRAMES, 10.0, 2.5, 3.5) == (2.0, 4.0)
+    assert keyframe_window(KEYFRAMES, 10.0, 4.0, 6.0) == (4.0, 6.0)
+    assert keyframe_window(KEYFRAMES, 10.0, 8.5, 9.5) == (8.0, 10.0)
+
+
+def test_render_window_declines_unsupported_codecs(monkeypatch):
+    monkeypatch.setattr(windowed_render, "index_media", lambda path: _record(codec="vp9"))
+    assert render_window("in.webm", "out.webm", 2.5, 3.5, lambda stream, offset: stream) is None
+
+
+def test_render_window_declines_windows_covering_most_of_the_clip(monkeypatch):
+    monkeypatch.setattr(windowed_render, "index_media", lambda path: _record())
+    assert render_window("in.mp4", "out.mp4", 1.0, 8.5, lambda stream, offset: stream) is None
+
+
+def test_render_window_uses_indexed_video_stream(monkeypatch):
+    calls = {}
+    monkeypatch.setattr(windowed_render, "index_media", lambda path: _record())
+    monkeypatch.setattr(windowed_render, "join_segments",
+                        lambda input_path, output_path, segments, encode_args, **kwargs:
+                        calls.update(segments=segments, encode_args=encode_args) or output_path)
+
+    assert windowed_render.render_window("in.mp4", "out.mp4", 2.5, 3.5, lambda stream, offset: stream) == "out.mp4"
+    assert calls["encode_args"] == {"vcodec": "libx264", "pix_fmt": "yuv420p", "profile:v": "high"}
+    assert calls["segments"] == [(0.0, 2.0, "copy"), (2.0, 4.0, "encode"), (4.0, 10.0, "copy")]
+
+
+def test_burned_subtitles_take_the_windowed_path(tmp_path, monkeypatch):
+    calls = []
+
+    def join_segments(input_path, output_path, segments, encode_args, **kwargs):
+        calls.append(encode_args)
+        with open(output_path, "wb") as f:
+            f.write(b"joined")
+        return output_path
+
+    monkeypatch.setattr(windowed_render, "index_media", lambda path: _record())
+    monkeypatch.setattr(windowed_render, "join_segments", join_segments)
+    output = tmp_path / "out.mp4"
+
+    assert editing.render_subtitles("in.mp4", str(output), SRT) == str(output)
+    assert calls == [{"vcodec": "libx264", "pix_fmt": "yuv420p", "profile:v": "high"}]
+    assert output.read_bytes() == b"joined"
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from engine.workspace import QuotaExceeded, WorkspaceManager, scratch_path
+
+
+def _manager(tmp_path, **quotas):
+    return WorkspaceManager(disk_root=str(tmp_path / "scratch"), ram_root="", **quotas)
+
+
+def _fill(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def test_workspace_is_removed_even_when_the_job_fails(tmp_path):
+    manager = _manager(tmp_path)
+    with pytest.raises(RuntimeError):
+        with manager.workspace("render") as job:
+            path = job.path(".srt")
+            raise RuntimeError("ffmpeg failed")
+    assert not os.path.exists(path)
+    assert not os.path.exists(job.disk_dir)
+    assert manager.usage()["active"] == 0
+
+
+def test_job_over_its_quota_gets_no_more_files(tmp_path):
+    manager = _manager(tmp_path, job_quota=100)
+    with manager.workspace("render") as job:
+        _fill(job.path(), 150)
+        with pytest.raises(QuotaExceeded, match="over its quota"):
+            job.path()
+
+
+def test_full_scratch_disk_refuses_every_job(tmp_path):
+    manager = _manager(tmp_path, disk_quota=100)
+    with manager.workspace("first") as first, manager.workspace("second") as second:
+        _fill(first.path(), 150)
+        with pytest.raises(QuotaExceeded, match="Scratch disk is full"):
+            second.path()
+
+
+def test_workspaces_of_dead_processes_are_swept(tmp_path):
+    manager = _manager(tmp_path)
+    orphan = os.path.join(manager.disk_root, "render-999999999-abcd")
+    os.makedirs(orphan)
+    _fill(os.path.join(orphan, "piece.ts"), 10)
+
+    assert manager.sweep() == 10
+    assert not os.path.exists(orphan)
+
+
+def test_scratch_path_uses_the_current_workspace(tmp_path, monkeypatch):
+    manager = _manager(tmp_path)
+    monkeypatch.setattr("engine.workspace.get_workspace_manager", lambda: manager)
+    with manager.workspace("render") as job:
+        assert os.path.dirname(scratch_path(".wav")) == job.disk_dir
+    assert os.path.dirname(scratch_path(".wav")) == manager.loose().disk_dir
+
+
+def test_allocations_do_not_walk_the_scratch_tree(tmp_path, monkeypatch):
+    manager = _manager(tmp_path, disk_quota=100)
+    manager.measure()
+    walks = []
+    monkeypatch.setattr("engine.workspace.os.walk", lambda *args: walks.append(args) or iter(()))
+    with manager.workspace("render") as job:
+        _fill(job.path(), 50)
+        job.path()
+    assert walks == []
+
+
+def test_other_processes_scratch_counts_from_the_last_sweep(tmp_path):
+    manager = _manager(tmp_path, disk_quota=100)
+    other = os.path.join(manager.disk_root, "render-1-abcd")
+    with manager.workspace("render") as job:
+        job.path()
+        os.makedirs(other)
+        _fill(os.path.join(other, "piece.ts"), 150)
+        job.path()
+        manager.sweep()
+        with pytest.raises(QuotaExceeded, match="Scratch disk is full"):
+            job.path()